@@ -0,0 +1,26 @@
+"""
+Бенчмарки проектов YaNews и YaNote.
+
+Запускаются из корня репозитория, например::
+
+    python -m benchmarks.moderation
+"""
+import os
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+SETTINGS_MODULES = {
+    "ya_news": "yanews.settings",
+    "ya_note": "yanote.settings",
+}
+
+
+def setup_django(project):
+    """Подключает проект к sys.path и настраивает Django."""
+    sys.path.insert(0, str(BASE_DIR / project))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", SETTINGS_MODULES[project])
+    import django
+
+    django.setup()
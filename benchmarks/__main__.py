@@ -0,0 +1,181 @@
+"""
+Нагрузочный тест страниц проекта YaNews или YaNote.
+
+Заполняет отдельную базу данных, прогоняет сценарии через тестовый
+клиент Django, локальный WSGI-сервер или ASGI-приложение и выводит
+p50/p95/p99 задержки, SQL-запросы на запрос и пропускную способность::
+
+    python -m benchmarks ya_news --scale smoke --save baseline.json
+    python -m benchmarks ya_news --scale smoke --compare baseline.json
+
+База данных по умолчанию временная. С ``--database PATH`` она
+сохраняется и при следующем запуске используется повторно без
+заполнения, что важно для профиля ``full``.
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks import SETTINGS_MODULES, setup_django
+from benchmarks.drivers import DRIVERS
+from benchmarks.runner import (
+    compare, format_table, load_report, run_scenario, save_report
+)
+from benchmarks.scenarios import SCENARIOS
+from benchmarks.seeding import SCALES, SEEDERS, VOLUMES, is_seeded
+
+
+def positive(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError("ожидается положительное число")
+    return number
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks", description=__doc__.split("\n")[1]
+    )
+    parser.add_argument("project", choices=SETTINGS_MODULES)
+    parser.add_argument("--driver", choices=DRIVERS, default="client")
+    parser.add_argument("--scale", choices=SCALES, default="smoke")
+    for volume in SCALES["smoke"]:
+        parser.add_argument(
+            f"--{volume}",
+            type=int,
+            help=f"Переопределить объём профиля: {volume}.",
+        )
+    parser.add_argument("--requests", type=positive, default=200)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument(
+        "--concurrency",
+        type=positive,
+        default=1,
+        help="Число одновременных запросов (для --driver wsgi и asgi).",
+    )
+    parser.add_argument(
+        "--scenario",
+        action="append",
+        help="Запустить только указанные сценарии.",
+    )
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument(
+        "--database",
+        type=Path,
+        help="Файл базы данных, сохраняемый между запусками.",
+    )
+    parser.add_argument("--save", type=Path, help="Сохранить результаты.")
+    parser.add_argument(
+        "--compare", type=Path, help="Сравнить с сохранёнными результатами."
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Допустимый относительный рост p95 при сравнении.",
+    )
+    args = parser.parse_args(argv)
+    if args.concurrency > 1 and args.driver == "client":
+        parser.error("--concurrency не поддерживается драйвером client")
+    if args.requests < 2:
+        parser.error("для процентилей нужно хотя бы два запроса")
+    return args
+
+
+def setup_database(connection, name, args, volumes):
+    """Создаёт или открывает базу для прогона и заполняет её при нужде."""
+    connection.settings_dict["TEST"]["NAME"] = str(name)
+    old_name = connection.creation.create_test_db(
+        verbosity=0,
+        autoclobber=True,
+        serialize=False,
+        keepdb=args.database is not None,
+    )
+    if is_seeded():
+        print(f"База данных {name} уже заполнена.", file=sys.stderr)
+    else:
+        started = time.perf_counter()
+        SEEDERS[args.project](volumes, args.seed)
+        print(
+            f"Заполнение {volumes}: {time.perf_counter() - started:.0f} с",
+            file=sys.stderr,
+        )
+    return old_name
+
+
+def run(driver, args):
+    scenarios = [
+        scenario for scenario in SCENARIOS[args.project]()
+        if not args.scenario or scenario.name in args.scenario
+    ]
+    return {
+        scenario.name: run_scenario(
+            driver, scenario, args.requests, args.warmup, args.concurrency
+        )
+        for scenario in scenarios
+    }
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    volumes = {
+        volume: getattr(args, volume) or SCALES[args.scale][volume]
+        for volume in VOLUMES[args.project]
+    }
+    setup_django(args.project)
+    from django.conf import settings
+    from django.db import connection
+
+    # Нагрузочный тест меряет боевой режим: без накопления
+    # connection.queries и отладочных страниц. SQL_DEBUG вычисляется из
+    # DEBUG при импорте настроек, поэтому отладочные middleware
+    # выключаются явно; драйверы создают обработчики уже после этого.
+    settings.DEBUG = False
+    settings.SQL_DEBUG = False
+    settings.REQUEST_PROFILING = False
+    settings.REQUEST_PROFILING_MEMORY = False
+    settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, "testserver"]
+
+    with tempfile.TemporaryDirectory() as directory:
+        if args.database is not None:
+            name = args.database.resolve()
+        else:
+            name = Path(directory) / "benchmark.sqlite3"
+        old_name = setup_database(connection, name, args, volumes)
+        driver = DRIVERS[args.driver]()
+        try:
+            results = run(driver, args)
+        finally:
+            driver.close()
+            connection.creation.destroy_test_db(
+                old_name, verbosity=0, keepdb=args.database is not None
+            )
+
+    report = {
+        "project": args.project,
+        "driver": args.driver,
+        "concurrency": args.concurrency,
+        "volumes": volumes,
+        "results": results,
+    }
+    print(
+        f"{args.project}, драйвер {args.driver}, "
+        f"параллельно {args.concurrency}, запросов {args.requests}"
+    )
+    print(format_table(results))
+    if args.save:
+        save_report(args.save, report)
+    if args.compare:
+        lines, regressed = compare(
+            load_report(args.compare), report, args.threshold
+        )
+        print()
+        print("\n".join(lines))
+        if regressed:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
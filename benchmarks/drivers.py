@@ -0,0 +1,360 @@
+"""
+Способы выполнить запрос к проекту: тестовый клиент Django, настоящий
+HTTP-запрос к локальному WSGI-серверу или вызов ASGI-приложения в том же
+процессе.
+
+Драйвер возвращает Sample: код ответа, время от отправки запроса до
+получения всего тела ответа и количество SQL-запросов, выполненных при
+его обработке.
+"""
+import asyncio
+import http.client
+import itertools
+import threading
+import time
+from collections import namedtuple
+from contextvars import ContextVar
+from http.cookies import SimpleCookie
+from socketserver import ThreadingMixIn
+from urllib.parse import unquote, urlencode
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+Sample = namedtuple("Sample", ("status", "elapsed", "queries"))
+
+
+class QueryCounter:
+    """Обёртка execute_wrapper, считающая SQL-запросы соединения."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def login_client(user):
+    """Тестовый клиент, от имени пользователя или анонимный (None)."""
+    from django.test import Client
+
+    client = Client()
+    if user is not None:
+        client.force_login(user)
+    return client
+
+
+# SQL-запросы обрабатываемого запроса. asgiref и пул асинхронных
+# представлений передают контекст в свои потоки, поэтому счётчик виден
+# во всех соединениях, через которые проходит запрос.
+current_queries = ContextVar("benchmark_queries", default=None)
+
+
+def count_query(execute, sql, params, many, context):
+    queries = current_queries.get()
+    if queries is not None:
+        # list.append атомарен: потоки одного запроса не теряют отметки.
+        queries.append(sql)
+    return execute(sql, params, many, context)
+
+
+class ContextQueryCounting:
+    """
+    Подключает count_query ко всем соединениям с базой данных.
+
+    Соединения потоков создаются по мере надобности, поэтому обёртка
+    ставится и на каждое новое соединение.
+    """
+
+    def install_counters(self):
+        from django.db import connections
+        from django.db.backends.signals import connection_created
+
+        connection_created.connect(self.install_counter)
+        for connection in connections.all():
+            self.install_counter(connection=connection)
+
+    @staticmethod
+    def install_counter(sender=None, connection=None, **kwargs):
+        if count_query not in connection.execute_wrappers:
+            connection.execute_wrappers.append(count_query)
+
+    def uninstall_counters(self):
+        from django.db.backends.signals import connection_created
+
+        connection_created.disconnect(self.install_counter)
+
+
+class ClientDriver(ContextQueryCounting):
+    """
+    Запросы через django.test.Client.
+
+    Запросы к базе считаются и в потоках, где работают асинхронные
+    представления.
+    """
+
+    name = "client"
+
+    def __init__(self):
+        self.clients = {}
+        self.install_counters()
+
+    def client(self, user):
+        key = user.pk if user is not None else None
+        if key not in self.clients:
+            self.clients[key] = login_client(user)
+        return self.clients[key]
+
+    def request(self, scenario):
+        client = self.client(scenario.user)
+        queries = []
+        token = current_queries.set(queries)
+        try:
+            started = time.perf_counter()
+            response = getattr(client, scenario.method)(
+                scenario.url, data=scenario.get_data()
+            )
+            if response.streaming:
+                b"".join(response.streaming_content)
+            elapsed = time.perf_counter() - started
+        finally:
+            current_queries.reset(token)
+        return Sample(response.status_code, elapsed, len(queries))
+
+    def close(self):
+        self.uninstall_counters()
+        self.clients.clear()
+
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+class HttpDriver:
+    """
+    Основа драйверов, которые отправляют запросы с заголовками и cookie.
+
+    Количество SQL-запросов сервер сохраняет по заголовку
+    X-Benchmark-Id, который драйвер добавляет к запросу. Наследник
+    реализует send().
+    """
+
+    id_header = "X-Benchmark-Id"
+
+    def __init__(self):
+        self.queries = {}
+        self.ids = itertools.count()
+        self.cookies = {}
+
+    def send(self, method, url, body=None, headers=None):
+        """Отправляет запрос; возвращает код, заголовки и тело ответа."""
+        raise NotImplementedError
+
+    def session_cookies(self, user):
+        """Cookie сессии пользователя и CSRF-токен для POST-запросов."""
+        from django.conf import settings
+        from django.urls import reverse
+
+        key = user.pk if user is not None else None
+        if key in self.cookies:
+            return self.cookies[key]
+        cookies = {}
+        if user is not None:
+            client = login_client(user)
+            session = client.cookies[settings.SESSION_COOKIE_NAME]
+            cookies[settings.SESSION_COOKIE_NAME] = session.value
+        status, headers, _ = self.send("GET", reverse("users:login"))
+        received = SimpleCookie()
+        for name, value in headers:
+            if name.lower() == "set-cookie":
+                received.load(value)
+        cookies[settings.CSRF_COOKIE_NAME] = (
+            received[settings.CSRF_COOKIE_NAME].value
+        )
+        self.cookies[key] = cookies
+        return cookies
+
+    def request(self, scenario):
+        from django.conf import settings
+
+        cookies = self.session_cookies(scenario.user)
+        request_id = str(next(self.ids))
+        headers = {
+            self.id_header: request_id,
+            "Cookie": "; ".join(
+                f"{name}={value}" for name, value in cookies.items()
+            ),
+        }
+        url, body, data = scenario.url, None, scenario.get_data()
+        if scenario.method == "post":
+            data = dict(
+                data or {},
+                csrfmiddlewaretoken=cookies[settings.CSRF_COOKIE_NAME],
+            )
+            body = urlencode(data)
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+        elif data:
+            url = f"{url}?{urlencode(data)}"
+        started = time.perf_counter()
+        status, _, _ = self.send(scenario.method.upper(), url, body, headers)
+        elapsed = time.perf_counter() - started
+        return Sample(status, elapsed, self.queries.pop(request_id, 0))
+
+    def close(self):
+        pass
+
+
+class WsgiDriver(HttpDriver):
+    """
+    HTTP-запросы к wsgiref-серверу, запущенному в фоновом потоке.
+
+    Каждый запрос обрабатывается в отдельном потоке сервера со своим
+    соединением с базой данных.
+    """
+
+    name = "wsgi"
+
+    def __init__(self):
+        from django.core.wsgi import get_wsgi_application
+
+        super().__init__()
+        self.handler = get_wsgi_application()
+        self.server = make_server(
+            "127.0.0.1",
+            0,
+            self.application,
+            server_class=ThreadingWSGIServer,
+            handler_class=QuietHandler,
+        )
+        self.host, self.port = self.server.server_address
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, daemon=True
+        )
+        self.thread.start()
+
+    def application(self, environ, start_response):
+        from django.db import connection
+
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            result = self.handler(environ, start_response)
+            try:
+                body = b"".join(result)
+            finally:
+                result.close()
+        request_id = environ.get("HTTP_X_BENCHMARK_ID")
+        if request_id is not None:
+            self.queries[request_id] = counter.count
+        return [body]
+
+    def send(self, method, url, body=None, headers=None):
+        connection = http.client.HTTPConnection(self.host, self.port)
+        try:
+            connection.request(method, url, body, headers or {})
+            response = connection.getresponse()
+            content = response.read()
+            return response.status, response.getheaders(), content
+        finally:
+            connection.close()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class AsgiDriver(ContextQueryCounting, HttpDriver):
+    """
+    Вызов ASGI-приложения проекта в том же процессе, без сети.
+
+    Цикл событий работает в фоновом потоке, а драйвер передаёт ему
+    запросы из потоков прогона, поэтому с --concurrency N в цикле
+    одновременно обрабатываются до N запросов.
+    """
+
+    name = "asgi"
+    host = "testserver"
+
+    def __init__(self):
+        from django.core.asgi import get_asgi_application
+
+        super().__init__()
+        self.handler = get_asgi_application()
+        self.install_counters()
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(
+            target=self.loop.run_forever, daemon=True
+        )
+        self.thread.start()
+
+    def send(self, method, url, body=None, headers=None):
+        future = asyncio.run_coroutine_threadsafe(
+            self.call(method, url, body, headers or {}), self.loop
+        )
+        return future.result()
+
+    async def call(self, method, url, body, headers):
+        path, _, query_string = url.partition("?")
+        body = (body or "").encode()
+        headers = {"Host": self.host, **headers}
+        if body:
+            headers["Content-Length"] = str(len(body))
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": unquote(path),
+            "raw_path": path.encode(),
+            "query_string": query_string.encode(),
+            "root_path": "",
+            "headers": [
+                (name.lower().encode("latin-1"), value.encode("latin-1"))
+                for name, value in headers.items()
+            ],
+            "client": ("127.0.0.1", 0),
+            "server": (self.host, 80),
+        }
+        received = asyncio.Queue()
+        received.put_nowait(
+            {"type": "http.request", "body": body, "more_body": False}
+        )
+        response = {"headers": [], "body": []}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["headers"] = [
+                    (name.decode("latin-1"), value.decode("latin-1"))
+                    for name, value in message["headers"]
+                ]
+            elif message["type"] == "http.response.body":
+                response["body"].append(message.get("body", b""))
+
+        queries = []
+        # Задача запроса работает в собственной копии контекста.
+        current_queries.set(queries)
+        await self.handler(scope, received.get, send)
+        request_id = headers.get(self.id_header)
+        if request_id is not None:
+            self.queries[request_id] = len(queries)
+        return (
+            response["status"], response["headers"], b"".join(response["body"])
+        )
+
+    def close(self):
+        self.uninstall_counters()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+
+DRIVERS = {
+    ClientDriver.name: ClientDriver,
+    WsgiDriver.name: WsgiDriver,
+    AsgiDriver.name: AsgiDriver,
+}
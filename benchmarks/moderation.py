@@ -0,0 +1,72 @@
+"""
+Проверка комментария на запрещённые слова при росте списка слов.
+
+Сравнивает автомат Ахо — Корасик (news.moderation.WordMatcher) с прежним
+поиском подстроки для каждого слова::
+
+    python -m benchmarks.moderation --text-length 2000
+"""
+import argparse
+import random
+import timeit
+
+from benchmarks import setup_django
+
+ALPHABET = "абвгдежзийклмнопрстуфхцчшщъыьэюя"
+LIST_SIZES = (5, 50, 500, 5_000, 50_000)
+
+
+def random_words(count, rng):
+    return [
+        "".join(rng.choices(ALPHABET, k=rng.randint(6, 12)))
+        for _ in range(count)
+    ]
+
+
+def random_text(length, rng):
+    words = []
+    while sum(len(word) + 1 for word in words) < length:
+        words.append("".join(rng.choices(ALPHABET, k=rng.randint(2, 9))))
+    return " ".join(words)[:length]
+
+
+def linear_scan(words, text):
+    lowered_text = text.lower()
+    return any(word in lowered_text for word in words)
+
+
+def best_time(func, repeat):
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--text-length", type=int, default=1_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    setup_django("ya_news")
+    from news.moderation import WordMatcher
+
+    rng = random.Random(args.seed)
+    text = random_text(args.text_length, rng)
+    print(f"Длина текста: {len(text)} символов")
+    print(
+        f"{'слов':>8} {'сборка, мс':>12} "
+        f"{'автомат, мкс':>14} {'перебор, мкс':>14}"
+    )
+    for size in LIST_SIZES:
+        words = random_words(size, rng)
+        build = best_time(lambda: WordMatcher(words), 1)
+        matcher = WordMatcher(words)
+        automaton = best_time(lambda: matcher.search(text), args.repeat)
+        scan = best_time(lambda: linear_scan(words, text), args.repeat)
+        print(
+            f"{size:>8} {build * 1e3:>12.1f} "
+            f"{automaton * 1e6:>14.0f} {scan * 1e6:>14.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
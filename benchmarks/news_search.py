@@ -0,0 +1,123 @@
+"""
+Полнотекстовый поиск YaNews по большому числу новостей и комментариев.
+
+Заполняет временную базу данных сгенерированными текстами и измеряет
+время news.search.search() на запросах разной частотности::
+
+    python -m benchmarks.news_search --rows 1000000
+"""
+import argparse
+import itertools
+import random
+import statistics
+import time
+
+from benchmarks import setup_django
+
+ALPHABET = "абвгдеёжзийклмнопрстуфхцчшщъыьэюя"
+VOCABULARY_SIZE = 50_000
+WORDS_PER_TEXT = (8, 40)
+COMMENTS_PER_NEWS = 9
+QUERIES = (
+    ("редкое слово", "word:-1"),
+    ("частое слово", "word:100"),
+    ("два слова", "word:50 word:2000"),
+    ("префикс", "prefix:500"),
+    ("нет совпадений", "отсутствующееслово"),
+)
+
+
+def vocabulary(rng):
+    words = set()
+    while len(words) < VOCABULARY_SIZE:
+        words.add("".join(rng.choices(ALPHABET, k=rng.randint(4, 12))))
+    return sorted(words)
+
+
+def texts(words, rng):
+    """Бесконечный поток текстов с распределением слов по закону Ципфа."""
+    cum_weights = list(
+        itertools.accumulate(1 / rank for rank in range(1, len(words) + 1))
+    )
+    while True:
+        yield " ".join(
+            rng.choices(
+                words,
+                cum_weights=cum_weights,
+                k=rng.randint(*WORDS_PER_TEXT),
+            )
+        )
+
+
+def seed(rows, words, rng):
+    from django.db import transaction
+
+    from news.factories import create_comments, create_news, create_users
+
+    stream = texts(words, rng)
+    news_rows = max(rows // (COMMENTS_PER_NEWS + 1), 1)
+    with transaction.atomic():
+        user_ids = create_users(["benchmark"])
+        news_ids = create_news(news_rows, texts=stream)
+        create_comments(rows - news_rows, news_ids, user_ids, texts=stream)
+
+
+def resolve(query, words):
+    """Подставляет в запрос слова словаря: word:N — N-е по частоте."""
+    parts = []
+    for part in query.split():
+        kind, _, rank = part.partition(":")
+        if kind == "word":
+            parts.append(words[int(rank)])
+        elif kind == "prefix":
+            parts.append(words[int(rank)][:4])
+        else:
+            parts.append(part)
+    return " ".join(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    setup_django("ya_news")
+    from django.db import connection
+
+    from news.search import search
+
+    rng = random.Random(args.seed)
+    words = vocabulary(rng)
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        started = time.perf_counter()
+        seed(args.rows, words, rng)
+        print(
+            f"Строк: {args.rows}, заполнение: "
+            f"{time.perf_counter() - started:.0f} с"
+        )
+        print(
+            f"{'запрос':<16} {'найдено':>8} {'p50, мс':>9} {'p95, мс':>9}"
+        )
+        for label, query in QUERIES:
+            query = resolve(query, words)
+            found = len(search(query, args.limit))
+            timings = []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                search(query, args.limit)
+                timings.append((time.perf_counter() - started) * 1e3)
+            p95 = statistics.quantiles(timings, n=20)[-1]
+            print(
+                f"{label:<16} {found:>8} "
+                f"{statistics.median(timings):>9.2f} {p95:>9.2f}"
+            )
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Прогон сценариев, статистика, сохранение и сравнение результатов."""
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+PERCENTILES = (50, 95, 99)
+
+
+def run_scenario(driver, scenario, requests, warmup=0, concurrency=1):
+    """Выполняет сценарий и возвращает статистику по его запросам."""
+    for _ in range(warmup):
+        driver.request(scenario)
+    started = time.perf_counter()
+    if concurrency == 1:
+        samples = [driver.request(scenario) for _ in range(requests)]
+    else:
+        with ThreadPoolExecutor(concurrency) as pool:
+            samples = list(
+                pool.map(lambda _: driver.request(scenario), range(requests))
+            )
+    return summarize(samples, time.perf_counter() - started)
+
+
+def summarize(samples, wall_time):
+    latencies = [sample.elapsed * 1e3 for sample in samples]
+    cut_points = statistics.quantiles(latencies, n=100, method="inclusive")
+    queries = [sample.queries for sample in samples]
+    statuses = {}
+    for sample in samples:
+        statuses[str(sample.status)] = statuses.get(str(sample.status), 0) + 1
+    summary = {
+        f"p{percentile}": round(cut_points[percentile - 1], 3)
+        for percentile in PERCENTILES
+    }
+    summary.update(
+        requests=len(samples),
+        mean=round(statistics.fmean(latencies), 3),
+        queries=round(statistics.fmean(queries), 2),
+        max_queries=max(queries),
+        throughput=round(len(samples) / wall_time, 1),
+        statuses=statuses,
+    )
+    return summary
+
+
+def format_table(results):
+    lines = [
+        f"{'сценарий':<18} {'p50, мс':>9} {'p95, мс':>9} {'p99, мс':>9} "
+        f"{'SQL':>6} {'зап./с':>8}  коды"
+    ]
+    for name, summary in results.items():
+        codes = ", ".join(
+            f"{status}×{count}"
+            for status, count in sorted(summary["statuses"].items())
+        )
+        lines.append(
+            f"{name:<18} {summary['p50']:>9.2f} {summary['p95']:>9.2f} "
+            f"{summary['p99']:>9.2f} {summary['queries']:>6.1f} "
+            f"{summary['throughput']:>8.1f}  {codes}"
+        )
+    return "\n".join(lines)
+
+
+def save_report(path, report):
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(report, file, ensure_ascii=False, indent=2)
+
+
+def load_report(path):
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def compare(baseline, current, threshold):
+    """
+    Сравнивает результаты с сохранённой базовой линией.
+
+    Регрессия — рост p95 больше чем в ``1 + threshold`` раз или рост
+    числа SQL-запросов на запрос. Возвращает строки отчёта и признак
+    найденной регрессии.
+    """
+    lines = [
+        f"{'сценарий':<18} {'p95 было':>9} {'p95 стало':>10} {'изм.':>7} "
+        f"{'SQL было':>9} {'SQL стало':>10}"
+    ]
+    warnings = [
+        f"Внимание: {key} отличается от базовой линии "
+        f"({baseline.get(key)} → {current.get(key)})."
+        for key in ("project", "driver", "concurrency", "volumes")
+        if baseline.get(key) != current.get(key)
+    ]
+    lines = warnings + lines
+    regressed = False
+    for name, summary in current["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            lines.append(f"{name:<18} нет в базовой линии")
+            continue
+        change = summary["p95"] / before["p95"] - 1 if before["p95"] else 0
+        slower = change > threshold
+        more_queries = summary["max_queries"] > before["max_queries"]
+        marks = " ".join(
+            mark for mark, failed in (
+                ("медленнее", slower), ("больше SQL", more_queries)
+            )
+            if failed
+        )
+        regressed = regressed or slower or more_queries
+        lines.append(
+            f"{name:<18} {before['p95']:>9.2f} {summary['p95']:>10.2f} "
+            f"{change:>+7.0%} {before['max_queries']:>9} "
+            f"{summary['max_queries']:>10}  {marks}".rstrip()
+        )
+    return lines, regressed
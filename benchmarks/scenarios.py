@@ -0,0 +1,106 @@
+"""
+Сценарии нагрузочных тестов: какие страницы и от чьего имени запрашивать.
+
+Сценарии строятся после заполнения базы, потому что адреса зависят от
+созданных объектов.
+"""
+import itertools
+from collections import namedtuple
+
+from benchmarks.seeding import BENCHMARK_USERNAME
+
+
+class Scenario(
+    namedtuple(
+        "Scenario", ("name", "method", "url", "data", "user"),
+        defaults=(None, None),
+    )
+):
+    """
+    Запрос сценария.
+
+    ``data`` — словарь параметров или функция без аргументов, которая
+    возвращает новые параметры для каждого запроса.
+    """
+
+    __slots__ = ()
+
+    def get_data(self):
+        return self.data() if callable(self.data) else self.data
+
+
+def benchmark_user():
+    from django.contrib.auth import get_user_model
+
+    return get_user_model().objects.get(username=BENCHMARK_USERNAME)
+
+
+def ya_news_scenarios():
+    from django.db.models import Max
+    from django.urls import reverse
+
+    from news.models import News
+
+    user = benchmark_user()
+    # Новость с наибольшим числом комментариев — худший случай для
+    # страницы новости.
+    busiest = News.objects.aggregate(Max("comment_count"))[
+        "comment_count__max"
+    ]
+    news = News.objects.filter(comment_count=busiest).first()
+    home_url = reverse("news:home")
+    detail_url = reverse("news:detail", args=(news.pk,))
+    async_home_url = reverse("news:async_home")
+    async_detail_url = reverse("news:async_detail", args=(news.pk,))
+    texts = (f"Комментарий номер {i}" for i in itertools.count())
+    return [
+        Scenario("home", "get", home_url),
+        Scenario("home:auth", "get", home_url, user=user),
+        Scenario("detail", "get", detail_url),
+        Scenario("detail:auth", "get", detail_url, user=user),
+        Scenario("search", "get", reverse("news:search"), {"q": "новость"}),
+        # Асинхронные варианты ленты и новости; их выигрыш виден
+        # с драйвером asgi и --concurrency больше 1.
+        Scenario("home:async", "get", async_home_url),
+        Scenario("detail:async", "get", async_detail_url),
+        Scenario("detail:async:auth", "get", async_detail_url, user=user),
+        # Публикация комментария сбрасывает кэш ленты, поэтому этот
+        # сценарий выполняется последним.
+        Scenario(
+            "comment:post", "post", detail_url,
+            lambda: {"text": next(texts)}, user,
+        ),
+    ]
+
+
+def ya_note_scenarios():
+    from django.conf import settings
+    from django.urls import reverse
+
+    from notes.models import Note
+
+    user = benchmark_user()
+    notes = Note.objects.filter(author=user)
+    note = notes.order_by("pk").first()
+    last_page = max(-(-notes.count() // settings.NOTES_PER_PAGE), 1)
+    list_url = reverse("notes:list")
+    return [
+        Scenario("list", "get", list_url, user=user),
+        Scenario("list:last", "get", list_url, {"page": last_page}, user),
+        Scenario(
+            "detail", "get", reverse("notes:detail", args=(note.slug,)),
+            user=user,
+        ),
+        Scenario(
+            "search", "get", reverse("notes:search"), {"q": "работа"}, user
+        ),
+        Scenario(
+            "export", "get", reverse("notes:export"), {"format": "csv"}, user
+        ),
+    ]
+
+
+SCENARIOS = {
+    "ya_news": ya_news_scenarios,
+    "ya_note": ya_note_scenarios,
+}
@@ -0,0 +1,74 @@
+"""
+Заполнение базы данных для нагрузочных тестов.
+
+Данные создаются фабриками проектов. Объёмы задаются профилями SCALES;
+отдельные значения можно переопределить из командной строки.
+"""
+BENCHMARK_USERNAME = "benchmark"
+
+SCALES = {
+    "smoke": {
+        "users": 20,
+        "news": 1_000,
+        "comments": 10_000,
+        "notes": 10_000,
+    },
+    "medium": {
+        "users": 200,
+        "news": 10_000,
+        "comments": 500_000,
+        "notes": 100_000,
+    },
+    "full": {
+        "users": 1_000,
+        "news": 100_000,
+        "comments": 10_000_000,
+        "notes": 1_000_000,
+    },
+}
+
+
+def usernames(count):
+    """Имена пользователей; первый из них — пользователь бенчмарка."""
+    return [BENCHMARK_USERNAME] + [f"user{i}" for i in range(1, count)]
+
+
+def seed_ya_news(volumes, seed):
+    from django.db import transaction
+
+    from news.factories import create_comments, create_news, create_users
+
+    with transaction.atomic():
+        user_ids = create_users(usernames(volumes["users"]))
+        news_ids = create_news(volumes["news"], seed=seed)
+        create_comments(volumes["comments"], news_ids, user_ids, seed=seed)
+
+
+def seed_ya_note(volumes, seed):
+    from django.db import transaction
+
+    from notes.factories import create_notes, create_users
+
+    with transaction.atomic():
+        user_ids = create_users(usernames(volumes["users"]))
+        create_notes(volumes["notes"], user_ids, seed=seed)
+
+
+SEEDERS = {
+    "ya_news": seed_ya_news,
+    "ya_note": seed_ya_note,
+}
+
+# Объёмы из профиля, которые использует заполнение каждого проекта.
+VOLUMES = {
+    "ya_news": ("users", "news", "comments"),
+    "ya_note": ("users", "notes"),
+}
+
+
+def is_seeded():
+    from django.contrib.auth import get_user_model
+
+    return get_user_model().objects.filter(
+        username=BENCHMARK_USERNAME
+    ).exists()
@@ -0,0 +1,80 @@
+"""
+Общие помощники фабрик тестовых данных YaNews и YaNote.
+
+Фабрики проектов (news.factories и notes.factories) вставляют строки
+пачками через bulk_insert; первичные ключи назначает база данных.
+Модуль лежит в корне репозитория: тесты подключают его через параметр
+pythonpath в pytest.ini, бенчмарки запускаются из корня.
+"""
+import itertools
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import NotSupportedError, connections, router, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+BATCH_SIZE = 5_000
+# Сколько разных фраз генерируется для одной фабрики: дальше фразы
+# выбираются из готового набора, это в разы быстрее сборки каждой.
+PHRASE_POOL_SIZE = 1_000
+
+
+def sentences(rng, min_words, max_words, words):
+    """Бесконечный поток случайных фраз из словаря."""
+    pool = [
+        " ".join(
+            rng.choices(words, k=rng.randint(min_words, max_words))
+        ).capitalize()
+        for _ in range(PHRASE_POOL_SIZE)
+    ]
+    while True:
+        yield rng.choice(pool)
+
+
+def bulk_insert(model, objs, batch_size=BATCH_SIZE):
+    """
+    Вставляет объекты пачками, не держа их все в памяти.
+
+    Возвращает первичные ключи, которые назначила база. SQLite не
+    сообщает их после bulk_create, но вставка идёт в одной транзакции,
+    а SQLite держит блокировку записи до её конца: ключи AUTOINCREMENT
+    новых строк идут подряд и заканчиваются наибольшим ключом таблицы.
+    """
+    connection = connections[router.db_for_write(model)]
+    returns_rows = connection.features.can_return_rows_from_bulk_insert
+    if not returns_rows and connection.vendor != "sqlite":
+        raise NotSupportedError(
+            f"{connection.display_name} не возвращает ключи после "
+            "bulk_create."
+        )
+    objs = iter(objs)
+    pks = []
+    count = 0
+    with transaction.atomic(using=connection.alias, savepoint=False):
+        while batch := list(itertools.islice(objs, batch_size)):
+            model.objects.using(connection.alias).bulk_create(batch)
+            count += len(batch)
+            if returns_rows:
+                pks.extend(obj.pk for obj in batch)
+        if returns_rows or not count:
+            return pks
+        last = model.objects.using(connection.alias).aggregate(
+            Max("pk")
+        )["pk__max"]
+    return range(last - count + 1, last + 1)
+
+
+def create_users(usernames, batch_size=BATCH_SIZE):
+    """Создаёт пользователей с указанными именами и без пароля."""
+    User = get_user_model()
+    password = make_password(None)
+    now = timezone.now()
+    return bulk_insert(
+        User,
+        (
+            User(username=username, password=password, date_joined=now)
+            for username in usernames
+        ),
+        batch_size,
+    )
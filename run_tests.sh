@@ -14,35 +14,87 @@ print_message () {
     echo -e "${left_filler_len// /$symbol}$message${right_filler_len// /$symbol}\033[0m"
 }
 
+ya_news_failed () {
+    print_message " При запуске упали ваши тесты для проекта YaNews. Проверьте тесты этого проекта " "=" 1
+    echo \`\`\` 1>&2
+}
 
-if python -m flake8 --config=setup.cfg 1>&2;
-then
-    print_message " flake8 завершил проверку кода, ошибок не обнаружено " "="
-    echo $LF 1>&2
-    if python structure_test.py
+ya_note_failed () {
+    print_message " При запуске упали ваши тесты для проекта YaNote. Проверьте тесты этого проекта " "=" 1
+    echo \`\`\` 1>&2
+}
+
+run_ya_news () {
+    # Extra arguments are passed to pytest.
+    cd ya_news
+    export DJANGO_SETTINGS_MODULE="${DJANGO_SETTINGS_MODULE:="yanews.settings_test"}"
+    pytest --tb=line "$@" 1>&2
+}
+
+run_ya_note () {
+    cd ya_note
+    export DJANGO_SETTINGS_MODULE="yanote.settings_test"
+    # manage.py test does not read pytest.ini: the shared bulk_factories
+    # module lives in the repository root.
+    export PYTHONPATH="..${PYTHONPATH:+:$PYTHONPATH}"
+    if [[ -z "$parallel" ]]; then
+        pytest --tb=line 1>&2
+    else
+        # Django's runner clones the test database for every worker process.
+        python manage.py test --parallel 1>&2
+    fi
+}
+
+run_sequential () {
+    if (run_ya_news);
     then
-        cd ya_news
-        export DJANGO_SETTINGS_MODULE="${DJANGO_SETTINGS_MODULE:="yanews.settings"}"
-        if pytest --tb=line 1>&2;
+        if (run_ya_note);
         then
-            cd ../ya_note
-            unset DJANGO_SETTINGS_MODULE
-            export DJANGO_SETTINGS_MODULE="${DJANGO_SETTINGS_MODULE:="yanote.settings"}"
-            if pytest --tb=line 1>&2;
-            then
-                exit 0
-            else
-                status=$?
-                print_message " При запуске упали ваши тесты для проекта YaNote. Проверьте тесты этого проекта " "=" 1
-                echo \`\`\` 1>&2
-                exit $status
-            fi
+            exit 0
         else
             status=$?
-            print_message " При запуске упали ваши тесты для проекта YaNews. Проверьте тесты этого проекта " "=" 1
-            echo \`\`\` 1>&2
+            ya_note_failed
             exit $status
         fi
+    else
+        status=$?
+        ya_news_failed
+        exit $status
+    fi
+}
+
+run_parallel () {
+    # Both projects run at once, each sharded across CPU cores; every worker
+    # gets its own test database. Output is printed project by project.
+    local ya_news_log=$(mktemp)
+    local ya_note_log=$(mktemp)
+    (run_ya_news -n auto) 2>"$ya_news_log" &
+    local ya_news_pid=$!
+    (run_ya_note) 2>"$ya_note_log" &
+    local ya_note_pid=$!
+    wait $ya_news_pid
+    local ya_news_status=$?
+    wait $ya_note_pid
+    local ya_note_status=$?
+    cat "$ya_news_log" "$ya_note_log" 1>&2
+    rm -f "$ya_news_log" "$ya_note_log"
+    if [[ $ya_news_status -ne 0 ]]; then ya_news_failed; fi
+    if [[ $ya_note_status -ne 0 ]]; then ya_note_failed; fi
+    if [[ $ya_news_status -ne 0 ]]; then exit $ya_news_status; fi
+    exit $ya_note_status
+}
+
+
+parallel=""
+if [[ "$1" == "--parallel" ]]; then parallel=1; fi
+
+if python -m flake8 --config=setup.cfg 1>&2;
+then
+    print_message " flake8 завершил проверку кода, ошибок не обнаружено " "="
+    echo $LF 1>&2
+    if python structure_test.py
+    then
+        if [[ -z "$parallel" ]]; then run_sequential; else run_parallel; fi
     else
         status=$?
         print_message " Убедитесь, что написанные вами тесты скопированы в указанные в ТЗ директории " "=" 1
@@ -10,6 +10,8 @@ class CommentInline(admin.StackedInline):
 
 @admin.register(News)
 class NewsAdmin(admin.ModelAdmin):
+    list_display = ("title", "date", "comment_count")
+    readonly_fields = ("comment_count",)
     inlines = [
         CommentInline,
     ]
@@ -0,0 +1,328 @@
+"""
+JSON API новостей.
+
+Ответы компактны: только поля, которые нужны клиенту, без отступов.
+Ответы API новостей кэшируются до изменения новостей или комментариев.
+Ошибки тоже возвращаются в JSON: {"detail": ...} и, для ошибок
+валидации, {"errors": ...} в формате Form.errors.get_json_data().
+
+API использует сессию сайта, поэтому POST-запросы, как и формы,
+требуют CSRF-токен: значение cookie csrftoken в заголовке X-CSRFToken.
+Без него API отвечает 403 тоже в JSON (см. csrf_failure).
+"""
+import json
+from http import HTTPStatus
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import Http404, HttpResponse, JsonResponse
+from django.views import csrf, generic
+
+from .cache import api_cache_key, get_api_response, set_api_response
+from .forms import CommentForm
+from .models import Comment, News
+from .pagination import KeysetPaginator, paginate_by_cursor
+
+
+# Поля новости, доступные в API, в порядке вывода.
+NEWS_FIELDS = ("id", "title", "text", "date", "comment_count")
+# Поля по умолчанию; текст и счётчик комментариев — по запросу.
+DEFAULT_NEWS_FIELDS = ("id", "title", "date")
+
+
+def api_response(data, status=HTTPStatus.OK):
+    return JsonResponse(
+        data,
+        status=status,
+        json_dumps_params={"ensure_ascii": False, "separators": (",", ":")},
+    )
+
+
+class ApiError(Exception):
+    """Ошибка запроса к API, которая превращается в ответ с ``status``."""
+
+    def __init__(self, status, detail, errors=None):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+        self.errors = errors
+
+    def response(self):
+        data = {"detail": self.detail}
+        if self.errors is not None:
+            data["errors"] = self.errors
+        return api_response(data, self.status)
+
+
+class ApiView(generic.View):
+    """Основа представлений API: ошибки и 404 отдаются в JSON."""
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        except Http404 as error:
+            return ApiError(
+                HTTPStatus.NOT_FOUND, str(error) or "Не найдено."
+            ).response()
+        except ApiError as error:
+            return error.response()
+
+    def check_user(self, staff=False):
+        user = self.request.user
+        if not user.is_authenticated:
+            raise ApiError(HTTPStatus.UNAUTHORIZED, "Нужно войти на сайт.")
+        if staff and not user.is_staff:
+            raise ApiError(HTTPStatus.FORBIDDEN, "Доступно только персоналу.")
+
+    def request_data(self):
+        """Данные запроса: тело JSON или обычные поля формы."""
+        if self.request.content_type != "application/json":
+            return self.request.POST
+        try:
+            return json.loads(self.request.body)
+        except ValueError:
+            raise ApiError(HTTPStatus.BAD_REQUEST, "Некорректный JSON.")
+
+    def check_news(self, lock=False):
+        """
+        404, если новости нет; саму новость не загружаем.
+
+        С ``lock`` строка новости блокируется до конца транзакции, чтобы
+        новость не удалили, пока к ней добавляются комментарии.
+        """
+        news = News.objects.filter(pk=self.kwargs["pk"])
+        if lock:
+            news = news.select_for_update()
+        if not news.exists():
+            raise Http404("Новость не найдена.")
+
+    def save_comments(self, save):
+        """
+        Проверяет новость и сохраняет комментарии вызовом ``save``.
+
+        Проверка и запись идут в одной транзакции. Если новость всё же
+        удалили параллельно (SQLite не блокирует строки и проверяет
+        внешние ключи при фиксации), ответ — 404, а не ошибка сервера.
+        """
+        try:
+            with transaction.atomic():
+                self.check_news(lock=True)
+                save()
+        except IntegrityError:
+            raise Http404("Новость не найдена.")
+
+
+def csrf_failure(request, reason=""):
+    """CSRF_FAILURE_VIEW: для API ошибка CSRF отдаётся в JSON."""
+    match = request.resolver_match
+    view_class = getattr(match.func, "view_class", None) if match else None
+    if view_class and issubclass(view_class, ApiView):
+        return ApiError(
+            HTTPStatus.FORBIDDEN,
+            "Нужен CSRF-токен: значение cookie csrftoken в заголовке "
+            "X-CSRFToken.",
+        ).response()
+    return csrf.csrf_failure(request, reason)
+
+
+def comment_payload(comment):
+    return {
+        "id": comment.pk,
+        "author": comment.author.username,
+        "text": comment.text,
+        "created": comment.created.isoformat(),
+    }
+
+
+def validate_comment(data):
+    """
+    Проверяет комментарий формой CommentForm.
+
+    Возвращает несохранённый комментарий или выбрасывает ApiError
+    с ошибками формы. Поля формы в JSON должны быть строками: форма
+    превратила бы в текст и число, и список.
+    """
+    if not isinstance(data, dict):
+        raise ApiError(HTTPStatus.BAD_REQUEST, "Ожидается объект.")
+    errors = {
+        name: [{"message": "Ожидается строка.", "code": "invalid"}]
+        for name in CommentForm.base_fields
+        if name in data and not isinstance(data[name], str)
+    }
+    form = CommentForm(data)
+    if errors or not form.is_valid():
+        raise ApiError(
+            HTTPStatus.BAD_REQUEST,
+            "Комментарий не прошёл проверку.",
+            errors or form.errors.get_json_data(),
+        )
+    return form.save(commit=False)
+
+
+class NewsComments(ApiView):
+    """
+    Комментарии к новости.
+
+    GET — страница комментариев от старых к новым; адрес следующей
+    страницы задаёт курсор из поля ``next``. POST — новый комментарий
+    от имени текущего пользователя.
+    """
+
+    ordering = ("created", "id")
+
+    def get(self, request, *args, **kwargs):
+        page = paginate_by_cursor(
+            KeysetPaginator(
+                self.ordering, settings.COMMENTS_COUNT_ON_DETAIL_PAGE
+            ),
+            Comment.objects.filter(news_id=kwargs["pk"])
+            .select_related("author")
+            .only("id", "text", "created", "author", "author__username"),
+            request.GET.get("cursor"),
+        )
+        # Пустая первая страница — единственный случай, когда нужно
+        # отдельно проверить, есть ли такая новость.
+        if not page.object_list and not request.GET.get("cursor"):
+            self.check_news()
+        return api_response(
+            {
+                "results": [comment_payload(c) for c in page.object_list],
+                "next": page.next_cursor,
+            }
+        )
+
+    def post(self, request, *args, **kwargs):
+        self.check_user()
+        # Ошибки тела имеют смысл, только если новость есть.
+        self.check_news()
+        comment = validate_comment(self.request_data())
+        comment.news_id = kwargs["pk"]
+        comment.author = request.user
+        self.save_comments(comment.save)
+        return api_response(comment_payload(comment), HTTPStatus.CREATED)
+
+
+class NewsCommentsBulk(ApiView):
+    """
+    Массовая загрузка комментариев к новости; доступна только персоналу.
+
+    Тело запроса — {"comments": [{"text": ...}, ...]}. Каждый
+    комментарий проверяется формой CommentForm; если хоть один не прошёл
+    проверку, не сохраняется ни один. Все комментарии записываются от
+    имени текущего пользователя в одной транзакции пакетными INSERT,
+    после чего счётчик комментариев новости пересчитывается один раз.
+    """
+
+    def post(self, request, *args, **kwargs):
+        self.check_user(staff=True)
+        self.check_news()
+        data = self.request_data()
+        items = data.get("comments") if isinstance(data, dict) else None
+        if not isinstance(items, list) or not items:
+            raise ApiError(
+                HTTPStatus.BAD_REQUEST, "Ожидается непустой список comments."
+            )
+        limit = settings.API_BULK_COMMENTS_LIMIT
+        if len(items) > limit:
+            raise ApiError(
+                HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                f"За один запрос можно загрузить не больше {limit} "
+                f"комментариев.",
+            )
+        comments, errors = [], {}
+        for index, item in enumerate(items):
+            try:
+                comments.append(validate_comment(item))
+            except ApiError as error:
+                errors[index] = error.errors or error.detail
+        if errors:
+            raise ApiError(
+                HTTPStatus.BAD_REQUEST,
+                "Комментарии не прошли проверку.",
+                errors,
+            )
+        for comment in comments:
+            comment.news_id = kwargs["pk"]
+            comment.author = request.user
+        self.save_comments(lambda: Comment.objects.bulk_create(comments))
+        return api_response({"created": len(comments)}, HTTPStatus.CREATED)
+
+
+class NewsApiView(ApiView):
+    """
+    Основа API новостей: выбор полей и кэш ответов.
+
+    Параметр ``fields`` перечисляет нужные поля через запятую, ``id``
+    выводится всегда. Из базы загружаются только выбранные поля.
+    """
+
+    def get_fields(self):
+        value = self.request.GET.get("fields", "")
+        names = {name.strip() for name in value.split(",") if name.strip()}
+        if not names:
+            return DEFAULT_NEWS_FIELDS
+        unknown = names.difference(NEWS_FIELDS)
+        if unknown:
+            raise ApiError(
+                HTTPStatus.BAD_REQUEST,
+                f"Неизвестные поля: {', '.join(sorted(unknown))}. "
+                f"Доступны: {', '.join(NEWS_FIELDS)}.",
+            )
+        return tuple(
+            name for name in NEWS_FIELDS if name in names or name == "id"
+        )
+
+    def get_payload(self, fields):
+        raise NotImplementedError
+
+    def get(self, request, *args, **kwargs):
+        """
+        Ответ берётся из кэша по полям и параметрам запроса.
+
+        Ключ содержит поколение кэша ленты, которое сбрасывается при
+        любом изменении новостей и комментариев, поэтому устаревший
+        ответ не отдаётся.
+        """
+        fields = self.get_fields()
+        key = api_cache_key(
+            request.resolver_match.view_name,
+            kwargs.get("pk", ""),
+            ",".join(fields),
+            request.GET.get("cursor", ""),
+        )
+        content = get_api_response(key)
+        if content is None:
+            content = api_response(self.get_payload(fields)).content
+            set_api_response(key, content)
+        return HttpResponse(content, content_type="application/json")
+
+
+def news_payload(news, fields):
+    return {name: getattr(news, name) for name in fields}
+
+
+class NewsListApi(NewsApiView):
+    """Новости от новых к старым, страницами по курсору из ``next``."""
+
+    ordering = ("-date", "-id")
+
+    def get_payload(self, fields):
+        page = paginate_by_cursor(
+            KeysetPaginator(self.ordering, settings.NEWS_COUNT_ON_HOME_PAGE),
+            # Курсор строится по дате, поэтому она загружается всегда.
+            News.objects.only(*fields, "date"),
+            self.request.GET.get("cursor"),
+        )
+        return {
+            "results": [news_payload(news, fields) for news in page],
+            "next": page.next_cursor,
+        }
+
+
+class NewsDetailApi(NewsApiView):
+
+    def get_payload(self, fields):
+        news = News.objects.only(*fields).filter(pk=self.kwargs["pk"]).first()
+        if news is None:
+            raise Http404("Новость не найдена.")
+        return news_payload(news, fields)
@@ -0,0 +1,141 @@
+"""
+Асинхронные варианты ленты и страницы новости для запуска под ASGI.
+
+Синхронное представление под ASGI в Django 3.2 целиком выполняется
+в единственном потоке sync_to_async(thread_sensitive=True), поэтому
+одновременные запросы к нему обрабатываются строго по очереди. Эти
+представления выполняют те же NewsList и NewsDetail, но в ограниченном
+пуле из ASYNC_VIEWS_MAX_WORKERS потоков, не занимая ни цикл событий,
+ни общий поток; страница новости загружает новость и страницу её
+комментариев одновременно, в двух потоках пула. Выигрыш во времени
+ответа зависит от числа ядер и доли ожидания базы; на одном ядре
+с SQLite его нет, поэтому перед включением стоит сравнить варианты
+(см. README, «Нагрузочные тесты»). При ASYNC_VIEWS_MAX_WORKERS = 0
+работа выполняется в общем потоке sync_to_async, как у синхронных
+представлений: так тесты видят данные своей транзакции.
+
+В Django 3.2 асинхронными могут быть только функции-представления.
+"""
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import HttpResponseNotAllowed
+from django.shortcuts import get_object_or_404
+
+from .models import News
+from .views import (
+    NewsComment, NewsDetail, NewsList, add_freshness_headers,
+    comments_page, detail_freshness, not_modified
+)
+
+
+@functools.lru_cache(maxsize=None)
+def get_executor(max_workers):
+    """
+    Пул потоков для синхронной работы представлений.
+
+    У каждого потока пула своё соединение с базой данных, поэтому
+    размер пула ограничивает и число соединений.
+    """
+    return ThreadPoolExecutor(max_workers, thread_name_prefix="news-async")
+
+
+def run_job(func, *args, **kwargs):
+    """
+    Задача пула между проверками соединений с базой.
+
+    Потоки пула не получают сигналов request_started и request_finished,
+    поэтому устаревшие и сломанные соединения закрываются здесь, как
+    Django делает это для каждого запроса.
+    """
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+async def run_sync(func, *args, **kwargs):
+    """Выполняет синхронную функцию вне цикла событий и ждёт её."""
+    max_workers = settings.ASYNC_VIEWS_MAX_WORKERS
+    if not max_workers:
+        return await sync_to_async(func)(*args, **kwargs)
+    # Контекст копируется, чтобы измерения middleware видели запросы
+    # к базе из потоков пула.
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(
+        get_executor(max_workers),
+        functools.partial(context.run, run_job, func, *args, **kwargs),
+    )
+
+
+def render_view(view, request, *args, **kwargs):
+    """Вызывает синхронное представление и сразу отрисовывает ответ."""
+    response = view(request, *args, **kwargs)
+    if callable(getattr(response, "render", None)):
+        response.render()
+    return response
+
+
+class PrefetchedNewsDetail(NewsDetail):
+    """NewsDetail с новостью и страницей комментариев, загруженными заранее."""
+
+    news = None
+    comments = None
+
+    def get_freshness(self):
+        # Свежесть уже проверена в news_detail.
+        return None
+
+    def get_object(self, queryset=None):
+        return self.news
+
+    def get_comments_page(self):
+        return self.comments
+
+
+news_list_view = NewsList.as_view()
+news_comment_view = NewsComment.as_view()
+
+
+async def news_list(request):
+    """Асинхронный вариант NewsList."""
+    if request.method not in ("GET", "HEAD"):
+        return HttpResponseNotAllowed(("GET", "HEAD"))
+    return await run_sync(render_view, news_list_view, request)
+
+
+async def news_detail(request, pk):
+    """
+    Асинхронный вариант NewsDetail.
+
+    Новость и страница комментариев загружаются одновременно, а
+    страница отрисовывается тем же NewsDetail. Комментарий по-прежнему
+    публикует синхронный NewsComment.
+    """
+    if request.method == "POST":
+        return await run_sync(render_view, news_comment_view, request, pk=pk)
+    if request.method not in ("GET", "HEAD"):
+        return HttpResponseNotAllowed(("GET", "HEAD", "POST"))
+    freshness = await run_sync(detail_freshness, request, pk)
+    response = freshness and not_modified(request, freshness)
+    if response is None:
+        news, page = await asyncio.gather(
+            run_sync(get_object_or_404, News, pk=pk),
+            run_sync(
+                comments_page,
+                pk,
+                request.GET.get("cursor"),
+                NewsDetail.comments_ordering,
+            ),
+        )
+        view = PrefetchedNewsDetail.as_view(news=news, comments=page)
+        response = await run_sync(render_view, view, request, pk=pk)
+    if freshness is None:
+        return response
+    return add_freshness_headers(response, freshness)
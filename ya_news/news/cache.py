@@ -0,0 +1,136 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.dispatch import Signal
+
+FEED_VERSION_KEY = "news:feed:version"
+# Фиды RSS и Atom зависят только от новостей, поэтому у их снимков
+# своё поколение, которое не меняется при изменении комментариев.
+SYNDICATION_VERSION_KEY = "news:syndication:version"
+
+# Отправляется при каждом чтении закэшированной ленты: cache — имя
+# кэша, hit — нашлось ли в нём значение.
+cache_lookup = Signal()
+
+
+def get_version(key):
+    """
+    Текущее поколение кэша с ключом поколения ``key``.
+
+    Если ключ поколения вытеснен из кэша, новое поколение начинается
+    с текущего времени и поэтому не совпадает ни с одним из прежних.
+    """
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(key):
+    """Начинает новое поколение кэша с ключом поколения ``key``."""
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=None)
+
+
+def bump_version_on_commit(key):
+    """
+    Начинает новое поколение сейчас и ещё раз после фиксации транзакции.
+
+    Пока транзакция не зафиксирована, параллельный запрос видит старые
+    строки и может сохранить построенную по ним страницу уже под новым
+    поколением. Второе начало поколения после фиксации делает такую
+    страницу недействительной. Первое нужно, чтобы и до фиксации кэш не
+    отдавал страницы, построенные до изменения.
+    """
+    bump_version(key)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: bump_version(key))
+
+
+def get_feed_version():
+    """Текущее поколение кэша ленты."""
+    return get_version(FEED_VERSION_KEY)
+
+
+def invalidate_feed():
+    """Делает недействительными все закэшированные страницы ленты."""
+    bump_version_on_commit(FEED_VERSION_KEY)
+
+
+def invalidate_syndication():
+    """Делает недействительными снимки фидов RSS и Atom."""
+    bump_version_on_commit(SYNDICATION_VERSION_KEY)
+
+
+def feed_cache_key(variant, cursor=None):
+    return f"news:feed:{get_feed_version()}:{variant}:{cursor or ''}"
+
+
+def get_feed(variant, cursor=None):
+    feed = cache.get(feed_cache_key(variant, cursor))
+    cache_lookup.send(sender=get_feed, cache="feed", hit=feed is not None)
+    return feed
+
+
+def set_feed(variant, cursor, feed):
+    cache.set(
+        feed_cache_key(variant, cursor),
+        feed,
+        timeout=settings.NEWS_FEED_CACHE_TIMEOUT,
+    )
+
+
+def api_cache_key(*parts):
+    return f"news:api:{get_feed_version()}:" + ":".join(map(str, parts))
+
+
+def get_api_response(key):
+    content = cache.get(key)
+    cache_lookup.send(
+        sender=get_api_response, cache="api", hit=content is not None
+    )
+    return content
+
+
+def set_api_response(key, content):
+    cache.set(key, content, timeout=settings.NEWS_FEED_CACHE_TIMEOUT)
+
+
+def syndication_cache_key(kind, base_url):
+    version = get_version(SYNDICATION_VERSION_KEY)
+    return f"news:syndication:{version}:{kind}:{base_url}"
+
+
+def get_syndication(kind, base_url):
+    snapshot = cache.get(syndication_cache_key(kind, base_url))
+    cache_lookup.send(
+        sender=get_syndication, cache="syndication", hit=snapshot is not None
+    )
+    return snapshot
+
+
+def syndication_state_key(kind, base_url):
+    return f"news:syndication:state:{kind}:{base_url}"
+
+
+def get_syndication_state(kind, base_url):
+    """Пара (etag, last_modified) последнего снимка фида любого поколения."""
+    return cache.get(syndication_state_key(kind, base_url))
+
+
+def set_syndication(kind, base_url, snapshot):
+    cache.set(
+        syndication_cache_key(kind, base_url),
+        snapshot,
+        timeout=settings.NEWS_FEED_CACHE_TIMEOUT,
+    )
+    cache.set(
+        syndication_state_key(kind, base_url),
+        (snapshot.etag, snapshot.last_modified),
+        timeout=None,
+    )
@@ -0,0 +1,125 @@
+"""
+Массовое создание новостей, комментариев и пользователей.
+
+Строки вставляются пачками общим помощником bulk_insert из модуля
+bulk_factories, первичные ключи назначает база. Тексты и распределение
+комментариев определяются параметром seed, даты задаются явно.
+"""
+import random
+from datetime import timedelta
+
+from bulk_factories import (  # noqa: F401
+    BATCH_SIZE, bulk_insert, create_users, sentences
+)
+from django.db import transaction
+from django.db.models import (
+    DateTimeField, DurationField, ExpressionWrapper, F, Value
+)
+from django.utils import timezone
+
+from .models import Comment, News
+
+WORDS = (
+    "новость город погода выборы спорт матч команда игрок тренер школа "
+    "университет студент экзамен больница врач лечение дорога ремонт "
+    "транспорт метро автобус цена рынок банк курс рубль завод работа "
+    "зарплата налог закон суд решение театр концерт выставка музей кино "
+    "фильм книга автор премия праздник парк река мост дом квартира"
+).split()
+
+
+def create_news(
+    count,
+    seed=0,
+    newest=None,
+    step=timedelta(days=1),
+    texts=None,
+    batch_size=BATCH_SIZE,
+):
+    """
+    Создаёт новости с датами от ``newest`` в прошлое с шагом ``step``.
+
+    ``texts`` — итератор текстов новостей; по умолчанию фразы из WORDS.
+    """
+    rng = random.Random(seed)
+    newest = newest or timezone.now().date()
+    titles = sentences(rng, 2, 5, WORDS)
+    texts = texts or sentences(rng, 20, 60, WORDS)
+    return bulk_insert(
+        News,
+        (
+            News(
+                title=next(titles)[:50],
+                text=next(texts),
+                date=newest - step * i,
+            )
+            for i in range(count)
+        ),
+        batch_size,
+    )
+
+
+def create_comments(
+    count,
+    news_ids,
+    author_ids,
+    seed=0,
+    oldest=None,
+    step=timedelta(minutes=1),
+    texts=None,
+    batch_size=BATCH_SIZE,
+):
+    """
+    Создаёт комментарии к случайным новостям от случайных авторов.
+
+    Время создания идёт от ``oldest`` вперёд с шагом ``step``;
+    ``texts`` — итератор текстов комментариев.
+    """
+    rng = random.Random(seed)
+    news_ids = list(news_ids)
+    author_ids = list(author_ids)
+    oldest = oldest or timezone.now() - step * count
+    texts = texts or sentences(rng, 3, 25, WORDS)
+    with transaction.atomic(savepoint=False):
+        ids = bulk_insert(
+            Comment,
+            (
+                Comment(
+                    news_id=rng.choice(news_ids),
+                    author_id=rng.choice(author_ids),
+                    text=next(texts),
+                )
+                for _ in range(count)
+            ),
+            batch_size,
+        )
+        # auto_now_add перезаписывает время при вставке, поэтому оно
+        # задаётся следующим запросом.
+        set_created(ids, oldest, step, batch_size)
+    return ids
+
+
+def set_created(ids, oldest, step, batch_size):
+    """Задаёт комментариям с ключами ``ids`` время от ``oldest``."""
+    if not isinstance(ids, range):
+        Comment.objects.bulk_update(
+            (
+                Comment(pk=pk, created=oldest + step * i)
+                for i, pk in enumerate(ids)
+            ),
+            ["created"],
+            batch_size,
+        )
+        return
+    # Ключи SQLite идут подряд, поэтому время вычисляется по ключу
+    # одним запросом; длительность в SQLite хранится в микросекундах.
+    Comment.objects.filter(pk__range=(ids.start, ids.stop - 1)).update(
+        created=ExpressionWrapper(
+            Value(oldest, DateTimeField())
+            + ExpressionWrapper(
+                (F("pk") - ids.start) * (step // timedelta(microseconds=1)),
+                output_field=DurationField(),
+            ),
+            output_field=DateTimeField(),
+        )
+    )
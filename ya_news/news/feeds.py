@@ -0,0 +1,127 @@
+"""
+Фиды новостей в форматах RSS и Atom.
+
+XML фида строится один раз и хранится в кэше как готовый снимок: байты
+ответа, ETag и время изменения фида. Снимок устаревает только при
+изменении новостей (поколение SYNDICATION_VERSION_KEY), поэтому
+обычный запрос фида не обращается к базе данных, а запрос с
+If-None-Match или If-Modified-Since получает пустой ответ 304.
+"""
+import hashlib
+from collections import namedtuple
+from datetime import datetime, time
+
+from django.conf import settings
+from django.contrib.syndication.views import Feed
+from django.http import HttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.http import http_date, quote_etag
+from django.views import generic
+
+from .cache import (
+    get_syndication, get_syndication_state, set_syndication
+)
+from .models import News
+
+Snapshot = namedtuple(
+    "Snapshot", ("content", "content_type", "etag", "last_modified")
+)
+
+
+class LatestNewsFeed(Feed):
+    """Последние новости в формате RSS 2.0."""
+
+    title = "YaNews"
+    description = "Последние новости YaNews."
+
+    def link(self):
+        return reverse("news:home")
+
+    def items(self):
+        return News.objects.only("id", "title", "text", "date").order_by(
+            "-date", "-id"
+        )[: settings.SYNDICATION_FEED_ITEMS]
+
+    def item_title(self, item):
+        return item.title
+
+    def item_description(self, item):
+        return item.text
+
+    def item_link(self, item):
+        return reverse("news:detail", args=(item.pk,))
+
+    def item_pubdate(self, item):
+        return timezone.make_aware(datetime.combine(item.date, time.min))
+
+
+class LatestNewsAtomFeed(LatestNewsFeed):
+    """Последние новости в формате Atom 1.0."""
+
+    feed_type = Atom1Feed
+    subtitle = LatestNewsFeed.description
+
+
+def build_snapshot(feed, request, previous=None):
+    """
+    Строит XML фида и всё, что нужно для условного GET.
+
+    Last-Modified — время изменения содержимого фида, а не дата
+    последней новости: в дате нет времени, и правки за тот же день
+    её не меняют. ``previous`` — пара (etag, last_modified) прошлого
+    снимка. Если содержимое не изменилось, время остаётся прежним,
+    иначе оно строго больше прежнего, даже когда оба снимка построены
+    в одну секунду.
+    """
+    generator = feed.get_feed(None, request)
+    content = generator.writeString("utf-8").encode()
+    etag = quote_etag(hashlib.md5(content).hexdigest())
+    last_modified = int(timezone.now().timestamp())
+    if previous is not None:
+        previous_etag, previous_modified = previous
+        if previous_etag == etag:
+            last_modified = previous_modified
+        else:
+            last_modified = max(last_modified, previous_modified + 1)
+    return Snapshot(content, generator.content_type, etag, last_modified)
+
+
+class SyndicationFeed(generic.View):
+    """
+    Отдаёт снимок фида ``feed``, строя его только при устаревании.
+
+    Ссылки в фиде абсолютные, поэтому снимок хранится отдельно для
+    каждого адреса сайта.
+    """
+
+    feed = None
+    kind = None
+
+    def get(self, request, *args, **kwargs):
+        base_url = request.build_absolute_uri("/")
+        snapshot = get_syndication(self.kind, base_url)
+        if snapshot is None:
+            snapshot = build_snapshot(
+                self.feed(),
+                request,
+                get_syndication_state(self.kind, base_url),
+            )
+            set_syndication(self.kind, base_url, snapshot)
+        response = get_conditional_response(
+            request,
+            etag=snapshot.etag,
+            last_modified=snapshot.last_modified,
+        )
+        if response is None:
+            response = HttpResponse(
+                snapshot.content, content_type=snapshot.content_type
+            )
+        response["ETag"] = snapshot.etag
+        response["Last-Modified"] = http_date(snapshot.last_modified)
+        patch_cache_control(
+            response, public=True, max_age=settings.SYNDICATION_FEED_MAX_AGE
+        )
+        return response
@@ -1,18 +1,17 @@
+from django.conf import settings
 from django.forms import ModelForm
 from django.core.exceptions import ValidationError
 
 from .models import Comment
+from .moderation import WordMatcher, load_words
 
-BAD_WORDS = (
-    "редиска",
-    "негодяй",
-    "хуяндекс",
-    "заебал",
-    "сука",
-    # Дополните список на своё усмотрение.
-)
+BAD_WORDS = load_words(settings.BAD_WORDS_FILE)
 WARNING = "Не ругайтесь, вашу мать!"
 
+bad_words_matcher = WordMatcher(
+    BAD_WORDS, whole_words=settings.BAD_WORDS_WHOLE_WORDS
+)
+
 
 class CommentForm(ModelForm):
 
@@ -23,8 +22,6 @@ class CommentForm(ModelForm):
     def clean_text(self):
         """Не позволяем ругаться в комментариях."""
         text = self.cleaned_data["text"]
-        lowered_text = text.lower()
-        for word in BAD_WORDS:
-            if word in lowered_text:
-                raise ValidationError(WARNING)
+        if bad_words_matcher.search(text):
+            raise ValidationError(WARNING)
         return text
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from news.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Перестраивает полнотекстовый индекс новостей и комментариев."
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError(
+                "Полнотекстовый индекс есть только в SQLite; в других СУБД "
+                "поиск обходится без него."
+            )
+        with transaction.atomic():
+            rebuild_index()
+        self.stdout.write(self.style.SUCCESS("Поисковый индекс перестроен."))
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F
+
+from news.models import News
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает денормализованные счётчики комментариев у новостей."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "news_ids",
+            nargs="*",
+            type=int,
+            help="Идентификаторы новостей; по умолчанию — все новости.",
+        )
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Только вывести расхождения, ничего не исправляя.",
+        )
+
+    def handle(self, *args, **options):
+        news = News.objects.all()
+        if options["news_ids"]:
+            news = news.filter(pk__in=options["news_ids"])
+        broken_ids = list(
+            news.annotate(actual=Count("comment"))
+            .exclude(comment_count=F("actual"))
+            .values_list("pk", flat=True)
+        )
+        if options["check"]:
+            for pk in broken_ids:
+                self.stdout.write(f"Новость {pk}: счётчик расходится.")
+            self.stdout.write(f"Расхождений найдено: {len(broken_ids)}")
+            return
+        fixed = News.objects.filter(pk__in=broken_ids).recount_comments()
+        self.stdout.write(
+            self.style.SUCCESS(f"Исправлено счётчиков: {fixed}")
+        )
@@ -0,0 +1,40 @@
+import asyncio
+
+
+class MeasuringMiddleware:
+    """
+    Основа middleware, которая измеряет обработку запроса.
+
+    Работает и в синхронной, и в асинхронной цепочке middleware, чтобы
+    асинхронные представления под ASGI не переводились обратно в поток.
+    Наследник реализует контекстный менеджер measure(request), внутри
+    которого выполняется запрос, и process(request, response, state),
+    где state — значение, отданное measure().
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # По этому признаку Django узнаёт асинхронную middleware.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self):
+            return self.__acall__(request)
+        with self.measure(request) as state:
+            response = self.get_response(request)
+        return self.process(request, response, state)
+
+    async def __acall__(self, request):
+        with self.measure(request) as state:
+            response = await self.get_response(request)
+        return self.process(request, response, state)
+
+    def measure(self, request):
+        raise NotImplementedError
+
+    def process(self, request, response, state):
+        return response
@@ -0,0 +1,40 @@
+# Generated by Django 3.2.15 on 2026-10-18 18:04
+
+import datetime
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def recount_comments(apps, schema_editor):
+    News = apps.get_model("news", "News")
+    Comment = apps.get_model("news", "Comment")
+    comments = (
+        Comment.objects.filter(news=OuterRef("pk"))
+        .order_by()
+        .values("news")
+        .annotate(total=Count("pk"))
+        .values("total")
+    )
+    News.objects.update(comment_count=Coalesce(Subquery(comments), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("news", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="news",
+            name="comment_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name="news",
+            name="date",
+            field=models.DateField(default=datetime.datetime.today),
+        ),
+        migrations.RunPython(recount_comments, migrations.RunPython.noop),
+    ]
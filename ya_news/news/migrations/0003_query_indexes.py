@@ -0,0 +1,32 @@
+# Generated by Django 3.2.15 on 2026-10-18 18:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("news", "0002_news_comment_count"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(
+                fields=["news", "created", "id"],
+                name="comment_news_created_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(
+                fields=["author", "id"], name="comment_author_id_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="news",
+            index=models.Index(
+                fields=["-date", "-id"], name="news_date_id_idx"
+            ),
+        ),
+    ]
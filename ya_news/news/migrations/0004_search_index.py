@@ -0,0 +1,74 @@
+from django.db import migrations
+
+TOKENIZER = "unicode61 remove_diacritics 2"
+
+
+def normalized(column):
+    """Тот же перевод «ё» в «е», что и у поискового запроса."""
+    return f"replace(replace({column}, 'ё', 'е'), 'Ё', 'Е')"
+
+
+def index_statements(table, index, columns):
+    values = ", ".join(normalized(f"{{row}}.{column}") for column in columns)
+    names = ", ".join(columns)
+    insert = (
+        f"INSERT INTO {index}(rowid, {names}) "
+        f"VALUES (new.id, {values.format(row='new')});"
+    )
+    delete = (
+        f"INSERT INTO {index}({index}, rowid, {names}) "
+        f"VALUES ('delete', old.id, {values.format(row='old')});"
+    )
+    return [
+        f"CREATE VIRTUAL TABLE {index} USING fts5({names}, "
+        f"content='{table}', content_rowid='id', "
+        f"tokenize='{TOKENIZER}', prefix='2 3 4');",
+        f"CREATE TRIGGER {index}_ai AFTER INSERT ON {table} "
+        f"BEGIN {insert} END;",
+        f"CREATE TRIGGER {index}_ad AFTER DELETE ON {table} "
+        f"BEGIN {delete} END;",
+        f"CREATE TRIGGER {index}_au AFTER UPDATE OF {names} ON {table} "
+        f"BEGIN {delete} {insert} END;",
+        f"INSERT INTO {index}(rowid, {names}) "
+        f"SELECT id, {values.format(row=table)} FROM {table};",
+    ]
+
+
+def drop_statements(index):
+    return [
+        f"DROP TRIGGER IF EXISTS {index}_{suffix};"
+        for suffix in ("ai", "ad", "au")
+    ] + [f"DROP TABLE IF EXISTS {index};"]
+
+
+INDEXES = (
+    ("news_news", "news_news_fts", ("title", "text")),
+    ("news_comment", "news_comment_fts", ("text",)),
+)
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for table, index, columns in INDEXES:
+        for statement in index_statements(table, index, columns):
+            schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for _, index, _ in INDEXES:
+        for statement in drop_statements(index):
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("news", "0003_query_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
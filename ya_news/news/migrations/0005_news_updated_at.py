@@ -0,0 +1,40 @@
+from importlib import import_module
+
+from django.db import migrations, models
+
+# SQLite пересоздаёт таблицу при добавлении поля и теряет триггеры
+# поискового индекса, поэтому индекс новостей строится заново.
+search_index = import_module("news.migrations.0004_search_index")
+NEWS_INDEX = search_index.INDEXES[0]
+
+
+def drop_news_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    _, index, _ = NEWS_INDEX
+    for statement in search_index.drop_statements(index):
+        schema_editor.execute(statement)
+
+
+def create_news_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for statement in search_index.index_statements(*NEWS_INDEX):
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("news", "0004_search_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_news_index, create_news_index),
+        migrations.AddField(
+            model_name="news",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(create_news_index, drop_news_index),
+    ]
@@ -1,16 +1,103 @@
 from datetime import datetime
 
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .cache import invalidate_feed, invalidate_syndication
+
+
+class FeedQuerySet(models.QuerySet):
+    """
+    Сбрасывает кэш ленты при массовых изменениях.
+
+    Одиночные save() и delete() обрабатываются сигналами, а bulk-операции
+    и update() сигналов не отправляют.
+    """
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        self.invalidate_caches()
+        return objs
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        updated = super().bulk_update(objs, fields, *args, **kwargs)
+        self.invalidate_caches(fields)
+        return updated
+
+    def update(self, **kwargs):
+        updated = super().update(**kwargs)
+        self.invalidate_caches(kwargs)
+        return updated
+
+    def invalidate_caches(self, fields=None):
+        """Сбрасывает кэши, зависящие от полей ``fields`` (None — всех)."""
+        invalidate_feed()
+
+
+# Поля новости, которых нет в фидах RSS и Atom.
+NOT_SYNDICATED_FIELDS = {"comment_count", "updated_at"}
+
+
+class NewsQuerySet(FeedQuerySet):
+    """
+    Любое изменение новостей через QuerySet обновляет их updated_at.
+
+    По updated_at проверяется свежесть страницы новости, поэтому его
+    обновляют и изменения комментариев (см. signals и CommentQuerySet).
+    """
+
+    def update(self, **kwargs):
+        kwargs.setdefault("updated_at", timezone.now())
+        return super().update(**kwargs)
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        now = timezone.now()
+        for obj in objs:
+            obj.updated_at = now
+        if "updated_at" not in fields:
+            fields = [*fields, "updated_at"]
+        return super().bulk_update(objs, fields, *args, **kwargs)
+
+    def touch(self):
+        """Отмечает, что выбранные новости или их комментарии изменились."""
+        return self.update()
+
+    def invalidate_caches(self, fields=None):
+        """Фиды RSS и Atom не показывают счётчик комментариев."""
+        super().invalidate_caches(fields)
+        if fields is None or set(fields) - NOT_SYNDICATED_FIELDS:
+            invalidate_syndication()
+
+    def recount_comments(self):
+        """Пересчитывает счётчик комментариев у выбранных новостей."""
+        comments = (
+            Comment.objects.filter(news=OuterRef("pk"))
+            .order_by()
+            .values("news")
+            .annotate(total=Count("pk"))
+            .values("total")
+        )
+        return self.update(comment_count=Coalesce(Subquery(comments), 0))
 
 
 class News(models.Model):
     title = models.CharField(max_length=50)
     text = models.TextField()
     date = models.DateField(default=datetime.today)
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+    # Время последнего изменения новости или её комментариев.
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = NewsQuerySet.as_manager()
 
     class Meta:
         ordering = ("-date",)
+        indexes = (
+            models.Index(fields=("-date", "-id"), name="news_date_id_idx"),
+        )
         verbose_name_plural = "Новости"
         verbose_name = "Новость"
 
@@ -18,6 +105,70 @@ class News(models.Model):
         return self.title
 
 
+class CommentQuerySet(FeedQuerySet):
+
+    def update(self, **kwargs):
+        """
+        Массовая правка комментариев обновляет и их новости.
+
+        Если комментарии переносятся в другую новость, счётчики
+        комментариев прежних новостей и новой пересчитываются в той же
+        транзакции.
+        """
+        target = kwargs.get("news_id", kwargs.get("news"))
+        moved = "news" in kwargs or "news_id" in kwargs
+        with transaction.atomic(using=self.db, savepoint=False):
+            news_ids = set(self.values_list("news_id", flat=True))
+            updated = super().update(**kwargs)
+            if not news_ids:
+                return updated
+            if moved:
+                news_ids.add(getattr(target, "pk", target))
+                News.objects.filter(pk__in=news_ids).recount_comments()
+            else:
+                News.objects.filter(pk__in=news_ids).touch()
+        return updated
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        updated = super().bulk_update(objs, fields, *args, **kwargs)
+        News.objects.filter(pk__in={obj.news_id for obj in objs}).touch()
+        return updated
+
+    def bulk_create(self, objs, *args, **kwargs):
+        """
+        Массовое создание комментариев.
+
+        Сигналы при bulk_create не отправляются, поэтому счётчики
+        комментариев у затронутых новостей пересчитываются одним запросом.
+        """
+        objs = super().bulk_create(objs, *args, **kwargs)
+        news_ids = {obj.news_id for obj in objs}
+        if news_ids:
+            News.objects.filter(pk__in=news_ids).recount_comments()
+        return objs
+
+    def delete_by_author(self, pk, author_id):
+        """
+        Удаляет комментарий, если его автор — ``author_id``.
+
+        Проверка владельца входит в условие выборки, поэтому
+        комментарий загружается одним запросом и только с ключами.
+        Удаляется он обычным delete(): сигналы post_delete обновляют
+        счётчик комментариев и кэши. Возвращает удалённый комментарий
+        или None, если такого комментария у автора нет.
+        """
+        with transaction.atomic(using=self.db, savepoint=False):
+            comment = (
+                self.select_for_update()
+                .filter(pk=pk, author_id=author_id)
+                .only("id", "news_id", "author_id")
+                .first()
+            )
+            if comment is not None:
+                comment.delete()
+        return comment
+
+
 class Comment(models.Model):
     news = models.ForeignKey(News, on_delete=models.CASCADE)
     author = models.ForeignKey(
@@ -27,8 +178,19 @@ class Comment(models.Model):
     text = models.TextField()
     created = models.DateTimeField(auto_now_add=True)
 
+    objects = CommentQuerySet.as_manager()
+
     class Meta:
         ordering = ("created",)
+        indexes = (
+            models.Index(
+                fields=("news", "created", "id"),
+                name="comment_news_created_idx",
+            ),
+            models.Index(
+                fields=("author", "id"), name="comment_author_id_idx"
+            ),
+        )
 
     def __str__(self):
         return self.text[:50]
@@ -0,0 +1,87 @@
+import unicodedata
+from collections import deque
+
+
+def normalize(text):
+    """Приводит текст к виду для сравнения: NFKC, регистр, «ё» → «е»."""
+    return unicodedata.normalize("NFKC", text).casefold().replace("ё", "е")
+
+
+def load_words(path):
+    """Читает список слов из файла: по слову в строке, «#» — комментарий."""
+    with open(path, encoding="utf-8") as file:
+        words = (line.split("#", 1)[0].strip() for line in file)
+        return tuple(word for word in words if word)
+
+
+class WordMatcher:
+    """
+    Поиск любого слова из списка за один проход по тексту.
+
+    Автомат Ахо — Корасик строится один раз, после чего проверка текста
+    занимает время, пропорциональное длине текста, и не зависит от
+    количества слов в списке. Слова и текст нормализуются функцией
+    normalize(). При ``whole_words=True`` совпадение засчитывается, только
+    если слово не является частью более длинного слова.
+    """
+
+    def __init__(self, words, whole_words=False):
+        self.whole_words = whole_words
+        self._goto = [{}]
+        self._fail = [0]
+        self._lengths = [()]
+        for word in words:
+            self._add(normalize(word))
+        self._link()
+
+    def _add(self, word):
+        if not word:
+            return
+        state = 0
+        for char in word:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._lengths.append(())
+            state = next_state
+        self._lengths[state] += (len(word),)
+
+    def _link(self):
+        """Проставляет ссылки неудач обходом бора в ширину."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                self._lengths[next_state] += (
+                    self._lengths[self._fail[next_state]]
+                )
+
+    def search(self, text):
+        """Первое найденное слово из списка (в нормализованном виде)."""
+        text = normalize(text)
+        goto, fail, lengths = self._goto, self._fail, self._lengths
+        state = 0
+        for end, char in enumerate(text, 1):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for length in lengths[state]:
+                if not self.whole_words or self._is_whole_word(
+                    text, end - length, end
+                ):
+                    return text[end - length:end]
+        return None
+
+    @staticmethod
+    def _is_whole_word(text, start, end):
+        return (start == 0 or not text[start - 1].isalnum()) and (
+            end == len(text) or not text[end].isalnum()
+        )
@@ -0,0 +1,142 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.http import Http404
+
+
+class InvalidCursor(ValueError):
+    """Курсор не удалось разобрать."""
+
+
+class KeysetPage:
+    """Страница, полученная поиском по ключу сортировки."""
+
+    def __init__(self, object_list, next_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+class KeysetPaginator:
+    """
+    Пагинация по ключу (keyset/seek pagination).
+
+    Вместо OFFSET следующая страница выбирается условием «строго после
+    последней записи текущей страницы» по полям ``ordering``, поэтому
+    глубокие страницы стоят столько же, сколько первая. Последнее поле
+    сортировки должно быть уникальным (обычно ``id``).
+    """
+
+    def __init__(self, ordering, per_page):
+        self.ordering = tuple(ordering)
+        self.per_page = per_page
+
+    def get_queryset(self, queryset, cursor=None):
+        """Запрос строк страницы; одна лишняя строка — признак продолжения."""
+        queryset = queryset.order_by(*self.ordering)
+        if cursor:
+            values = self.decode_cursor(cursor, queryset.model)
+            queryset = queryset.filter(self._seek_filter(values))
+        return queryset[: self.per_page + 1]
+
+    def get_page(self, queryset, cursor=None):
+        try:
+            rows = list(self.get_queryset(queryset, cursor))
+        except OverflowError:
+            # Число из курсора не помещается в целое базы данных.
+            raise InvalidCursor(cursor)
+        next_cursor = None
+        if len(rows) > self.per_page:
+            rows = rows[: self.per_page]
+            next_cursor = self.encode_cursor(rows[-1])
+        return KeysetPage(rows, next_cursor)
+
+    def encode_cursor(self, obj):
+        values = [
+            getattr(obj, self._attname(obj, name)) for name in self.ordering
+        ]
+        payload = json.dumps(values, default=str).encode()
+        return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+    def decode_cursor(self, cursor, model):
+        try:
+            payload = base64.urlsafe_b64decode(
+                cursor + "=" * (-len(cursor) % 4)
+            )
+            values = json.loads(payload)
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise InvalidCursor(cursor)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise InvalidCursor(cursor)
+        try:
+            values = [
+                self._field(model, name).to_python(value)
+                for name, value in zip(self.ordering, values)
+            ]
+        except (TypeError, ValidationError, OverflowError):
+            raise InvalidCursor(cursor)
+        # С null и вложенными списками или объектами сравнивать нельзя.
+        if any(
+            value is None or isinstance(value, (list, dict))
+            for value in values
+        ):
+            raise InvalidCursor(cursor)
+        return values
+
+    def _seek_filter(self, values):
+        """
+        (a, b) после (x, y): a > x ИЛИ (a = x И b > y).
+
+        Для полей с убывающей сортировкой сравнение меняется на «<».
+        """
+        condition = Q()
+        for position, name in enumerate(self.ordering):
+            lookup = "lt" if name.startswith("-") else "gt"
+            step = Q(**{f"{name.lstrip('-')}__{lookup}": values[position]})
+            for previous, value in zip(self.ordering[:position], values):
+                step &= Q(**{previous.lstrip("-"): value})
+            condition |= step
+        return condition
+
+    @staticmethod
+    def _field(model, name):
+        name = name.lstrip("-")
+        if name == "pk":
+            return model._meta.pk
+        return model._meta.get_field(name)
+
+    def _attname(self, obj, name):
+        return self._field(type(obj), name).attname
+
+
+class KeysetPaginationMixin:
+    """Подменяет постраничный вывод ListView пагинацией по ключу."""
+
+    cursor_kwarg = "cursor"
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = KeysetPaginator(self.get_ordering(), page_size)
+        page = paginate_by_cursor(
+            paginator, queryset, self.request.GET.get(self.cursor_kwarg)
+        )
+        return paginator, page, page.object_list, page.has_next
+
+
+def paginate_by_cursor(paginator, queryset, cursor):
+    """Возвращает страницу или 404, если курсор некорректен."""
+    try:
+        return paginator.get_page(queryset, cursor)
+    except InvalidCursor:
+        raise Http404("Некорректный курсор.")
@@ -0,0 +1,253 @@
+"""
+Профилирование запросов.
+
+ProfilingMiddleware включается настройкой REQUEST_PROFILING. Для каждого
+запроса она измеряет общее время, число и время SQL-запросов, время
+отрисовки шаблонов и пик выделенной Python памяти, отдаёт измерения
+в заголовке Server-Timing и накапливает сводку по именам маршрутов.
+Выключенная middleware исключается из цепочки при запуске сервера
+и ничего не стоит.
+
+tracemalloc следит за всем процессом, поэтому пик памяти измеряется
+только у одного запроса за раз и точен, лишь когда сервер обрабатывает
+запросы по одному (runserver --nothreading, воркеры в один поток).
+"""
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.template.base import Template
+
+from .middleware import MeasuringMiddleware
+from .query_wrappers import wrap_queries
+
+# Измерения запроса, который обрабатывается в текущем контексте.
+current_profile = ContextVar("current_profile", default=None)
+
+
+def profiled_render(self, context):
+    """
+    Template.render, засекающий время отрисовки для текущего запроса.
+
+    Вложенные шаблоны ({% include %}) учитываются в общем времени
+    внешнего шаблона, а не ещё раз отдельно.
+    """
+    render = template_timer.render
+    profile = current_profile.get()
+    if profile is None:
+        return render(self, context)
+    profile.template_depth += 1
+    started = time.perf_counter()
+    try:
+        return render(self, context)
+    finally:
+        profile.template_depth -= 1
+        if not profile.template_depth:
+            profile.template_time += time.perf_counter() - started
+
+
+class RequestProfile:
+    """Измерения одного запроса; заодно обёртка SQL-запросов."""
+
+    def __init__(self):
+        self.wall_time = 0.0
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+        self.memory_peak = None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_count += 1
+            self.sql_time += time.perf_counter() - started
+
+    def server_timing(self):
+        metrics = [
+            f"total;dur={self.wall_time * 1e3:.1f}",
+            f'sql;dur={self.sql_time * 1e3:.1f};desc="{self.sql_count} '
+            f'queries"',
+            f"template;dur={self.template_time * 1e3:.1f}",
+        ]
+        if self.memory_peak is not None:
+            metrics.append(f'memory;desc="peak {self.memory_peak} B"')
+        return ", ".join(metrics)
+
+
+class TemplateTimer:
+    """
+    Подменяет Template.render на profiled_render, пока идут измерения.
+
+    Как только не остаётся запросов в работе, исходный метод
+    возвращается на место.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = 0
+        self.render = Template.render
+
+    def start(self):
+        with self.lock:
+            if not self.active and Template.render is not profiled_render:
+                self.render = Template.render
+                Template.render = profiled_render
+            self.active += 1
+
+    def stop(self):
+        with self.lock:
+            self.active -= 1
+            if not self.active:
+                Template.render = self.render
+
+
+class MemoryTracer:
+    """
+    Включает tracemalloc только на время измерения одного запроса.
+
+    Трассировка замедляет каждое выделение памяти, а пик общий для
+    процесса, поэтому одновременно измеряется только один запрос:
+    остальные обходятся без измерения памяти.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.owner = False
+
+    def start(self):
+        """
+        Начинает измерение и возвращает текущий объём памяти.
+
+        None, если уже измеряется другой запрос.
+        """
+        if not self.lock.acquire(blocking=False):
+            return None
+        self.owner = not tracemalloc.is_tracing()
+        if self.owner:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        return tracemalloc.get_traced_memory()[0]
+
+    def stop(self, baseline):
+        """Заканчивает измерение и возвращает пик сверх ``baseline``."""
+        peak = tracemalloc.get_traced_memory()[1] - baseline
+        if self.owner:
+            tracemalloc.stop()
+            self.owner = False
+        self.lock.release()
+        return max(peak, 0)
+
+
+class ProfilingReport:
+    """Сводка измерений по именам маршрутов, накопленная процессом."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.routes = {}
+
+    def add(self, route, profile):
+        with self.lock:
+            totals = self.routes.setdefault(
+                route,
+                {
+                    "requests": 0,
+                    "wall_time": 0.0,
+                    "max_wall_time": 0.0,
+                    "sql_count": 0,
+                    "sql_time": 0.0,
+                    "template_time": 0.0,
+                    "memory_peak": None,
+                },
+            )
+            totals["requests"] += 1
+            totals["wall_time"] += profile.wall_time
+            totals["max_wall_time"] = max(
+                totals["max_wall_time"], profile.wall_time
+            )
+            totals["sql_count"] += profile.sql_count
+            totals["sql_time"] += profile.sql_time
+            totals["template_time"] += profile.template_time
+            if profile.memory_peak is not None:
+                totals["memory_peak"] = max(
+                    totals["memory_peak"] or 0, profile.memory_peak
+                )
+
+    def summary(self):
+        """Средние значения на запрос по каждому маршруту, время в мс."""
+        with self.lock:
+            routes = {
+                route: dict(totals) for route, totals in self.routes.items()
+            }
+        return {
+            route: {
+                "requests": totals["requests"],
+                "wall_ms": round(
+                    totals["wall_time"] / totals["requests"] * 1e3, 3
+                ),
+                "max_wall_ms": round(totals["max_wall_time"] * 1e3, 3),
+                "sql_count": round(
+                    totals["sql_count"] / totals["requests"], 2
+                ),
+                "sql_ms": round(
+                    totals["sql_time"] / totals["requests"] * 1e3, 3
+                ),
+                "template_ms": round(
+                    totals["template_time"] / totals["requests"] * 1e3, 3
+                ),
+                "max_memory_peak": totals["memory_peak"],
+            }
+            for route, totals in sorted(routes.items())
+        }
+
+    def clear(self):
+        with self.lock:
+            self.routes.clear()
+
+
+report = ProfilingReport()
+template_timer = TemplateTimer()
+memory_tracer = MemoryTracer()
+
+
+class ProfilingMiddleware(MeasuringMiddleware):
+    """
+    Измеряет каждый запрос и добавляет к ответу заголовок Server-Timing.
+
+    Время потоковых ответов считается до начала отдачи их тела.
+    """
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_PROFILING:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+        self.trace_memory = settings.REQUEST_PROFILING_MEMORY
+
+    @contextmanager
+    def measure(self, request):
+        profile = RequestProfile()
+        token = current_profile.set(profile)
+        template_timer.start()
+        baseline = memory_tracer.start() if self.trace_memory else None
+        started = time.perf_counter()
+        try:
+            with wrap_queries(profile):
+                yield profile
+        finally:
+            profile.wall_time = time.perf_counter() - started
+            if baseline is not None:
+                profile.memory_peak = memory_tracer.stop(baseline)
+            template_timer.stop()
+            current_profile.reset(token)
+
+    def process(self, request, response, profile):
+        match = request.resolver_match
+        report.add(match.view_name if match else "-", profile)
+        response["Server-Timing"] = profile.server_timing()
+        return response
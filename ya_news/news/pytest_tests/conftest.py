@@ -1,35 +1,106 @@
 import pytest
 from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import Client
 from django.urls import reverse
-from datetime import timedelta
-from django.utils import timezone
 
+from news.factories import create_comments, create_news, create_users
+from news.metrics import registry
 from news.models import Comment, News
+from news.profiling import report
+from .query_budget import QueryBudget
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Кэш не переживает тест: данные в БД откатываются после каждого."""
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def session_cookies(django_db_setup, django_db_blocker):
+    """
+    Автор и администратор, созданные один раз на всю сессию тестов.
+
+    Пользователи сохраняются в тестовой базе до начала транзакций
+    отдельных тестов, поэтому откат после теста их не удаляет. Для
+    каждого сразу выполняется вход, и фикстура возвращает значения
+    cookie сессии по именам пользователей.
+
+    Фикстура подключена ко всем тестам: запрошенная впервые через
+    getfixturevalue, она создала бы пользователей внутри транзакции
+    теста, и они исчезли бы после его отката.
+    """
+    cookies = {}
+    with django_db_blocker.unblock():
+        users = get_user_model().objects.filter(
+            pk__in=create_users(("Автор", "Администратор"))
+        )
+        for user in users:
+            client = Client()
+            client.force_login(user)
+            cookies[user.username] = (
+                client.cookies[settings.SESSION_COOKIE_NAME].value
+            )
+    return cookies
+
+
+def logged_in_client(session_cookies, user):
+    """Новый клиент с уже готовой cookie сессии пользователя."""
+    client = Client()
+    client.cookies[settings.SESSION_COOKIE_NAME] = (
+        session_cookies[user.username]
+    )
+    return client
 
 
 @pytest.fixture
-def author(django_user_model):
-    return django_user_model.objects.create(username="Автор")
+def author(db, session_cookies, django_user_model):
+    return django_user_model.objects.get(username="Автор")
 
 
 @pytest.fixture
-def author_client(author):
-    client = Client()
-    client.force_login(author)
-    return client
+def author_client(session_cookies, author):
+    return logged_in_client(session_cookies, author)
 
 
 @pytest.fixture
-def admin(django_user_model):
-    return django_user_model.objects.create(username="Администратор")
+def admin(db, session_cookies, django_user_model):
+    return django_user_model.objects.get(username="Администратор")
 
 
 @pytest.fixture
-def admin_client(admin):
-    client = Client()
-    client.force_login(admin)
-    return client
+def admin_client(session_cookies, admin):
+    return logged_in_client(session_cookies, admin)
+
+
+@pytest.fixture
+def staff_client(admin, admin_client):
+    """Клиент администратора с правами персонала."""
+    admin.is_staff = True
+    admin.save(update_fields=["is_staff"])
+    return admin_client
+
+
+@pytest.fixture
+def profiling(settings):
+    """Включённое профилирование запросов с пустой сводкой."""
+    settings.REQUEST_PROFILING = True
+    settings.REQUEST_PROFILING_MEMORY = True
+    report.clear()
+    yield report
+    report.clear()
+
+
+@pytest.fixture
+def metrics():
+    """Реестр метрик без значений, накопленных другими тестами."""
+    registry.clear()
+    yield registry
+    registry.clear()
 
 
 @pytest.fixture
@@ -42,18 +113,9 @@ def news():
 
 @pytest.fixture
 def news_batch():
-    """Создает batch новостей для тестов с заданной датой создания"""
-    current_time = timezone.now()
-
-    return News.objects.bulk_create(
-        [
-            News(
-                title=f"Заголовок {i}",
-                text=f"Текст {i}",
-                date=current_time - timedelta(days=i)
-            )
-            for i in range(settings.NEWS_COUNT_ON_HOME_PAGE + 1)
-        ]
+    """Новости на страницу с лишним, по одной на каждый день."""
+    return News.objects.filter(
+        pk__in=create_news(settings.NEWS_COUNT_ON_HOME_PAGE + 1)
     )
 
 
@@ -64,15 +126,23 @@ def comment(author, news):
 
 @pytest.fixture
 def comment_batch(news, author):
-    """Создает комментарии с уникальными датами создания"""
-    for i in range(2):
-        comment = Comment.objects.create(
-            news=news,
-            text=f"Комментарий {i}",
-            author=author,
-        )
-        comment.created = timezone.now() - timezone.timedelta(minutes=i)
-        comment.save()
+    """Комментарии к новости с разным временем создания."""
+    return Comment.objects.filter(
+        pk__in=create_comments(2, [news.pk], [author.pk])
+    )
+
+
+@pytest.fixture
+def realistic_data(news, news_batch):
+    """Объём данных, при котором заметны запросы в цикле (N+1)."""
+    readers = create_users(f"Читатель {i}" for i in range(5))
+    create_comments(30, [news.pk], readers)
+
+
+@pytest.fixture
+def query_budget():
+    """Проверка бюджета SQL-запросов страницы по имени её маршрута."""
+    return QueryBudget
 
 
 @pytest.fixture
@@ -80,11 +150,56 @@ def home_url():
     return reverse('news:home')
 
 
+@pytest.fixture
+def search_url():
+    return reverse('news:search') + '?q=текст'
+
+
 @pytest.fixture
 def detail_url(news):
     return reverse('news:detail', args=(news.id,))
 
 
+@pytest.fixture
+def async_home_url():
+    return reverse('news:async_home')
+
+
+@pytest.fixture
+def async_detail_url(news):
+    return reverse('news:async_detail', args=(news.id,))
+
+
+@pytest.fixture
+def api_news_url():
+    return reverse('news:api_news')
+
+
+@pytest.fixture
+def api_news_detail_url(news):
+    return reverse('news:api_news_detail', args=(news.id,))
+
+
+@pytest.fixture
+def api_comments_url(news):
+    return reverse('news:api_comments', args=(news.id,))
+
+
+@pytest.fixture
+def api_comments_bulk_url(news):
+    return reverse('news:api_comments_bulk', args=(news.id,))
+
+
+@pytest.fixture
+def rss_url():
+    return reverse('news:rss')
+
+
+@pytest.fixture
+def atom_url():
+    return reverse('news:atom')
+
+
 @pytest.fixture
 def edit_url(comment):
     return reverse('news:edit', args=(comment.id,))
@@ -95,6 +210,16 @@ def delete_url(comment):
     return reverse('news:delete', args=(comment.id,))
 
 
+@pytest.fixture
+def metrics_url():
+    return reverse('news:metrics')
+
+
+@pytest.fixture
+def profiling_url():
+    return reverse('news:profiling')
+
+
 @pytest.fixture
 def login_url():
     return reverse('users:login')
@@ -1,7 +1,20 @@
+import base64
+import json
+from http import HTTPStatus
+
 import pytest
+from asgiref.sync import async_to_sync
 from django.conf import settings
+from django.db import connection, transaction
+from django.template.base import Template
+from django.test import AsyncClient, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 
+from news.cache import get_feed, set_feed
 from news.forms import CommentForm
+from news.models import Comment, News
+from news.profiling import memory_tracer
 
 pytestmark = pytest.mark.django_db
 
@@ -9,7 +22,7 @@ pytestmark = pytest.mark.django_db
 def test_news_count(client, home_url, news_batch):
     """Количество новостей на главной странице."""
     response = client.get(home_url)
-    news_count_on_page = response.context["object_list"].count()
+    news_count_on_page = len(response.context["object_list"])
     assert news_count_on_page == settings.NEWS_COUNT_ON_HOME_PAGE
 
 
@@ -21,6 +34,135 @@ def test_news_order(client, home_url, news_batch):
     assert all_dates == sorted(all_dates, reverse=True)
 
 
+def test_news_next_page(client, home_url, news_batch):
+    """По курсору следующей страницы выводятся более старые новости."""
+    first_page = client.get(home_url).context["page_obj"]
+    assert first_page.has_next
+    response = client.get(home_url, {"cursor": first_page.next_cursor})
+    news_list = response.context["object_list"]
+    assert len(news_list) == 1
+    assert news_list[0].date < first_page.object_list[-1].date
+    assert not response.context["page_obj"].has_next
+
+
+def encoded_cursor(values):
+    payload = json.dumps(values).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    (
+        "не-курсор",
+        encoded_cursor([None, 1]),
+        encoded_cursor(["2020-01-01", 10 ** 30]),
+        encoded_cursor(["2020-01-01", [1]]),
+    ),
+    ids=("garbage", "null", "overflow", "nested"),
+)
+@pytest.mark.parametrize("url_fixture", ("home_url", "api_news_url"))
+def test_invalid_cursor(request, client, news, url_fixture, cursor):
+    """Некорректный курсор приводит к 404."""
+    url = request.getfixturevalue(url_fixture)
+    response = client.get(url, {"cursor": cursor})
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_comments_pagination(client, settings, detail_url, comment_batch):
+    """Комментарии выводятся страницами в хронологическом порядке."""
+    settings.COMMENTS_COUNT_ON_DETAIL_PAGE = 1
+    first_page = client.get(detail_url).context["comments_page"]
+    response = client.get(detail_url, {"cursor": first_page.next_cursor})
+    second_page = response.context["comments_page"]
+    assert len(first_page) == len(second_page) == 1
+    assert first_page.object_list[0].created < (
+        second_page.object_list[0].created
+    )
+    assert not second_page.has_next
+
+
+def test_home_page_uses_comment_counter(
+    client, home_url, comment_batch, django_assert_num_queries
+):
+    """Главная страница не подгружает комментарии к новостям."""
+    with django_assert_num_queries(1):
+        response = client.get(home_url)
+    assert "Комментариев: 2" in response.content.decode()
+
+
+def test_home_page_is_cached(
+    client, home_url, news, django_assert_num_queries
+):
+    """Повторный запрос главной страницы не обращается к базе данных."""
+    client.get(home_url)
+    with django_assert_num_queries(0):
+        response = client.get(home_url)
+    assert news.title in response.content.decode()
+
+
+@pytest.mark.parametrize(
+    "backend",
+    (
+        "django.core.cache.backends.locmem.LocMemCache",
+        "django.core.cache.backends.filebased.FileBasedCache",
+    )
+)
+def test_home_page_cache_invalidation(
+    client, settings, tmp_path, backend, author, news, home_url
+):
+    """Изменение новости или комментария сбрасывает кэш главной."""
+    settings.CACHES = {
+        "default": {"BACKEND": backend, "LOCATION": str(tmp_path)}
+    }
+    client.get(home_url)
+    news.title = "Исправленный заголовок"
+    news.save()
+    assert news.title in client.get(home_url).content.decode()
+    Comment.objects.create(news=news, author=author, text="Комментарий")
+    assert "Комментариев: 1" in client.get(home_url).content.decode()
+    Comment.objects.filter(news=news).delete()
+    assert "Комментариев" not in client.get(home_url).content.decode()
+
+
+def test_feed_cache_invalidated_on_commit(
+    news, django_capture_on_commit_callbacks
+):
+    """Лента, закэшированная до фиксации изменения, сбрасывается после."""
+    with django_capture_on_commit_callbacks(execute=True):
+        with transaction.atomic():
+            news.title = "Исправленный заголовок"
+            news.save()
+            # Параллельный запрос успел закэшировать ленту по старым
+            # строкам уже под новым поколением.
+            set_feed("anonymous", None, "Устаревшая лента")
+        assert get_feed("anonymous") == "Устаревшая лента"
+    assert get_feed("anonymous") is None
+
+
+def test_admin_edit_invalidates_home_page(
+    client, django_user_model, news, home_url
+):
+    """Правка новости в админке сбрасывает кэш главной страницы."""
+    superuser = django_user_model.objects.create_superuser(
+        "root", "root@example.com", "password"
+    )
+    admin_site_client = Client()
+    admin_site_client.force_login(superuser)
+    client.get(home_url)
+    response = admin_site_client.post(
+        reverse("admin:news_news_change", args=(news.pk,)),
+        {
+            "title": "Заголовок из админки",
+            "text": news.text,
+            "date": news.date.strftime("%d.%m.%Y"),
+            "comment_set-TOTAL_FORMS": 0,
+            "comment_set-INITIAL_FORMS": 0,
+        },
+    )
+    assert response.status_code == HTTPStatus.FOUND
+    assert "Заголовок из админки" in client.get(home_url).content.decode()
+
+
 def test_comments_order(author_client, detail_url, comment_batch):
     """Сортировка комментариев в хронологическом порядке."""
     response = author_client.get(detail_url)
@@ -45,3 +187,352 @@ def test_authorized_client_has_form(author_client, detail_url):
     response = author_client.get(detail_url)
     assert "form" in response.context
     assert isinstance(response.context["form"], CommentForm)
+
+
+@pytest.mark.parametrize(
+    "sync_url_name, async_url_name",
+    (("news:home", "news:async_home"), ("news:detail", "news:async_detail")),
+)
+def test_async_views_render_same_page(
+    client, comment_batch, news, sync_url_name, async_url_name
+):
+    """Асинхронные ленты и страницы новостей совпадают с синхронными."""
+    args = () if sync_url_name == "news:home" else (news.pk,)
+    sync_response = client.get(reverse(sync_url_name, args=args))
+    async_response = client.get(reverse(async_url_name, args=args))
+    assert async_response.status_code == HTTPStatus.OK
+    assert async_response.content == sync_response.content
+
+
+def test_async_detail_has_form(author_client, async_detail_url):
+    """Асинхронная страница новости показывает форму комментария."""
+    response = author_client.get(async_detail_url)
+    assert isinstance(response.context["form"], CommentForm)
+
+
+def test_async_views_under_asgi(metrics, news, async_detail_url):
+    """Под ASGI асинхронная страница проходит асинхронные middleware."""
+    async def get():
+        return await AsyncClient().get(async_detail_url)
+
+    response = async_to_sync(get)()
+    assert response.status_code == HTTPStatus.OK
+    assert news.title in response.content.decode()
+    assert 'db_queries_total{view="news:async_detail"}' in (
+        metrics.exposition()
+    )
+
+
+def test_api_comments_pages(
+    client, settings, news, comment_batch, api_comments_url
+):
+    """API отдаёт комментарии страницами по курсору, от старых к новым."""
+    settings.COMMENTS_COUNT_ON_DETAIL_PAGE = 1
+    first = client.get(api_comments_url).json()
+    second = client.get(api_comments_url, {"cursor": first["next"]}).json()
+    assert [item["id"] for item in first["results"] + second["results"]] == [
+        comment.pk for comment in comment_batch.order_by("created", "id")
+    ]
+    assert second["next"] is None
+    assert set(first["results"][0]) == {"id", "author", "text", "created"}
+
+
+def test_api_comments_missing_news(client):
+    response = client.get(reverse("news:api_comments", args=(0,)))
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert "detail" in response.json()
+
+
+def test_api_news_default_fields(client, news_batch, api_news_url):
+    """По умолчанию API не загружает и не отдаёт текст новостей."""
+    with CaptureQueriesContext(connection) as queries:
+        data = client.get(api_news_url).json()
+    assert len(data["results"]) == settings.NEWS_COUNT_ON_HOME_PAGE
+    assert set(data["results"][0]) == {"id", "title", "date"}
+    assert '"text"' not in queries.captured_queries[0]["sql"]
+
+
+def test_api_news_pages(client, news_batch, api_news_url):
+    """Страницы API идут от новых новостей к старым без повторов."""
+    first = client.get(api_news_url).json()
+    second = client.get(api_news_url, {"cursor": first["next"]}).json()
+    items = first["results"] + second["results"]
+    assert second["next"] is None
+    assert len({item["id"] for item in items}) == len(news_batch)
+    dates = [item["date"] for item in items]
+    assert dates == sorted(dates, reverse=True)
+
+
+def test_api_news_sparse_fields(client, comment, news, api_news_detail_url):
+    """Параметр fields выбирает поля, включая счётчик комментариев."""
+    response = client.get(
+        api_news_detail_url, {"fields": "comment_count, title"}
+    )
+    assert response.json() == {
+        "id": news.pk, "title": news.title, "comment_count": 1
+    }
+
+
+def test_api_news_unknown_field(client, api_news_url):
+    response = client.get(api_news_url, {"fields": "title,password"})
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert "password" in response.json()["detail"]
+
+
+def test_api_news_missing(client):
+    response = client.get(reverse("news:api_news_detail", args=(0,)))
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_api_news_is_cached(client, author, news, api_news_detail_url):
+    """Повторный ответ API из кэша; изменения сбрасывают кэш."""
+    fields = {"fields": "title,comment_count"}
+    client.get(api_news_detail_url, fields)
+    with CaptureQueriesContext(connection) as queries:
+        cached = client.get(api_news_detail_url, fields)
+    assert len(queries) == 0
+    assert cached.json()["comment_count"] == 0
+    Comment.objects.create(news=news, author=author, text="Текст")
+    assert client.get(api_news_detail_url, fields).json() == {
+        "id": news.pk, "title": news.title, "comment_count": 1
+    }
+    news.title = "Новый заголовок"
+    news.save()
+    assert client.get(api_news_detail_url, fields).json()["title"] == (
+        "Новый заголовок"
+    )
+
+
+@pytest.mark.parametrize(
+    "url_fixture, content_type",
+    (
+        ("rss_url", "application/rss+xml; charset=utf-8"),
+        ("atom_url", "application/atom+xml; charset=utf-8"),
+    ),
+)
+def test_syndication_feed(request, client, news, url_fixture, content_type):
+    """Фиды содержат новости с абсолютными ссылками."""
+    response = client.get(request.getfixturevalue(url_fixture))
+    assert response["Content-Type"] == content_type
+    content = response.content.decode()
+    assert news.title in content
+    assert f"http://testserver{reverse('news:detail', args=(news.pk,))}" in (
+        content
+    )
+
+
+def test_syndication_feed_snapshot(client, author, news, rss_url):
+    """Фид строится заново только после изменения новостей."""
+    etag = client.get(rss_url)["ETag"]
+    Comment.objects.create(news=news, author=author, text="Текст")
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(rss_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert len(queries) == 0
+    news.title = "Новый заголовок"
+    news.save()
+    response = client.get(rss_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+    assert "Новый заголовок" in response.content.decode()
+    assert response["ETag"] != etag
+
+
+def test_syndication_feed_if_modified_since(client, news, atom_url):
+    last_modified = client.get(atom_url)["Last-Modified"]
+    response = client.get(atom_url, HTTP_IF_MODIFIED_SINCE=last_modified)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert not response.content
+
+
+def add_news(news):
+    News.objects.create(title="Ещё одна новость", text="Текст")
+
+
+def edit_news_title(news):
+    news.title = "Новый заголовок"
+    news.save()
+
+
+@pytest.mark.parametrize("change", (add_news, edit_news_title))
+def test_syndication_feed_if_modified_since_after_change(
+    client, news, atom_url, change
+):
+    """Изменение новостей в тот же день не даёт клиенту ответ 304."""
+    last_modified = client.get(atom_url)["Last-Modified"]
+    change(news)
+    response = client.get(atom_url, HTTP_IF_MODIFIED_SINCE=last_modified)
+    assert response.status_code == HTTPStatus.OK
+    assert response["Last-Modified"] != last_modified
+
+
+def test_bulk_news_changes_invalidate_feed(client, news, rss_url):
+    """Массовое изменение новостей тоже обновляет фид."""
+    client.get(rss_url)
+    News.objects.filter(pk=news.pk).update(title="Обновлённый заголовок")
+    assert "Обновлённый заголовок" in client.get(rss_url).content.decode()
+
+
+def search_results(client, query):
+    response = client.get(reverse("news:search"), data={"q": query})
+    assert response.status_code == HTTPStatus.OK
+    return response.context["results"]
+
+
+def test_search_ignores_yo_and_case(client):
+    news = News.objects.create(title="Ёлка в парке", text="Зелёная")
+    for query in ("елка", "ЁЛКА", "зеленая"):
+        results = search_results(client, query)
+        assert [result.news_id for result in results] == [news.pk]
+    snippet = search_results(client, "зеленая")[0].snippet
+    assert snippet == "<mark>Зелёная</mark>"
+
+
+def test_search_matches_word_forms(client):
+    news = News.objects.create(title="Заголовок", text="Свежая новость дня")
+    results = search_results(client, "новостей")
+    assert [result.news_id for result in results] == [news.pk]
+
+
+def test_search_ranks_title_above_text(client):
+    in_text = News.objects.create(title="Погода", text="Выборы в городе")
+    in_title = News.objects.create(title="Выборы", text="Итоги голосования")
+    results = search_results(client, "выборы")
+    assert [result.news_id for result in results] == [
+        in_title.pk, in_text.pk
+    ]
+
+
+def test_search_snippet_is_highlighted_and_escaped(client):
+    News.objects.create(title="Заголовок", text="<b>Важная</b> новость")
+    snippet = search_results(client, "важная")[0].snippet
+    assert snippet == "&lt;b&gt;<mark>Важная</mark>&lt;/b&gt; новость"
+
+
+def test_search_finds_comments(client, comment):
+    results = search_results(client, "комментария")
+    assert [(result.kind, result.news_id) for result in results] == [
+        ("comment", comment.news_id)
+    ]
+
+
+def test_search_index_follows_changes(client, comment):
+    comment.text = "Совсем другое"
+    comment.save()
+    assert not search_results(client, "комментария")
+    assert search_results(client, "другое")
+    comment.delete()
+    assert not search_results(client, "другое")
+
+
+def test_search_normalizes_rank_per_index(client, news, comment):
+    """Лучшие новость и комментарий одинаково релевантны."""
+    News.objects.filter(pk=news.pk).update(text="Текст комментария")
+    results = search_results(client, "комментария")
+    assert {result.kind for result in results} == {"news", "comment"}
+    assert [result.rank for result in results] == [1.0, 1.0]
+
+
+def test_search_skips_deleted_rows(client, news):
+    """Запись из индекса, которой уже нет в таблице, пропускается."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO news_news_fts(rowid, title, text) "
+            "VALUES (%s, 'Призрак', '')",
+            [news.pk + 1000],
+        )
+    assert search_results(client, "призрак") == []
+
+
+def test_search_without_full_text_index(client, news, monkeypatch):
+    """В других СУБД поиск идёт по icontains без индекса."""
+    found = News.objects.create(title="Погода", text="Итоги выборов")
+    monkeypatch.setattr(connection, "vendor", "postgresql")
+    results = search_results(client, "выборы")
+    assert [(result.news_id, result.rank) for result in results] == [
+        (found.pk, 1.0)
+    ]
+
+
+@pytest.mark.parametrize("query", ["", "   ", '"AND (* OR', "NEAR(а б)"])
+def test_search_tolerates_any_query(client, news, query):
+    search_results(client, query)
+
+
+def test_server_timing_header(profiling, client, home_url, news_batch):
+    """Ответ содержит измерения запроса в заголовке Server-Timing."""
+    response = client.get(home_url)
+    metrics = {
+        metric.split(";")[0]
+        for metric in response["Server-Timing"].split(", ")
+    }
+    assert metrics == {"total", "sql", "template", "memory"}
+
+
+def test_no_server_timing_without_profiling(client, home_url):
+    assert "Server-Timing" not in client.get(home_url)
+
+
+def test_profiling_report(profiling, client, staff_client, home_url,
+                          profiling_url, news_batch):
+    """Сводка профилирования накапливается по именам маршрутов."""
+    client.get(home_url)
+    client.get(home_url)
+    summary = staff_client.get(profiling_url).json()
+    home = summary["news:home"]
+    assert home["requests"] == 2
+    assert home["sql_count"] > 0
+    assert home["template_ms"] > 0
+    assert home["max_memory_peak"] > 0
+    staff_client.delete(profiling_url)
+    assert "news:home" not in profiling.summary()
+
+
+def test_profiling_restores_template_render(profiling, client, home_url):
+    """Template.render подменяется только на время запроса."""
+    render = Template.render
+    client.get(home_url)
+    assert Template.render is render
+
+
+def test_memory_measured_one_request_at_a_time():
+    """Пока измеряется один запрос, другой обходится без tracemalloc."""
+    baseline = memory_tracer.start()
+    try:
+        assert memory_tracer.start() is None
+    finally:
+        memory_tracer.stop(baseline)
+
+
+def test_metrics_only_for_allowed_ips(client, metrics_url):
+    """С посторонних адресов метрики не отдаются."""
+    response = client.get(metrics_url, REMOTE_ADDR="203.0.113.7")
+    assert response.status_code == HTTPStatus.FORBIDDEN
+
+
+def test_metrics_exposition(metrics, client, home_url, metrics_url):
+    """Метрики отдаются в текстовом формате Prometheus."""
+    client.get(home_url)
+    client.get(home_url)
+    response = client.get(metrics_url)
+    assert response["Content-Type"].startswith("text/plain; version=0.0.4")
+    lines = response.content.decode().splitlines()
+    assert "# TYPE http_request_duration_seconds histogram" in lines
+    assert (
+        'http_request_duration_seconds_count{view="news:home"} 2' in lines
+    )
+    assert (
+        'http_request_duration_seconds_bucket{view="news:home",le="+Inf"} 2'
+        in lines
+    )
+    assert 'http_responses_total{view="news:home",status="200"} 2' in lines
+    assert 'cache_lookups_total{cache="feed",result="miss"} 1' in lines
+    assert 'cache_lookups_total{cache="feed",result="hit"} 1' in lines
+
+
+def test_metrics_count_model_changes(metrics, author_client, detail_url):
+    author_client.post(detail_url, data={"text": "Новый комментарий"})
+    lines = metrics.exposition().splitlines()
+    assert (
+        'model_changes_total{model="news.comment",action="created"} 1'
+        in lines
+    )
@@ -0,0 +1,62 @@
+from datetime import date
+
+import pytest
+from django.db import connection
+
+from news.models import Comment, News
+from news.pagination import KeysetPaginator
+from news.views import NewsCommentsMixin, NewsList
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.skipif(
+        connection.vendor != "sqlite", reason="EXPLAIN QUERY PLAN из SQLite"
+    ),
+]
+
+
+def query_plan(queryset):
+    """План выполнения запроса в виде списка строк EXPLAIN QUERY PLAN."""
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def assert_uses_index(queryset):
+    plan = query_plan(queryset)
+    for step in plan:
+        assert "TEMP B-TREE" not in step, plan
+        if step.startswith("SCAN"):
+            assert "INDEX" in step, plan
+
+
+def feed_cursor():
+    paginator = KeysetPaginator(NewsList.ordering, 1)
+    return paginator.encode_cursor(News(id=1, date=date.today()))
+
+
+@pytest.mark.parametrize("cursor", (None, "first"), ids=("first", "next"))
+def test_news_feed_uses_index(cursor):
+    """Лента новостей читается по индексу (date, id) без сортировки."""
+    paginator = KeysetPaginator(NewsList.ordering, 10)
+    cursor = cursor and feed_cursor()
+    assert_uses_index(paginator.get_queryset(News.objects.all(), cursor))
+
+
+def test_comments_page_uses_index(comment):
+    """Комментарии к новости читаются по индексу (news, created, id)."""
+    paginator = KeysetPaginator(NewsCommentsMixin.comments_ordering, 10)
+    cursor = paginator.encode_cursor(comment)
+    for page_cursor in (None, cursor):
+        queryset = paginator.get_queryset(
+            comment.news.comment_set.select_related("author"), page_cursor
+        )
+        assert_uses_index(queryset)
+
+
+def test_author_comments_use_index(author, comment):
+    """Комментарии автора ищутся по индексу (author, id)."""
+    queryset = Comment.objects.filter(author=author, pk=comment.pk)
+    assert_uses_index(queryset)
+    assert_uses_index(Comment.objects.filter(author=author).order_by("id"))
@@ -1,10 +1,29 @@
+import asyncio
+import threading
+from datetime import timedelta
 from http import HTTPStatus
+from io import StringIO
 
 import pytest
+from asgiref.sync import async_to_sync
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.http import HttpResponse
+from django.template import Context, Template
+from django.test import Client, RequestFactory
+from django.urls import reverse
+from django.utils import timezone
 from pytest_django.asserts import assertFormError, assertRedirects
 
+from news.async_views import run_sync
+from news.factories import create_comments, create_news, create_users
 from news.forms import BAD_WORDS, WARNING
-from news.models import Comment
+from news.metrics import Counter, Histogram, QueryCounter, Registry
+from news.models import Comment, News
+from news.moderation import WordMatcher
+from news.query_wrappers import wrap_queries
+from news.search import NEWS_INDEX, search
+from news.sql_debug import NPlusOneError, SqlDebugMiddleware, normalize
 
 pytestmark = pytest.mark.django_db
 
@@ -38,6 +57,205 @@ def test_user_cant_use_bad_words(author_client, news, detail_url):
     assertFormError(response, form="form", field="text", errors=WARNING)
 
 
+def test_api_create_comment(author_client, author, news, api_comments_url):
+    """Комментарий, созданный через API, возвращается в ответе."""
+    response = author_client.post(
+        api_comments_url,
+        data={"text": "Текст из API"},
+        content_type="application/json",
+    )
+    assert response.status_code == HTTPStatus.CREATED
+    comment = Comment.objects.get(author=author, news=news)
+    assert response.json() == {
+        "id": comment.pk,
+        "author": author.username,
+        "text": "Текст из API",
+        "created": comment.created.isoformat(),
+    }
+    news.refresh_from_db()
+    assert news.comment_count == 1
+
+
+@pytest.mark.parametrize(
+    "client_fixture, data, expected_status",
+    (
+        ("client", {"text": "Текст"}, HTTPStatus.UNAUTHORIZED),
+        ("author_client", {"text": ""}, HTTPStatus.BAD_REQUEST),
+        ("author_client", {"text": BAD_WORDS[0]}, HTTPStatus.BAD_REQUEST),
+        ("author_client", ["Текст"], HTTPStatus.BAD_REQUEST),
+        ("author_client", {"text": 5}, HTTPStatus.BAD_REQUEST),
+        ("author_client", {"text": [1]}, HTTPStatus.BAD_REQUEST),
+    ),
+)
+def test_api_rejects_comment(
+    request, news, api_comments_url, client_fixture, data, expected_status
+):
+    """API не сохраняет комментарий, не прошедший проверки."""
+    client = request.getfixturevalue(client_fixture)
+    response = client.post(
+        api_comments_url, data=data, content_type="application/json"
+    )
+    assert response.status_code == expected_status
+    assert "detail" in response.json()
+    assert not Comment.objects.exists()
+
+
+def test_api_bad_words_error(author_client, news, api_comments_url):
+    """Ошибки CommentForm отдаются по полям."""
+    response = author_client.post(
+        api_comments_url,
+        data={"text": BAD_WORDS[0]},
+        content_type="application/json",
+    )
+    assert response.json()["errors"]["text"][0]["message"] == WARNING
+
+
+@pytest.mark.parametrize(
+    "client_fixture, url_name",
+    (
+        ("author_client", "news:api_comments"),
+        ("staff_client", "news:api_comments_bulk"),
+    ),
+)
+@pytest.mark.parametrize("data", ({"text": "Текст"}, {"text": 5}))
+def test_api_comment_for_missing_news(request, client_fixture, url_name, data):
+    """Для несуществующей новости ответ 404, даже если тело неверно."""
+    client = request.getfixturevalue(client_fixture)
+    response = client.post(
+        reverse(url_name, args=(0,)),
+        data=data,
+        content_type="application/json",
+    )
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_api_comment_for_news_deleted_meanwhile(
+    author_client, news, api_comments_url, monkeypatch
+):
+    """Новость, удалённая параллельно с записью комментария, даёт 404."""
+    def save(*args, **kwargs):
+        raise IntegrityError("FOREIGN KEY constraint failed")
+
+    monkeypatch.setattr(Comment, "save", save)
+    response = author_client.post(
+        api_comments_url,
+        data={"text": "Текст"},
+        content_type="application/json",
+    )
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert "detail" in response.json()
+
+
+def test_api_csrf_failure_is_json(author, news, api_comments_url):
+    """Без CSRF-токена API отвечает 403 в JSON, а не HTML-страницей."""
+    client = Client(enforce_csrf_checks=True)
+    client.force_login(author)
+    response = client.post(
+        api_comments_url,
+        data={"text": "Текст"},
+        content_type="application/json",
+    )
+    assert response.status_code == HTTPStatus.FORBIDDEN
+    assert "X-CSRFToken" in response.json()["detail"]
+    assert not Comment.objects.exists()
+
+
+def test_api_bulk_create(staff_client, admin, news, api_comments_bulk_url):
+    """Массовая загрузка сохраняет комментарии и пересчитывает счётчик."""
+    texts = [f"Комментарий {i}" for i in range(30)]
+    response = staff_client.post(
+        api_comments_bulk_url,
+        data={"comments": [{"text": text} for text in texts]},
+        content_type="application/json",
+    )
+    assert response.status_code == HTTPStatus.CREATED
+    assert response.json() == {"created": len(texts)}
+    assert sorted(
+        Comment.objects.filter(news=news, author=admin)
+        .values_list("text", flat=True)
+    ) == sorted(texts)
+    news.refresh_from_db()
+    assert news.comment_count == len(texts)
+
+
+def test_api_bulk_create_is_all_or_nothing(
+    staff_client, news, api_comments_bulk_url
+):
+    """Если один комментарий не прошёл модерацию, не сохраняется ни один."""
+    response = staff_client.post(
+        api_comments_bulk_url,
+        data={"comments": [{"text": "Текст"}, {"text": BAD_WORDS[0]}]},
+        content_type="application/json",
+    )
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert list(response.json()["errors"]) == ["1"]
+    assert not Comment.objects.exists()
+
+
+def test_api_bulk_create_limit(
+    settings, staff_client, news, api_comments_bulk_url
+):
+    settings.API_BULK_COMMENTS_LIMIT = 2
+    response = staff_client.post(
+        api_comments_bulk_url,
+        data={"comments": [{"text": "Текст"}] * 3},
+        content_type="application/json",
+    )
+    assert response.status_code == HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+    assert not Comment.objects.exists()
+
+
+@pytest.mark.parametrize(
+    "client_fixture, expected_status",
+    (
+        ("client", HTTPStatus.UNAUTHORIZED),
+        ("author_client", HTTPStatus.FORBIDDEN),
+    ),
+)
+def test_api_bulk_create_is_for_staff(
+    request, news, api_comments_bulk_url, client_fixture, expected_status
+):
+    client = request.getfixturevalue(client_fixture)
+    response = client.post(
+        api_comments_bulk_url,
+        data={"comments": [{"text": "Текст"}]},
+        content_type="application/json",
+    )
+    assert response.status_code == expected_status
+    assert not Comment.objects.exists()
+
+
+@pytest.mark.parametrize(
+    "text", ("Ну ты и РЕДИСКА!", "Негодяй", "Мы ёжики, а ты негодяй")
+)
+def test_bad_words_ignore_case(author_client, news, detail_url, text):
+    """Запрещённые слова находятся независимо от регистра."""
+    response = author_client.post(detail_url, data={"text": text})
+    assertFormError(response, form="form", field="text", errors=WARNING)
+
+
+def test_word_matcher_normalizes_yo():
+    """Буква «ё» в словах и в тексте сравнивается как «е»."""
+    assert WordMatcher(("ёлка",)).search("Под ЕЛКАМИ") == "елка"
+    assert WordMatcher(("елка",)).search("Ёлка") == "елка"
+
+
+def test_word_matcher_whole_words():
+    """В режиме целых слов часть другого слова не считается совпадением."""
+    words = ("сук", "бяка")
+    assert WordMatcher(words).search("сукно") == "сук"
+    matcher = WordMatcher(words, whole_words=True)
+    assert matcher.search("сукно и забияка") is None
+    assert matcher.search("вот бяка!") == "бяка"
+
+
+def test_word_matcher_overlapping_words():
+    """Находятся слова, вложенные в другие слова списка."""
+    matcher = WordMatcher(("негодяйка", "одя", "дя"))
+    assert matcher.search("негодник") is None
+    assert matcher.search("мегодяй") == "одя"
+
+
 def test_author_can_edit_comment(
     author_client, news, comment, edit_url, detail_url
 ):
@@ -80,3 +298,220 @@ def test_other_user_cant_delete_comment(admin_client, comment, delete_url):
     response = admin_client.delete(delete_url)
     assert response.status_code == HTTPStatus.NOT_FOUND
     assert Comment.objects.count() == comments_count_before
+
+
+@pytest.mark.parametrize(
+    "url_fixture, method, data, expected_queries",
+    [
+        # Пользователь, новость, вставка, счётчик комментариев.
+        ("detail_url", "post", {"text": "Новый текст"}, 4),
+        # Пользователь, комментарий вместе с новостью.
+        ("edit_url", "get", None, 2),
+        # Пользователь, комментарий, его обновление, updated_at новости.
+        ("edit_url", "post", {"text": "Новый текст"}, 4),
+        ("delete_url", "get", None, 2),
+        # Пользователь, комментарий автора, его удаление, счётчик
+        # комментариев.
+        ("delete_url", "post", None, 4),
+    ]
+)
+def test_comment_write_queries(
+    request, django_assert_num_queries, author_client,
+    url_fixture, method, data, expected_queries
+):
+    """Число SQL-запросов при создании, правке и удалении комментария."""
+    url = request.getfixturevalue(url_fixture)
+    with django_assert_num_queries(expected_queries):
+        getattr(author_client, method)(url, data=data)
+
+
+def test_delete_by_author_keeps_comment_count(author, admin, news, comment):
+    """Чужой комментарий не удаляется, свой — уменьшает счётчик."""
+    news.refresh_from_db()
+    assert news.comment_count == 1
+    assert Comment.objects.delete_by_author(comment.pk, admin.pk) is None
+    deleted = Comment.objects.delete_by_author(comment.pk, author.pk)
+    assert deleted.news_id == news.pk
+    news.refresh_from_db()
+    assert news.comment_count == 0
+
+
+def test_comment_count_follows_create_and_delete(
+    author_client, news, detail_url
+):
+    """Счётчик комментариев обновляется при создании и удалении."""
+    author_client.post(detail_url, data={"text": "Новый текст"})
+    news.refresh_from_db()
+    assert news.comment_count == 1
+    comment = Comment.objects.get(news=news)
+    author_client.delete(reverse("news:delete", args=(comment.id,)))
+    news.refresh_from_db()
+    assert news.comment_count == 0
+
+
+def test_comment_count_after_bulk_create(author, news):
+    """Массовое создание комментариев пересчитывает счётчик."""
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=f"Комментарий {i}")
+        for i in range(3)
+    )
+    news.refresh_from_db()
+    assert news.comment_count == 3
+
+
+@pytest.mark.parametrize("field", ("news", "news_id"))
+def test_comment_count_after_moving_comments(comment, news, field):
+    """Перенос комментариев в другую новость обновляет оба счётчика."""
+    other = News.objects.create(title="Другая новость", text="Текст")
+    target = other if field == "news" else other.pk
+    Comment.objects.filter(pk=comment.pk).update(**{field: target})
+    news.refresh_from_db()
+    other.refresh_from_db()
+    assert (news.comment_count, other.comment_count) == (0, 1)
+
+
+def test_recount_comments_command(comment, news):
+    """Команда recount_comments исправляет разошедшийся счётчик."""
+    News.objects.filter(pk=news.pk).update(comment_count=42)
+    call_command("recount_comments", stdout=StringIO())
+    news.refresh_from_db()
+    assert news.comment_count == 1
+
+
+def test_rebuild_search_index_command(news):
+    """Команда rebuild_search_index восстанавливает очищенный индекс."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {NEWS_INDEX}({NEWS_INDEX}) VALUES ('delete-all')"
+        )
+    assert not search(news.title, limit=10)
+    call_command("rebuild_search_index", stdout=StringIO())
+    assert [result.news_id for result in search(news.title, limit=10)] == [
+        news.pk
+    ]
+
+
+def test_factories_keep_explicit_timestamps(news, author):
+    """Фабрика сохраняет заданное время комментариев и счётчик новости."""
+    oldest = timezone.now() - timedelta(days=3)
+    ids = create_comments(
+        3, [news.pk], [author.pk], oldest=oldest, step=timedelta(hours=1)
+    )
+    created = list(
+        Comment.objects.filter(pk__in=ids)
+        .order_by("pk")
+        .values_list("created", flat=True)
+    )
+    assert created == [oldest + timedelta(hours=i) for i in range(3)]
+    news.refresh_from_db()
+    assert news.comment_count == 3
+    assert Comment._meta.get_field("created").auto_now_add
+
+
+def test_factories_are_deterministic():
+    """Одинаковый seed даёт одинаковые данные."""
+    first = list(
+        News.objects.filter(pk__in=create_news(5, seed=7))
+        .order_by("pk")
+        .values_list("title", "text", "date")
+    )
+    second = list(
+        News.objects.filter(pk__in=create_news(5, seed=7))
+        .order_by("pk")
+        .values_list("title", "text", "date")
+    )
+    assert first == second
+
+
+def test_metrics_merge_thread_shards():
+    """Значения потоков, в том числе завершившихся, складываются."""
+    registry = Registry()
+    requests = Counter(registry, "requests_total", "Запросы.", ("view",))
+    latency = Histogram(
+        registry, "latency_seconds", "Время.", ("view",), (0.1, 1.0)
+    )
+
+    def work():
+        for value in (0.05, 0.5, 5.0):
+            requests.inc("home")
+            latency.observe(value, "home")
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    work()
+    lines = registry.exposition().splitlines()
+    assert 'requests_total{view="home"} 15' in lines
+    assert 'latency_seconds_bucket{view="home",le="0.1"} 5' in lines
+    assert 'latency_seconds_bucket{view="home",le="1.0"} 10' in lines
+    assert 'latency_seconds_bucket{view="home",le="+Inf"} 15' in lines
+    assert 'latency_seconds_count{view="home"} 15' in lines
+    assert len(registry.shards) == 1
+
+
+def test_normalize_sql():
+    """Запросы с разными значениями нормализуются одинаково."""
+    assert normalize(
+        "SELECT *  FROM news_news\n WHERE id IN (%s, %s) AND title = 'А'"
+        " LIMIT 21"
+    ) == "SELECT * FROM news_news WHERE id IN (...) AND title = ? LIMIT ?"
+
+
+@pytest.fixture
+def comments_by_readers(news):
+    readers = create_users(f"Читатель {i}" for i in range(5))
+    return create_comments(5, [news.pk], readers)
+
+
+def test_n_plus_one_in_template(comments_by_readers):
+    """N+1 при отрисовке указывает на строку шаблона."""
+    template = Template(
+        "{% for comment in comments %}\n{{ comment.author }}{% endfor %}"
+    )
+
+    def view(request):
+        return HttpResponse(
+            template.render(Context({"comments": Comment.objects.all()}))
+        )
+
+    middleware = SqlDebugMiddleware(view)
+    with pytest.raises(NPlusOneError, match="5 раз из <unknown source>:2"):
+        middleware(RequestFactory().get("/"))
+
+
+def test_n_plus_one_in_code(comments_by_readers):
+    """N+1 в коде указывает на файл и строку."""
+    def view(request):
+        names = [comment.author.username for comment in Comment.objects.all()]
+        return HttpResponse(names)
+
+    middleware = SqlDebugMiddleware(view)
+    with pytest.raises(NPlusOneError, match="test_logic.py:[0-9]+ in"):
+        middleware(RequestFactory().get("/"))
+
+
+def test_slow_query_log(settings, caplog, client, home_url):
+    settings.SQL_DEBUG_SLOW_QUERY_MS = 0
+    client.get(home_url)
+    assert "Медленный запрос" in caplog.text
+
+
+def test_run_sync_pool_keeps_query_wrappers(settings):
+    """Запросы из потоков пула видны обёрткам текущего запроса."""
+    settings.ASYNC_VIEWS_MAX_WORKERS = 2
+    queries = QueryCounter()
+
+    def query():
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        return threading.current_thread().name
+
+    async def run_queries():
+        with wrap_queries(queries):
+            return await asyncio.gather(run_sync(query), run_sync(query))
+
+    thread_names = async_to_sync(run_queries)()
+    assert all(name.startswith("news-async") for name in thread_names)
+    assert queries.count == 2
@@ -0,0 +1,117 @@
+from http import HTTPStatus
+
+import pytest
+
+from news.urls import app_name, urlpatterns
+from .query_budget import QUERY_BUDGETS
+
+pytestmark = pytest.mark.django_db
+
+FORM_DATA = {"text": "Новый текст"}
+# Страницы, которые принимают POST в JSON, и тела их запросов.
+JSON_DATA = {
+    "news:api_comments_bulk": {
+        "comments": [{"text": f"Комментарий {i}"} for i in range(10)]
+    },
+}
+
+
+def test_every_route_has_budget():
+    """Для каждого маршрута news.urls задан бюджет SQL-запросов."""
+    url_names = {f"{app_name}:{pattern.name}" for pattern in urlpatterns}
+    assert url_names <= QUERY_BUDGETS.keys()
+
+
+@pytest.mark.parametrize(
+    "url_name, url_fixture, client_fixture, method, expected_status",
+    [
+        ("news:home", "home_url", "client", "get", HTTPStatus.OK),
+        ("news:home", "home_url", "author_client", "get", HTTPStatus.OK),
+        ("news:search", "search_url", "client", "get", HTTPStatus.OK),
+        ("news:search", "search_url", "author_client", "get", HTTPStatus.OK),
+        ("news:detail", "detail_url", "client", "get", HTTPStatus.OK),
+        ("news:detail", "detail_url", "author_client", "get", HTTPStatus.OK),
+        (
+            "news:detail", "detail_url",
+            "author_client", "post", HTTPStatus.FOUND,
+        ),
+        ("news:async_home", "async_home_url", "client", "get", HTTPStatus.OK),
+        (
+            "news:async_home", "async_home_url",
+            "author_client", "get", HTTPStatus.OK,
+        ),
+        (
+            "news:async_detail", "async_detail_url",
+            "client", "get", HTTPStatus.OK,
+        ),
+        (
+            "news:async_detail", "async_detail_url",
+            "author_client", "get", HTTPStatus.OK,
+        ),
+        (
+            "news:async_detail", "async_detail_url",
+            "author_client", "post", HTTPStatus.FOUND,
+        ),
+        ("news:api_news", "api_news_url", "client", "get", HTTPStatus.OK),
+        (
+            "news:api_news", "api_news_url",
+            "author_client", "get", HTTPStatus.OK,
+        ),
+        (
+            "news:api_news_detail", "api_news_detail_url",
+            "client", "get", HTTPStatus.OK,
+        ),
+        (
+            "news:api_comments", "api_comments_url",
+            "client", "get", HTTPStatus.OK,
+        ),
+        (
+            "news:api_comments", "api_comments_url",
+            "author_client", "post", HTTPStatus.CREATED,
+        ),
+        (
+            "news:api_comments_bulk", "api_comments_bulk_url",
+            "staff_client", "post", HTTPStatus.CREATED,
+        ),
+        ("news:rss", "rss_url", "client", "get", HTTPStatus.OK),
+        ("news:atom", "atom_url", "author_client", "get", HTTPStatus.OK),
+        ("news:edit", "edit_url", "author_client", "get", HTTPStatus.OK),
+        ("news:edit", "edit_url", "author_client", "post", HTTPStatus.FOUND),
+        ("news:delete", "delete_url", "author_client", "get", HTTPStatus.OK),
+        (
+            "news:delete", "delete_url",
+            "author_client", "post", HTTPStatus.FOUND,
+        ),
+        ("news:metrics", "metrics_url", "client", "get", HTTPStatus.OK),
+    ]
+)
+def test_query_budget(
+    request, realistic_data, query_budget,
+    url_name, url_fixture, client_fixture, method, expected_status
+):
+    """
+    Страница укладывается в бюджет SQL-запросов.
+
+    Код ответа проверяется, чтобы бюджет не «выполнила» страница ошибки
+    или перенаправление на вход.
+    """
+    url = request.getfixturevalue(url_fixture)
+    client = request.getfixturevalue(client_fixture)
+    if url_name in JSON_DATA:
+        data = {
+            "data": JSON_DATA[url_name], "content_type": "application/json"
+        }
+    else:
+        data = {"data": FORM_DATA if method == "post" else None}
+    with query_budget(url_name):
+        response = getattr(client, method)(url, **data)
+    assert response.status_code == expected_status
+
+
+def test_profiling_query_budget(
+    profiling, realistic_data, query_budget, staff_client, profiling_url
+):
+    """Сводка профилирования укладывается в бюджет, когда она включена."""
+    with query_budget("news:profiling"):
+        response = staff_client.get(profiling_url)
+    assert response.status_code == HTTPStatus.OK
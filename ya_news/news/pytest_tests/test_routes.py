@@ -1,7 +1,13 @@
+from datetime import timedelta
 from http import HTTPStatus
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from pytest_django.asserts import assertRedirects
 
+from news.models import News
+
 pytestmark = pytest.mark.django_db
 
 
@@ -10,13 +16,18 @@ pytestmark = pytest.mark.django_db
     [
         ("home_url", "client", HTTPStatus.OK),
         ("detail_url", "client", HTTPStatus.OK),
+        ("async_home_url", "client", HTTPStatus.OK),
+        ("async_detail_url", "client", HTTPStatus.OK),
         ("edit_url", "author_client", HTTPStatus.OK),
         ("delete_url", "author_client", HTTPStatus.OK),
         ("edit_url", "admin_client", HTTPStatus.NOT_FOUND),
         ("delete_url", "admin_client", HTTPStatus.NOT_FOUND),
+        ("profiling_url", "author_client", HTTPStatus.FORBIDDEN),
+        ("profiling_url", "staff_client", HTTPStatus.NOT_FOUND),
         ("signup_url", "client", HTTPStatus.OK),
         ("login_url", "client", HTTPStatus.OK),
         ("logout_url", "client", HTTPStatus.OK),
+        ("metrics_url", "client", HTTPStatus.OK),
     ]
 )
 def test_accessible_pages(
@@ -34,6 +45,7 @@ def test_accessible_pages(
     [
         ("edit_url", "client"),
         ("delete_url", "client"),
+        ("profiling_url", "client"),
     ]
 )
 def test_anonymous_redirects_to_login(
@@ -44,3 +56,85 @@ def test_anonymous_redirects_to_login(
     client = request.getfixturevalue(client_fixture)
     response = client.get(url)
     assertRedirects(response, f"{login_url}?next={url}")
+
+
+@pytest.mark.parametrize("url_fixture", ("detail_url", "async_detail_url"))
+def test_detail_not_modified(request, client, url_fixture, comment):
+    """Повторный запрос с ETag получает 304 быстрее и без шаблонов."""
+    detail_url = request.getfixturevalue(url_fixture)
+    with CaptureQueriesContext(connection) as full_page:
+        response = client.get(detail_url)
+    assert response.status_code == HTTPStatus.OK
+    assert response.has_header("Last-Modified")
+    with CaptureQueriesContext(connection) as not_modified:
+        response = client.get(
+            detail_url, HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert not response.templates
+    assert len(not_modified) < len(full_page)
+
+
+@pytest.mark.parametrize("url_fixture", ("detail_url", "async_detail_url"))
+def test_detail_no_conditional_get_for_user(
+    request, author_client, url_fixture, comment
+):
+    """Страница с CSRF-токеном формы не отдаётся как 304."""
+    detail_url = request.getfixturevalue(url_fixture)
+    response = author_client.get(detail_url, HTTP_IF_NONE_MATCH="*")
+    assert response.status_code == HTTPStatus.OK
+    assert not response.has_header("ETag")
+    assert not response.has_header("Last-Modified")
+
+
+def edit_comment(news, comment):
+    comment.text = "Исправленный комментарий"
+    comment.save()
+
+
+def edit_news(news, comment):
+    news.text = "Исправленный текст"
+    news.save()
+
+
+def delete_comment(news, comment):
+    comment.delete()
+
+
+@pytest.mark.parametrize(
+    "change", (edit_comment, edit_news, delete_comment)
+)
+def test_detail_etag_changes(client, news, comment, detail_url, change):
+    """Любое изменение новости или её комментариев меняет ETag."""
+    etag = client.get(detail_url)["ETag"]
+    change(news, comment)
+    response = client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+    assert response["ETag"] != etag
+
+
+@pytest.mark.parametrize("url_fixture", ("detail_url", "async_detail_url"))
+def test_detail_if_modified_since_after_same_second_edit(
+    request, client, news, url_fixture
+):
+    """Правка в ту же секунду не даёт 304 по одному If-Modified-Since."""
+    detail_url = request.getfixturevalue(url_fixture)
+    second = timezone.now().replace(microsecond=0)
+    News.objects.filter(pk=news.pk).update(updated_at=second)
+    last_modified = client.get(detail_url)["Last-Modified"]
+    response = client.get(detail_url, HTTP_IF_MODIFIED_SINCE=last_modified)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    News.objects.filter(pk=news.pk).update(
+        updated_at=second + timedelta(milliseconds=500)
+    )
+    response = client.get(detail_url, HTTP_IF_MODIFIED_SINCE=last_modified)
+    assert response.status_code == HTTPStatus.OK
+    assert response["Last-Modified"] == last_modified
+
+
+def test_detail_etag_ignores_other_news(client, news, comment, detail_url):
+    """Изменения в другой новости не сбрасывают ETag страницы."""
+    etag = client.get(detail_url)["ETag"]
+    News.objects.create(title="Другая новость", text="Текст")
+    response = client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
@@ -0,0 +1,53 @@
+"""
+Обёртки SQL-запросов, действующие в текущем контексте выполнения.
+
+connection.execute_wrapper() подключает обёртку только к соединению
+текущего потока, а асинхронные представления выполняют запросы в
+потоках sync_to_async. Поэтому обёртки хранятся в ContextVar, который
+asgiref копирует в эти потоки, и вызываются из постоянной обёртки
+каждого соединения.
+"""
+import functools
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import connection as default_connection
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+query_wrappers = ContextVar("query_wrappers", default=())
+
+
+def call_wrappers(execute, sql, params, many, context):
+    """Постоянная обёртка соединения: вызывает обёртки контекста."""
+    for wrapper in reversed(query_wrappers.get()):
+        execute = functools.partial(wrapper, execute)
+    return execute(sql, params, many, context)
+
+
+def install(connection):
+    if call_wrappers not in connection.execute_wrappers:
+        connection.execute_wrappers.append(call_wrappers)
+
+
+@receiver(connection_created)
+def install_on_connect(sender, connection, **kwargs):
+    install(connection)
+
+
+@contextmanager
+def wrap_queries(wrapper):
+    """
+    Подключает обёртку к запросам текущего контекста.
+
+    Как и у execute_wrapper(), обёртка получает execute, sql, params,
+    many и context, но видит и запросы, выполненные через
+    sync_to_async в других потоках.
+    """
+    # Соединение могло открыться до подключения обработчика сигнала.
+    install(default_connection)
+    token = query_wrappers.set((*query_wrappers.get(), wrapper))
+    try:
+        yield
+    finally:
+        query_wrappers.reset(token)
@@ -0,0 +1,263 @@
+import re
+from collections import namedtuple
+
+from django.db import connection
+from django.db.models import Q
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from news.models import Comment, News
+from news.moderation import normalize
+
+NEWS_INDEX = "news_news_fts"
+COMMENT_INDEX = "news_comment_fts"
+
+# Веса столбцов для bm25(): совпадение в заголовке важнее, чем в тексте.
+TITLE_WEIGHT = 10.0
+TEXT_WEIGHT = 1.0
+
+# Длина фрагмента текста в результатах и сколько символов перед первым
+# совпадением в него попадает.
+SNIPPET_LENGTH = 200
+SNIPPET_CONTEXT = 60
+SNIPPET_ELLIPSIS = "…"
+
+# Окончания, которые отбрасываются у слов запроса, чтобы по «новости»
+# находились и «новость», и «новостей». Длинные окончания проверяются
+# первыми; у основы остаётся не меньше MIN_STEM_LENGTH букв.
+ENDINGS = tuple(sorted(
+    (
+        "ами", "ями", "ого", "его", "ому", "ему", "ыми", "ими", "ией",
+        "иях", "иям", "ах", "ях", "ов", "ев", "ей", "ой", "ый", "ий",
+        "ая", "яя", "ое", "ее", "ую", "юю", "ом", "ем", "ам", "ям", "ия",
+        "ие", "ые", "ых", "их", "ы", "и", "а", "я", "о", "е", "у", "ю",
+        "ь", "й",
+    ),
+    key=len,
+    reverse=True,
+))
+MIN_STEM_LENGTH = 4
+
+WORD_RE = re.compile(r"\w+")
+
+SearchResult = namedtuple(
+    "SearchResult", ("kind", "news_id", "title", "snippet", "rank")
+)
+
+# Лучшие совпадения каждого индекса: bm25() ранжирует все совпадения,
+# а не только часть из них. Оценки bm25() разных индексов несравнимы,
+# поэтому объединяются они в Python после нормализации (см. normalized).
+RANK_SQL = f"""
+    SELECT * FROM (
+        SELECT 'news' AS kind, rowid AS id,
+               bm25({NEWS_INDEX}, %s, %s) AS score
+        FROM {NEWS_INDEX}
+        WHERE {NEWS_INDEX} MATCH %s
+        ORDER BY score
+        LIMIT %s
+    )
+    UNION ALL
+    SELECT * FROM (
+        SELECT 'comment', rowid, bm25({COMMENT_INDEX}) AS score
+        FROM {COMMENT_INDEX}
+        WHERE {COMMENT_INDEX} MATCH %s
+        ORDER BY score
+        LIMIT %s
+    )
+"""
+
+
+def stem(word):
+    """Отбрасывает у слова самое длинное подходящее окончание."""
+    for ending in ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= (
+            MIN_STEM_LENGTH
+        ):
+            return word[:-len(ending)]
+    return word
+
+
+def query_terms(query):
+    """Нормализованные основы слов запроса без повторов."""
+    return list(dict.fromkeys(
+        stem(word) for word in WORD_RE.findall(normalize(query))
+    ))
+
+
+def build_match(terms):
+    """
+    Переводит основы слов запроса в выражение MATCH для FTS5.
+
+    Каждая основа ищется как префикс, и все они должны встретиться
+    в документе. Основы заключаются в кавычки, поэтому синтаксис FTS5
+    в запросе не интерпретируется.
+    """
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def terms_pattern(terms):
+    """Регулярное выражение для слов, начинающихся с основ запроса."""
+    alternatives = "|".join(
+        re.escape(term).replace("е", "[её]") for term in terms
+    )
+    return re.compile(rf"\b(?:{alternatives})\w*", re.IGNORECASE)
+
+
+def highlight(text, pattern):
+    """
+    Фрагмент текста вокруг первого совпадения.
+
+    Фрагмент экранируется, найденные слова оборачиваются в <mark>.
+    Подсветка делается в Python, а не функцией snippet() FTS5: так
+    выделяются и слова с «ё», а поиск обходится без лишнего прохода
+    по индексу.
+    """
+    first = pattern.search(text)
+    start = 0
+    if first and first.start() > SNIPPET_CONTEXT:
+        start = first.start() - SNIPPET_CONTEXT
+        space = text.find(" ", start, first.start())
+        if space != -1:
+            start = space + 1
+    end = min(start + SNIPPET_LENGTH, len(text))
+    if end < len(text):
+        space = text.rfind(" ", start, end)
+        if space > start:
+            end = space
+    fragment = text[start:end]
+    parts = []
+    position = 0
+    for match in pattern.finditer(fragment):
+        parts.append(escape(fragment[position:match.start()]))
+        parts.append(f"<mark>{escape(match.group())}</mark>")
+        position = match.end()
+    parts.append(escape(fragment[position:]))
+    prefix = SNIPPET_ELLIPSIS if start else ""
+    suffix = SNIPPET_ELLIPSIS if end < len(text) else ""
+    return mark_safe(prefix + "".join(parts) + suffix)
+
+
+def normalized(ranked):
+    """
+    Переводит оценки bm25() в релевантность от 0 до 1 внутри каждого индекса.
+
+    bm25() возвращает отрицательные числа (меньше — лучше), масштаб
+    которых зависит от размера индекса и длины документов. Оценка
+    делится на лучшую оценку своего индекса, поэтому лучшие новость
+    и комментарий получают релевантность 1. Возвращает тройки
+    (kind, pk, relevance) от более релевантных к менее релевантным.
+    """
+    best = {}
+    for kind, _, score in ranked:
+        best[kind] = min(best.get(kind, 0), score)
+    return sorted(
+        (
+            (kind, pk, score / best[kind] if best[kind] else 1.0)
+            for kind, pk, score in ranked
+        ),
+        key=lambda row: row[2],
+        reverse=True,
+    )
+
+
+def rank(terms, limit):
+    """Лучшие совпадения из индексов FTS5 (только SQLite)."""
+    match = build_match(terms)
+    with connection.cursor() as cursor:
+        cursor.execute(RANK_SQL, [
+            TITLE_WEIGHT, TEXT_WEIGHT, match, limit, match, limit,
+        ])
+        return normalized(cursor.fetchall())[:limit]
+
+
+def rank_without_index(terms, limit):
+    """
+    Поиск без FTS5 для других СУБД: icontains по каждой основе.
+
+    Такой поиск не ранжирует совпадения: сначала идут свежие новости,
+    затем свежие комментарии, у всех релевантность 1.
+    """
+    news = News.objects.all()
+    comments = Comment.objects.all()
+    for term in terms:
+        news = news.filter(Q(title__icontains=term) | Q(text__icontains=term))
+        comments = comments.filter(text__icontains=term)
+    ranked = [
+        ("news", pk, 1.0)
+        for pk in news.order_by("-date", "-id")
+        .values_list("pk", flat=True)[:limit]
+    ]
+    ranked += [
+        ("comment", pk, 1.0)
+        for pk in comments.order_by("-created", "-id")
+        .values_list("pk", flat=True)[:limit - len(ranked)]
+    ]
+    return ranked
+
+
+def search(query, limit):
+    """
+    Ищет новости и комментарии по запросу.
+
+    Возвращает не более ``limit`` результатов SearchResult, от более
+    релевантных к менее релевантным (rank от 0 до 1, больше — лучше).
+    Фрагменты текста уже экранированы, совпадения выделены тегом <mark>.
+    """
+    terms = query_terms(query)
+    if not terms:
+        return []
+    if connection.vendor == "sqlite":
+        ranked = rank(terms, limit)
+    else:
+        ranked = rank_without_index(terms, limit)
+    ids = {"news": [], "comment": []}
+    for kind, pk, _ in ranked:
+        ids[kind].append(pk)
+    found = {"news": {}, "comment": {}}
+    if ids["news"]:
+        found["news"] = News.objects.only("title", "text").in_bulk(
+            ids["news"]
+        )
+    if ids["comment"]:
+        found["comment"] = (
+            Comment.objects.select_related("news")
+            .only("text", "news__title")
+            .in_bulk(ids["comment"])
+        )
+    pattern = terms_pattern(terms)
+    results = []
+    for kind, pk, relevance in ranked:
+        # Запись могли удалить между поиском по индексу и загрузкой.
+        item = found[kind].get(pk)
+        if item is None:
+            continue
+        if kind == "news":
+            news_id, title = pk, item.title
+        else:
+            news_id, title = item.news_id, item.news.title
+        results.append(SearchResult(
+            kind, news_id, title, highlight(item.text, pattern), relevance
+        ))
+    return results
+
+
+def rebuild_index():
+    """Заново заполняет поисковые индексы новостей и комментариев."""
+    indexes = (
+        ("news_news", NEWS_INDEX, ("title", "text")),
+        ("news_comment", COMMENT_INDEX, ("text",)),
+    )
+    with connection.cursor() as cursor:
+        for table, index, columns in indexes:
+            names = ", ".join(columns)
+            values = ", ".join(
+                f"replace(replace({column}, 'ё', 'е'), 'Ё', 'Е')"
+                for column in columns
+            )
+            cursor.execute(
+                f"INSERT INTO {index}({index}) VALUES ('delete-all')"
+            )
+            cursor.execute(
+                f"INSERT INTO {index}(rowid, {names}) "
+                f"SELECT id, {values} FROM {table}"
+            )
@@ -0,0 +1,46 @@
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import invalidate_feed, invalidate_syndication
+from .models import NOT_SYNDICATED_FIELDS, Comment, News
+
+
+@receiver(post_save, sender=Comment)
+def increment_comment_count(sender, instance, created, **kwargs):
+    """
+    Новый комментарий увеличивает счётчик у новости.
+
+    Правка комментария только обновляет updated_at новости.
+    """
+    news = News.objects.filter(pk=instance.news_id)
+    if created:
+        news.update(comment_count=F("comment_count") + 1)
+    else:
+        news.touch()
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comment_count(sender, instance, **kwargs):
+    """Удалённый комментарий уменьшает счётчик у новости."""
+    News.objects.filter(pk=instance.news_id).update(
+        comment_count=Greatest(F("comment_count") - 1, 0)
+    )
+
+
+@receiver(post_save, sender=News)
+@receiver(post_delete, sender=News)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_feed_cache(sender, **kwargs):
+    """Любое изменение новостей или комментариев сбрасывает кэш ленты."""
+    invalidate_feed()
+
+
+@receiver(post_save, sender=News)
+@receiver(post_delete, sender=News)
+def invalidate_syndication_cache(sender, update_fields=None, **kwargs):
+    """Снимки фидов устаревают при изменении новостей."""
+    if update_fields is None or set(update_fields) - NOT_SYNDICATED_FIELDS:
+        invalidate_syndication()
@@ -0,0 +1,170 @@
+"""
+Отладка SQL-запросов при разработке.
+
+SqlDebugMiddleware включается настройкой SQL_DEBUG. Она записывает
+SQL-запросы каждого HTTP-запроса вместе с местом, откуда они выполнены:
+строкой шаблона, если запрос сделан при отрисовке, и строкой кода
+проекта. Запросы, отличающиеся только параметрами, группируются по
+нормализованному тексту. Если один и тот же запрос из одного места
+повторяется SQL_DEBUG_REPEAT_THRESHOLD раз и больше, это N+1: о нём
+пишется предупреждение в журнал news.sql_debug, а при SQL_DEBUG_RAISE
+выбрасывается NPlusOneError, что роняет тест. Запросы дольше
+SQL_DEBUG_SLOW_QUERY_MS миллисекунд тоже попадают в журнал.
+"""
+import logging
+import re
+import sys
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.template.base import Node
+
+from . import query_wrappers
+from .middleware import MeasuringMiddleware
+from .query_wrappers import wrap_queries
+
+logger = logging.getLogger(__name__)
+
+Query = namedtuple("Query", ("sql", "duration", "origin"))
+
+LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b|%s")
+IN_LISTS = re.compile(r"\(\?(?:\s*,\s*\?)+\)")
+SPACES = re.compile(r"\s+")
+
+PROJECT_ROOT = str(settings.BASE_DIR)
+RENDER_NODE = Node.render_annotated.__code__
+
+
+class NPlusOneError(Exception):
+    """Запрос повторился из одного места столько раз, что это N+1."""
+
+
+def normalize(sql):
+    """
+    Текст запроса без значений параметров.
+
+    Строки, числа и параметры заменяются на ``?``, списки IN —
+    на ``(...)``, чтобы запросы с разным числом ключей совпадали.
+    """
+    sql = LITERALS.sub("?", sql)
+    sql = IN_LISTS.sub("(...)", sql)
+    return SPACES.sub(" ", sql).strip()
+
+
+def is_project_file(filename):
+    return (
+        filename.startswith(PROJECT_ROOT)
+        and filename not in (__file__, query_wrappers.__file__)
+        and "site-packages" not in filename
+    )
+
+
+def query_origin():
+    """
+    Место в шаблоне и в коде проекта, откуда выполняется запрос.
+
+    Стек просматривается от запроса наружу до middleware проекта.
+    Строка шаблона берётся у ближайшего отрисовываемого узла.
+    """
+    template_line = code_line = None
+    frame = sys._getframe(1)
+    while frame is not None and frame.f_code not in MIDDLEWARE_CALLS:
+        code = frame.f_code
+        if code is RENDER_NODE and template_line is None:
+            node = frame.f_locals["self"]
+            origin = getattr(node, "origin", None)
+            token = getattr(node, "token", None)
+            if origin is not None and token is not None:
+                name = origin.template_name or origin.name
+                template_line = f"{name}:{token.lineno}"
+        elif code_line is None and is_project_file(code.co_filename):
+            path = Path(code.co_filename).relative_to(PROJECT_ROOT)
+            code_line = f"{path}:{frame.f_lineno} in {code.co_name}"
+        if template_line is not None:
+            break
+        frame = frame.f_back
+    return ", ".join(filter(None, (template_line, code_line))) or "?"
+
+
+class QueryLog:
+    """Обёртка SQL-запросов, записывающая запросы и их источники."""
+
+    def __init__(self):
+        self.queries = []
+        self.slow_query_time = settings.SQL_DEBUG_SLOW_QUERY_MS / 1e3
+
+    def __call__(self, execute, sql, params, many, context):
+        origin = query_origin()
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.queries.append(Query(normalize(sql), duration, origin))
+            if duration >= self.slow_query_time:
+                logger.warning(
+                    "Медленный запрос (%.1f мс) из %s: %s; параметры %r",
+                    duration * 1e3, origin, sql, params,
+                )
+
+    def groups(self):
+        """Повторы: {(нормализованный запрос, источник): [длительности]}."""
+        groups = {}
+        for query in self.queries:
+            groups.setdefault((query.sql, query.origin), []).append(
+                query.duration
+            )
+        return groups
+
+    def n_plus_one(self, threshold):
+        return [
+            (sql, origin, len(durations))
+            for (sql, origin), durations in self.groups().items()
+            if len(durations) >= threshold
+        ]
+
+
+class SqlDebugMiddleware(MeasuringMiddleware):
+    """Журнал медленных запросов и поиск N+1 в каждом HTTP-запросе."""
+
+    def __init__(self, get_response):
+        if not settings.SQL_DEBUG:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    @contextmanager
+    def measure(self, request):
+        log = QueryLog()
+        with wrap_queries(log):
+            yield log
+
+    def process(self, request, response, log):
+        groups = log.groups()
+        logger.debug(
+            "%s %s: %d SQL-запросов, из них разных %d, %.1f мс",
+            request.method, request.path, len(log.queries), len(groups),
+            sum(query.duration for query in log.queries) * 1e3,
+        )
+        problems = [
+            f"N+1 в {request.method} {request.path}: запрос выполнен "
+            f"{count} раз из {origin}: {sql}"
+            for sql, origin, count in log.n_plus_one(
+                settings.SQL_DEBUG_REPEAT_THRESHOLD
+            )
+        ]
+        for problem in problems:
+            logger.warning(problem)
+        if problems and settings.SQL_DEBUG_RAISE:
+            raise NPlusOneError("\n".join(problems))
+        return response
+
+
+# Дальше этих кадров query_origin() стек не просматривает.
+MIDDLEWARE_CALLS = (
+    MeasuringMiddleware.__call__.__code__,
+    MeasuringMiddleware.__acall__.__code__,
+)
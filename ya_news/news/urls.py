@@ -1,11 +1,12 @@
 from django.urls import path
 
-from news import views
+from news import api, async_views, feeds, views
 
 app_name = "news"
 
 urlpatterns = [
     path("", views.NewsList.as_view(), name="home"),
+    path("search/", views.NewsSearch.as_view(), name="search"),
     path("news/<int:pk>/", views.NewsDetailView.as_view(), name="detail"),
     path(
         "delete_comment/<int:pk>/",
@@ -13,4 +14,44 @@ urlpatterns = [
         name="delete"
     ),
     path("edit_comment/<int:pk>/", views.CommentUpdate.as_view(), name="edit"),
+    path("async/", async_views.news_list, name="async_home"),
+    path(
+        "async/news/<int:pk>/",
+        async_views.news_detail,
+        name="async_detail",
+    ),
+    path("api/news/", api.NewsListApi.as_view(), name="api_news"),
+    path(
+        "api/news/<int:pk>/",
+        api.NewsDetailApi.as_view(),
+        name="api_news_detail",
+    ),
+    path(
+        "api/news/<int:pk>/comments/",
+        api.NewsComments.as_view(),
+        name="api_comments",
+    ),
+    path(
+        "api/news/<int:pk>/comments/bulk/",
+        api.NewsCommentsBulk.as_view(),
+        name="api_comments_bulk",
+    ),
+    path(
+        "feeds/rss/",
+        feeds.SyndicationFeed.as_view(
+            feed=feeds.LatestNewsFeed, kind="rss"
+        ),
+        name="rss",
+    ),
+    path(
+        "feeds/atom/",
+        feeds.SyndicationFeed.as_view(
+            feed=feeds.LatestNewsAtomFeed, kind="atom"
+        ),
+        name="atom",
+    ),
+    path("metrics", views.Metrics.as_view(), name="metrics"),
+    path(
+        "profiling/", views.ProfilingReport.as_view(), name="profiling"
+    ),
 ]
@@ -1,40 +1,215 @@
+import hashlib
+from calendar import timegm
+
 from django.conf import settings
-from django.contrib.auth.mixins import LoginRequiredMixin
+from django.contrib.auth.mixins import (
+    LoginRequiredMixin, UserPassesTestMixin
+)
+from django.core.exceptions import PermissionDenied
+from django.http import (
+    Http404, HttpResponse, HttpResponseRedirect, JsonResponse
+)
 from django.shortcuts import get_object_or_404
+from django.template.loader import render_to_string
 from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from django.utils.safestring import mark_safe
 from django.views import generic
 
+from .cache import get_feed, set_feed
 from .forms import CommentForm
+from .metrics import registry
 from .models import Comment, News
+from .pagination import (
+    KeysetPaginationMixin, KeysetPaginator, paginate_by_cursor
+)
+from .profiling import report
+from .search import search
 
 
-class NewsList(generic.ListView):
+class NewsList(KeysetPaginationMixin, generic.ListView):
     """Список новостей."""
 
     model = News
     template_name = "news/home.html"
+    feed_template_name = "includes/news_feed.html"
+    ordering = ("-date", "-id")
 
-    def get_queryset(self):
+    def get_paginate_by(self, queryset):
         """
-        Выводим только несколько последних новостей.
+        Выводим новости страницами от новых к старым.
 
-        Их количество определяется в настройках проекта.
+        Размер страницы определяется в настройках проекта.
+        """
+        return settings.NEWS_COUNT_ON_HOME_PAGE
+
+    def get_context_data(self, **kwargs):
         """
-        return self.model.objects.prefetch_related("comment_set")[
-            : settings.NEWS_COUNT_ON_HOME_PAGE
-        ]
+        HTML ленты берётся из кэша.
 
+        Лента одинакова для всех анонимных и для всех авторизованных
+        пользователей; кэш сбрасывается сигналами при изменении новостей
+        и комментариев.
+        """
+        variant = (
+            "authenticated" if self.request.user.is_authenticated
+            else "anonymous"
+        )
+        cursor = self.request.GET.get(self.cursor_kwarg)
+        feed = get_feed(variant, cursor)
+        if feed is not None:
+            return {"view": self, "feed": mark_safe(feed)}
+        context = super().get_context_data(**kwargs)
+        feed = render_to_string(
+            self.feed_template_name, context, self.request
+        )
+        set_feed(variant, cursor, str(feed))
+        context["feed"] = feed
+        return context
 
-class NewsDetail(generic.DetailView):
+
+class NewsSearch(generic.TemplateView):
+    """Полнотекстовый поиск по новостям и комментариям."""
+
+    template_name = "news/search.html"
+
+    def get_context_data(self, **kwargs):
+        """
+        Результаты ищутся в индексе FTS5 и упорядочены по релевантности.
+
+        Количество результатов ограничено настройками проекта.
+        """
+        context = super().get_context_data(**kwargs)
+        query = self.request.GET.get("q", "").strip()
+        context["query"] = query
+        context["results"] = search(query, settings.SEARCH_RESULTS_LIMIT)
+        return context
+
+
+def comments_page(news_id, cursor, ordering=("created", "id")):
+    """Страница комментариев к новости, по умолчанию от старых к новым."""
+    paginator = KeysetPaginator(
+        ordering, settings.COMMENTS_COUNT_ON_DETAIL_PAGE
+    )
+    return paginate_by_cursor(
+        paginator,
+        Comment.objects.filter(news_id=news_id).select_related("author"),
+        cursor,
+    )
+
+
+def news_freshness(pk):
+    """
+    Свежесть страницы новости по её полю updated_at.
+
+    updated_at меняется при любом изменении новости и её комментариев,
+    поэтому ETag и Last-Modified зависят только от этой новости.
+    Возвращает пару (etag, last_modified) или None, если новости нет.
+    """
+    updated_at = (
+        News.objects.filter(pk=pk)
+        .values_list("updated_at", flat=True)
+        .first()
+    )
+    if updated_at is None:
+        return None
+    key = f"{pk}:{updated_at.isoformat()}"
+    etag = quote_etag(hashlib.md5(key.encode()).hexdigest())
+    return etag, updated_at
+
+
+def detail_freshness(request, pk):
+    """
+    Свежесть страницы новости только для анонимных пользователей.
+
+    Страница вошедшего пользователя содержит форму с CSRF-токеном,
+    который меняется между запросами, поэтому её нельзя отдавать как 304.
+    """
+    if request.user.is_authenticated:
+        return None
+    return news_freshness(pk)
+
+
+def not_modified(request, freshness):
+    """
+    Ответ 304, если у клиента свежая копия страницы, иначе None.
+
+    Last-Modified точен до секунды, а updated_at — до микросекунды:
+    после правки в ту же секунду If-Modified-Since не отличит старую
+    копию от новой. Поэтому по одной дате 304 отдаётся, только если
+    updated_at приходится ровно на начало секунды; иначе свежесть
+    подтверждает лишь ETag.
+    """
+    etag, last_modified = freshness
+    if last_modified.microsecond:
+        last_modified = None
+    else:
+        last_modified = timegm(last_modified.utctimetuple())
+    return get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+
+
+def add_freshness_headers(response, freshness):
+    etag, last_modified = freshness
+    response.headers.setdefault("ETag", etag)
+    response.headers.setdefault(
+        "Last-Modified", http_date(timegm(last_modified.utctimetuple()))
+    )
+    return response
+
+
+class NewsCommentsMixin:
+    """Добавляет в контекст страницу комментариев к новости."""
+
+    comments_ordering = ("created", "id")
+
+    def get_comments_page(self):
+        return comments_page(
+            self.object.pk,
+            self.request.GET.get("cursor"),
+            self.comments_ordering,
+        )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        page = self.get_comments_page()
+        context["comments"] = page.object_list
+        context["comments_page"] = page
+        return context
+
+
+class ConditionalGetMixin:
+    """
+    Условный GET: ответ 304 без загрузки объектов и рендеринга шаблона.
+
+    Наследники возвращают из get_freshness() пару (etag, last_modified)
+    или None, если проверить свежесть нельзя.
+    """
+
+    def get_freshness(self):
+        raise NotImplementedError
+
+    def get(self, request, *args, **kwargs):
+        freshness = self.get_freshness()
+        if freshness is None:
+            return super().get(request, *args, **kwargs)
+        response = not_modified(request, freshness)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        return add_freshness_headers(response, freshness)
+
+
+class NewsDetail(ConditionalGetMixin, NewsCommentsMixin, generic.DetailView):
     model = News
     template_name = "news/detail.html"
 
+    def get_freshness(self):
+        return detail_freshness(self.request, self.kwargs["pk"])
+
     def get_object(self, queryset=None):
-        obj = get_object_or_404(
-            self.model.objects.prefetch_related("comment_set__author"),
-            pk=self.kwargs["pk"],
-        )
-        return obj
+        return get_object_or_404(self.model, pk=self.kwargs["pk"])
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -44,7 +219,10 @@ class NewsDetail(generic.DetailView):
 
 
 class NewsComment(
-    LoginRequiredMixin, generic.detail.SingleObjectMixin, generic.FormView
+    LoginRequiredMixin,
+    NewsCommentsMixin,
+    generic.detail.SingleObjectMixin,
+    generic.FormView,
 ):
     model = News
     form_class = CommentForm
@@ -62,8 +240,10 @@ class NewsComment(
         return super().form_valid(form)
 
     def get_success_url(self):
-        post = self.get_object()
-        return reverse("news:detail", kwargs={"pk": post.pk}) + "#comments"
+        return (
+            reverse("news:detail", kwargs={"pk": self.object.pk})
+            + "#comments"
+        )
 
 
 class NewsDetailView(generic.View):
@@ -83,15 +263,22 @@ class CommentBase(LoginRequiredMixin):
     model = Comment
 
     def get_success_url(self):
-        comment = self.get_object()
+        """Адрес новости строится по news_id, без загрузки новости."""
         return (
-            reverse("news:detail", kwargs={"pk": comment.news.pk})
+            reverse("news:detail", kwargs={"pk": self.object.news_id})
             + "#comments"
         )
 
     def get_queryset(self):
-        """Пользователь может работать только со своими комментариями."""
-        return self.model.objects.filter(author=self.request.user)
+        """
+        Пользователь может работать только со своими комментариями.
+
+        Заголовок новости нужен шаблонам, поэтому новость загружается
+        тем же запросом.
+        """
+        return self.model.objects.filter(
+            author=self.request.user
+        ).select_related("news")
 
 
 class CommentUpdate(CommentBase, generic.UpdateView):
@@ -105,3 +292,52 @@ class CommentDelete(CommentBase, generic.DeleteView):
     """Удаление комментария."""
 
     template_name = "news/delete.html"
+
+    def delete(self, request, *args, **kwargs):
+        """Проверка владельца входит в выборку удаляемого комментария."""
+        self.object = self.model.objects.delete_by_author(
+            self.kwargs["pk"], request.user.pk
+        )
+        if self.object is None:
+            raise Http404("Комментарий не найден.")
+        return HttpResponseRedirect(self.get_success_url())
+
+
+class ProfilingReport(UserPassesTestMixin, generic.View):
+    """Сводка профилирования запросов; доступна только персоналу."""
+
+    def test_func(self):
+        return self.request.user.is_staff
+
+    def get(self, request, *args, **kwargs):
+        if not settings.REQUEST_PROFILING:
+            raise Http404("Профилирование запросов выключено.")
+        return JsonResponse(
+            report.summary(), json_dumps_params={"ensure_ascii": False}
+        )
+
+    def delete(self, request, *args, **kwargs):
+        """Сбрасывает накопленную сводку."""
+        report.clear()
+        return JsonResponse({})
+
+
+class Metrics(generic.View):
+    """
+    Метрики проекта для сборщика Prometheus.
+
+    Доступны только с адресов из METRICS_ALLOWED_IPS.
+    """
+
+    content_type = "text/plain; version=0.0.4; charset=utf-8"
+
+    def get(self, request, *args, **kwargs):
+        if not settings.METRICS_ENABLED:
+            raise Http404("Метрики выключены.")
+        if request.META.get("REMOTE_ADDR") not in (
+            settings.METRICS_ALLOWED_IPS
+        ):
+            raise PermissionDenied("Метрики доступны только сборщику.")
+        return HttpResponse(
+            registry.exposition(), content_type=self.content_type
+        )
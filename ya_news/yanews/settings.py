@@ -21,6 +21,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "news.metrics.MetricsMiddleware",
+    "news.profiling.ProfilingMiddleware",
+    "news.sql_debug.SqlDebugMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -58,6 +61,18 @@ DATABASES = {
     }
 }
 
+# Подойдёт и django.core.cache.backends.filebased.FileBasedCache:
+# кэш ленты не требует внешних сервисов. LocMemCache свой у каждого
+# процесса, вместе с поколениями кэша, которые сбрасываются при
+# изменении новостей. Поэтому он годится только для сервера в одном
+# процессе; при нескольких воркерах нужен общий кэш (файловый,
+# Memcached, Redis), иначе воркеры отдают устаревшие страницы.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
 
 AUTH_PASSWORD_VALIDATORS = []
 
@@ -80,3 +95,51 @@ LOGIN_URL = reverse_lazy("users:login")
 LOGIN_REDIRECT_URL = reverse_lazy("news:home")
 
 NEWS_COUNT_ON_HOME_PAGE = 10
+
+COMMENTS_COUNT_ON_DETAIL_PAGE = 50
+
+NEWS_FEED_CACHE_TIMEOUT = 60 * 60
+
+SEARCH_RESULTS_LIMIT = 20
+
+# Новостей в фидах RSS и Atom и сколько секунд клиентам можно не
+# запрашивать фид повторно.
+SYNDICATION_FEED_ITEMS = 20
+SYNDICATION_FEED_MAX_AGE = 60 * 5
+
+# Сколько комментариев можно загрузить одним запросом к
+# news:api_comments_bulk.
+API_BULK_COMMENTS_LIMIT = 1000
+
+# Ошибка CSRF в запросе к API отдаётся в JSON.
+CSRF_FAILURE_VIEW = "news.api.csrf_failure"
+
+# Профилирование запросов: заголовок Server-Timing и сводка на странице
+# news:profiling. Пик памяти измеряется через tracemalloc, который
+# замедляет запросы в несколько раз, поэтому включается отдельно.
+REQUEST_PROFILING = False
+REQUEST_PROFILING_MEMORY = False
+
+# Метрики в формате Prometheus на странице /metrics. Страница отдаётся
+# только с адресов METRICS_ALLOWED_IPS: сборщик метрик ходит к ней
+# напрямую, минуя прокси, и не входит на сайт.
+METRICS_ENABLED = False
+METRICS_ALLOWED_IPS = ("127.0.0.1", "::1")
+
+# Потоки, в которых асинхронные представления (news:async_home,
+# news:async_detail) обращаются к базе и отрисовывают шаблоны; 0 —
+# общий поток sync_to_async, как у синхронных представлений.
+ASYNC_VIEWS_MAX_WORKERS = 4
+
+# Журнал медленных SQL-запросов и поиск N+1 при разработке.
+SQL_DEBUG = DEBUG
+SQL_DEBUG_SLOW_QUERY_MS = 100
+# Сколько одинаковых запросов из одного места считаются N+1.
+SQL_DEBUG_REPEAT_THRESHOLD = 5
+# Выбрасывать NPlusOneError, а не только писать в журнал.
+SQL_DEBUG_RAISE = False
+
+# Файл со списком запрещённых в комментариях слов.
+BAD_WORDS_FILE = BASE_DIR / "news" / "bad_words.txt"
+# Искать запрещённые слова только целиком, а не как часть других слов.
+BAD_WORDS_WHOLE_WORDS = False
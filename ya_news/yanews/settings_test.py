@@ -0,0 +1,29 @@
+"""
+Настройки для запуска тестов.
+
+Поведение проекта то же, что с основными настройками, но без дорогих
+в тестах вещей: стойкого хеширования паролей, строк сессий в базе
+и файла тестовой базы данных.
+"""
+from .settings import *  # noqa: F401, F403
+
+# Стойкость хеша паролям тестовых пользователей не нужна, а PBKDF2
+# тратит на каждый пароль десятки миллисекунд.
+PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+
+# Сессия хранится в подписанной cookie: вход пользователя не пишет
+# строку в базу, а запрос авторизованного клиента её не читает.
+SESSION_ENGINE = "django.contrib.sessions.backends.signed_cookies"
+
+DATABASES["default"]["TEST"] = {"NAME": ":memory:"}  # noqa: F405
+
+# Новый N+1 в любой странице роняет тест, который её запрашивает.
+SQL_DEBUG = True
+SQL_DEBUG_RAISE = True
+
+# Потоки пула асинхронных представлений открывают свои соединения и не
+# видят данных, созданных в транзакции теста.
+ASYNC_VIEWS_MAX_WORKERS = 0
+
+# Тесты проверяют метрики, которые в основных настройках выключены.
+METRICS_ENABLED = True
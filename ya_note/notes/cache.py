@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.dispatch import Signal
+
+# Отправляется при каждом чтении закэшированного счётчика: cache — имя
+# кэша, hit — нашлось ли в нём значение.
+cache_lookup = Signal()
+
+
+def note_count_key(author_id):
+    return f"notes:count:{author_id}"
+
+
+def get_note_count(queryset, author_id):
+    """Количество заметок автора; COUNT(*) выполняется только при промахе."""
+    key = note_count_key(author_id)
+    count = cache.get(key)
+    cache_lookup.send(
+        sender=get_note_count, cache="note_count", hit=count is not None
+    )
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, timeout=settings.NOTE_COUNT_CACHE_TIMEOUT)
+    return count
+
+
+def invalidate_note_count(*author_ids):
+    cache.delete_many([note_count_key(pk) for pk in author_ids])
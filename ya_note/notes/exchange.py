@@ -0,0 +1,65 @@
+"""Потоковая запись и чтение заметок в форматах JSON Lines и CSV."""
+import csv
+import json
+
+# Поля заметки при обмене; автор передаётся именем пользователя.
+FIELDS = ("title", "text", "slug", "author")
+QUERY_FIELDS = ("title", "text", "slug", "author__username")
+FORMATS = ("jsonl", "csv")
+
+
+class Echo:
+    """Файлоподобный объект, который возвращает записанную строку."""
+
+    def write(self, value):
+        return value
+
+
+def export_rows(queryset, chunk_size):
+    """Заметки в виде словарей, читаются с сервера пачками."""
+    for values in queryset.values_list(*QUERY_FIELDS).iterator(
+        chunk_size=chunk_size
+    ):
+        yield dict(zip(FIELDS, values))
+
+
+def iter_jsonl(rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + "\n"
+
+
+def iter_csv(rows):
+    writer = csv.DictWriter(Echo(), fieldnames=FIELDS)
+    yield writer.writeheader()
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def read_jsonl(file):
+    for number, line in enumerate(file, 1):
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as error:
+                raise ValueError(f"Строка {number}: {error}")
+
+
+def read_csv(file):
+    yield from csv.DictReader(file)
+
+
+WRITERS = {"jsonl": iter_jsonl, "csv": iter_csv}
+READERS = {"jsonl": read_jsonl, "csv": read_csv}
+
+
+def guess_format(path, default="jsonl"):
+    suffix = str(path).rsplit(".", 1)[-1].lower()
+    return suffix if suffix in FORMATS else default
+
+
+def format_rate(action, count, elapsed):
+    rate = count / elapsed if elapsed else 0
+    return (
+        f"{action} заметок: {count} за {elapsed:.2f} с "
+        f"({rate:.0f} в секунду)"
+    )
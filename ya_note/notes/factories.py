@@ -0,0 +1,72 @@
+"""
+Массовое создание заметок и пользователей.
+
+Строки вставляются пачками общим помощником bulk_insert из модуля
+bulk_factories, первичные ключи назначает база, а slug строится по
+ключу без подбора по заголовкам. Тексты и распределение заметок
+по авторам определяются параметром seed.
+"""
+import random
+import uuid
+
+from bulk_factories import (  # noqa: F401
+    BATCH_SIZE, bulk_insert, create_users, sentences
+)
+from django.db import transaction
+from django.db.models import CharField, F, Value
+from django.db.models.functions import Cast, Concat
+
+from .models import Note
+
+WORDS = (
+    "купить молоко хлеб позвонить маме встреча работа проект отчёт "
+    "завтра вечером утром список дел идея книга фильм прочитать "
+    "посмотреть записаться врач спорт зал бег план неделя отпуск билеты "
+    "подарок день рождения оплатить счёт квартира ремонт машина сервис"
+).split()
+
+
+def create_notes(
+    count,
+    author_ids,
+    seed=0,
+    texts=None,
+    slug_prefix="note",
+    batch_size=BATCH_SIZE,
+):
+    """
+    Создаёт заметки, по очереди распределяя их между авторами.
+
+    Slug заметки — ``slug_prefix`` и её первичный ключ, так что он
+    уникален без проверки по базе. ``texts`` — итератор текстов.
+    """
+    rng = random.Random(seed)
+    author_ids = list(author_ids)
+    titles = sentences(rng, 1, 5, WORDS)
+    texts = texts or sentences(rng, 5, 60, WORDS)
+    # Ключи известны только после вставки, поэтому заметки вставляются
+    # с временными уникальными slug, а итоговые задаются следующим
+    # запросом.
+    marker = uuid.uuid4().hex
+    with transaction.atomic(savepoint=False):
+        ids = bulk_insert(
+            Note,
+            (
+                Note(
+                    title=next(titles)[:100],
+                    text=next(texts),
+                    slug=f"{marker}-{i}",
+                    author_id=author_ids[i % len(author_ids)],
+                )
+                for i in range(count)
+            ),
+            batch_size,
+        )
+        Note.objects.filter(slug__startswith=f"{marker}-").update(
+            slug=Concat(
+                Value(f"{slug_prefix}-"),
+                Cast(F("pk"), CharField()),
+                output_field=CharField(),
+            )
+        )
+    return ids
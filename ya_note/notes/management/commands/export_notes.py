@@ -0,0 +1,49 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from notes.exchange import (
+    FORMATS, WRITERS, export_rows, format_rate, guess_format
+)
+from notes.models import Note
+
+
+class Command(BaseCommand):
+    help = "Выгружает заметки в JSON Lines или CSV, не загружая их в память."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "output",
+            nargs="?",
+            default="-",
+            help="Файл для выгрузки; по умолчанию — стандартный вывод.",
+        )
+        parser.add_argument("--format", choices=FORMATS)
+        parser.add_argument(
+            "--author",
+            action="append",
+            help="Выгрузить заметки только этого пользователя.",
+        )
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        output = options["output"]
+        file_format = options["format"] or guess_format(output)
+        notes = Note.objects.order_by("pk")
+        if options["author"]:
+            notes = notes.filter(author__username__in=options["author"])
+        self.exported = 0
+        started = time.perf_counter()
+        rows = self.count(export_rows(notes, options["chunk_size"]))
+        if output == "-":
+            self.stdout.writelines(WRITERS[file_format](rows))
+        else:
+            with open(output, "w", encoding="utf-8", newline="") as file:
+                file.writelines(WRITERS[file_format](rows))
+        elapsed = time.perf_counter() - started
+        self.stderr.write(format_rate("Выгружено", self.exported, elapsed))
+
+    def count(self, rows):
+        for row in rows:
+            self.exported += 1
+            yield row
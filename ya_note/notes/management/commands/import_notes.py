@@ -0,0 +1,95 @@
+import sys
+import time
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
+
+from notes.exchange import FORMATS, READERS, format_rate, guess_format
+from notes.models import Note
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Загружает заметки из JSON Lines или CSV пачками через bulk_create; "
+        "пустые slug подбираются так же, как при сохранении заметки. "
+        "Загрузка идёт в одной транзакции: при ошибке не сохраняется "
+        "ни одна заметка."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "input",
+            nargs="?",
+            default="-",
+            help="Файл с заметками; по умолчанию — стандартный ввод.",
+        )
+        parser.add_argument("--format", choices=FORMATS)
+        parser.add_argument(
+            "--author",
+            help="Автор для строк, в которых он не указан.",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        path = options["input"]
+        file_format = options["format"] or guess_format(path)
+        self.authors = {}
+        self.default_author = options["author"]
+        started = time.perf_counter()
+        imported = 0
+        file = (
+            sys.stdin if path == "-"
+            else open(path, encoding="utf-8", newline="")
+        )
+        try:
+            notes = map(self.build_note, READERS[file_format](file))
+            with transaction.atomic():
+                while True:
+                    batch = list(islice(notes, options["batch_size"]))
+                    if not batch:
+                        break
+                    Note.objects.bulk_create(batch)
+                    imported += len(batch)
+                    if options["verbosity"] > 1:
+                        elapsed = time.perf_counter() - started
+                        self.stderr.write(
+                            format_rate("Загружено", imported, elapsed)
+                        )
+        except (ValueError, KeyError, TypeError) as error:
+            raise CommandError(f"Некорректные данные: {error}")
+        except IntegrityError as error:
+            raise CommandError(f"Заметка не сохранена: {error}")
+        finally:
+            if file is not sys.stdin:
+                file.close()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(format_rate("Загружено", imported, elapsed))
+        )
+
+    def build_note(self, row):
+        if not isinstance(row, dict):
+            raise ValueError(f"ожидается объект, получено {row!r}")
+        return Note(
+            title=row["title"],
+            text=row["text"],
+            slug=row.get("slug") or "",
+            author_id=self.get_author_id(
+                row.get("author") or self.default_author
+            ),
+        )
+
+    def get_author_id(self, username):
+        """Идентификатор автора; по запросу на каждого нового автора."""
+        if username not in self.authors:
+            try:
+                self.authors[username] = User.objects.values_list(
+                    "pk", flat=True
+                ).get(username=username)
+            except User.DoesNotExist:
+                raise CommandError(f"Пользователь {username!r} не найден.")
+        return self.authors[username]
@@ -0,0 +1,271 @@
+"""
+Метрики проекта в текстовом формате Prometheus.
+
+Счётчики и гистограммы обновляются из MetricsMiddleware, сигналов
+моделей и сигнала cache_lookup, а страница notes:metrics (/metrics)
+отдаёт их текущие значения. Сторонние библиотеки не нужны.
+
+Каждый поток пишет в собственный словарь значений, поэтому обновление
+метрики не берёт блокировку. Блокировка нужна, только когда поток
+впервые обновляет метрики и когда страница /metrics складывает
+значения всех потоков. Значения завершившихся потоков при этом
+переносятся в общий словарь, и число словарей не растёт, даже если
+сервер создаёт поток на каждый запрос.
+"""
+import bisect
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import cache_lookup
+
+# Границы корзин гистограммы времени ответа, в секундах.
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0
+)
+
+
+def merge(totals, shard):
+    """Прибавляет значения потока к ``totals``."""
+    for key, value in list(shard.items()):
+        if isinstance(value, list):
+            if key in totals:
+                totals[key] = [
+                    total + part for total, part in zip(totals[key], value)
+                ]
+            else:
+                totals[key] = list(value)
+        else:
+            totals[key] = totals.get(key, 0) + value
+
+
+def escape(value):
+    return (
+        str(value)
+        .replace("\\", r"\\")
+        .replace("\n", r"\n")
+        .replace('"', r"\"")
+    )
+
+
+def format_labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(
+        f'{name}="{escape(value)}"' for name, value in pairs
+    ) + "}"
+
+
+class Registry:
+    """Набор метрик со значениями, разложенными по потокам."""
+
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.shards = []
+        self.retired = {}
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def shard(self):
+        """Словарь значений текущего потока."""
+        try:
+            return self.local.shard
+        except AttributeError:
+            shard = self.local.shard = {}
+            with self.lock:
+                self.shards.append((threading.current_thread(), shard))
+            return shard
+
+    def collect(self):
+        """Значения метрик, сложенные по всем потокам."""
+        with self.lock:
+            alive = []
+            for thread, shard in self.shards:
+                if thread.is_alive():
+                    alive.append((thread, shard))
+                else:
+                    merge(self.retired, shard)
+            self.shards = alive
+            totals = {}
+            merge(totals, self.retired)
+            for _, shard in alive:
+                merge(totals, shard)
+        return totals
+
+    def exposition(self):
+        """Все метрики в текстовом формате Prometheus."""
+        values = {}
+        for (name, labels), value in self.collect().items():
+            values.setdefault(name, []).append((labels, value))
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for labels, value in sorted(values.get(metric.name, ())):
+                lines.extend(metric.samples(labels, value))
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        with self.lock:
+            for _, shard in self.shards:
+                shard.clear()
+            self.retired.clear()
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, registry, name, documentation, labelnames=()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        registry.register(self)
+
+    def inc(self, *labels, amount=1):
+        shard = self.registry.shard()
+        key = (self.name, labels)
+        shard[key] = shard.get(key, 0) + amount
+
+    def samples(self, labels, value):
+        yield f"{self.name}{format_labels(self.labelnames, labels)} {value}"
+
+
+class Histogram:
+    """
+    Гистограмма с фиксированными корзинами.
+
+    Значение в словаре потока — список: число наблюдений в каждой
+    корзине (последняя — сверх всех границ) и их сумма.
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self, registry, name, documentation, labelnames=(), buckets=()
+    ):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        registry.register(self)
+
+    def observe(self, value, *labels):
+        shard = self.registry.shard()
+        key = (self.name, labels)
+        counts = shard.get(key)
+        if counts is None:
+            counts = shard[key] = [0] * (len(self.buckets) + 2)
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def samples(self, labels, value):
+        *counts, total = value
+        cumulative = 0
+        bounds = [*map(str, self.buckets), "+Inf"]
+        for bound, count in zip(bounds, counts):
+            cumulative += count
+            label_string = format_labels(
+                self.labelnames, labels, [("le", bound)]
+            )
+            yield f"{self.name}_bucket{label_string} {cumulative}"
+        label_string = format_labels(self.labelnames, labels)
+        yield f"{self.name}_sum{label_string} {total}"
+        yield f"{self.name}_count{label_string} {cumulative}"
+
+
+registry = Registry()
+
+REQUEST_DURATION = Histogram(
+    registry,
+    "http_request_duration_seconds",
+    "Время обработки запроса по имени маршрута.",
+    ("view",),
+    LATENCY_BUCKETS,
+)
+RESPONSES = Counter(
+    registry,
+    "http_responses_total",
+    "Ответы по имени маршрута и коду ответа.",
+    ("view", "status"),
+)
+DB_QUERIES = Counter(
+    registry,
+    "db_queries_total",
+    "SQL-запросы, выполненные при обработке запросов.",
+    ("view",),
+)
+CACHE_LOOKUPS = Counter(
+    registry,
+    "cache_lookups_total",
+    "Обращения к кэшу: попадания (hit) и промахи (miss).",
+    ("cache", "result"),
+)
+MODEL_CHANGES = Counter(
+    registry,
+    "model_changes_total",
+    "Созданные, изменённые и удалённые объекты моделей.",
+    ("model", "action"),
+)
+
+
+class QueryCounter:
+    """Обёртка execute_wrapper, считающая SQL-запросы."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class MetricsMiddleware:
+    """Время ответа, коды ответов и SQL-запросы по именам маршрутов."""
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = QueryCounter()
+        started = time.perf_counter()
+        with connection.execute_wrapper(queries):
+            response = self.get_response(request)
+        duration = time.perf_counter() - started
+        match = request.resolver_match
+        view = match.view_name if match else "unresolved"
+        REQUEST_DURATION.observe(duration, view)
+        RESPONSES.inc(view, str(response.status_code))
+        DB_QUERIES.inc(view, amount=queries.count)
+        return response
+
+
+@receiver(cache_lookup)
+def count_cache_lookup(sender, cache, hit, **kwargs):
+    CACHE_LOOKUPS.inc(cache, "hit" if hit else "miss")
+
+
+@receiver(post_save)
+def count_saved_object(sender, created, raw=False, **kwargs):
+    if not raw:
+        MODEL_CHANGES.inc(
+            sender._meta.label_lower, "created" if created else "updated"
+        )
+
+
+@receiver(post_delete)
+def count_deleted_object(sender, **kwargs):
+    MODEL_CHANGES.inc(sender._meta.label_lower, "deleted")
@@ -0,0 +1,19 @@
+# Generated by Django 3.2.15 on 2026-10-18 18:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notes", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="note",
+            index=models.Index(
+                fields=["author", "id"], name="note_author_id_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,77 @@
+from django.db import migrations
+
+# Бесконтентный индекс: тексты заметок не дублируются, а столбец author
+# хранит токен владельца, по которому поиск сужается ещё внутри индекса.
+INDEX = "notes_note_fts"
+
+
+def values(row):
+    return (
+        f"{row}.id, "
+        f"replace(replace({row}.title, 'ё', 'е'), 'Ё', 'Е'), "
+        f"replace(replace({row}.text, 'ё', 'е'), 'Ё', 'Е'), "
+        f"'author' || {row}.author_id"
+    )
+
+
+INSERT = f"INSERT INTO {INDEX}(rowid, title, text, author) VALUES ({{}});"
+DELETE = (
+    f"INSERT INTO {INDEX}({INDEX}, rowid, title, text, author) "
+    f"VALUES ('delete', {{}});"
+)
+
+CREATE_STATEMENTS = (
+    f"CREATE VIRTUAL TABLE {INDEX} USING fts5("
+    "title, text, author, content='', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3 4');",
+    f"CREATE TRIGGER {INDEX}_ai AFTER INSERT ON notes_note "
+    f"BEGIN {INSERT.format(values('new'))} END;",
+    f"CREATE TRIGGER {INDEX}_ad AFTER DELETE ON notes_note "
+    f"BEGIN {DELETE.format(values('old'))} END;",
+    f"CREATE TRIGGER {INDEX}_au AFTER UPDATE OF title, text, author_id "
+    f"ON notes_note BEGIN {DELETE.format(values('old'))} "
+    f"{INSERT.format(values('new'))} END;",
+    f"INSERT INTO {INDEX}(rowid, title, text, author) "
+    f"SELECT {values('notes_note')} FROM notes_note;",
+)
+
+DROP_STATEMENTS = (
+    f"DROP TRIGGER IF EXISTS {INDEX}_ai;",
+    f"DROP TRIGGER IF EXISTS {INDEX}_ad;",
+    f"DROP TRIGGER IF EXISTS {INDEX}_au;",
+    f"DROP TABLE IF EXISTS {INDEX};",
+)
+
+
+def has_fts5(connection):
+    if connection.vendor != "sqlite":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA compile_options")
+        return ("ENABLE_FTS5",) in cursor.fetchall()
+
+
+def create_search_index(apps, schema_editor):
+    # Без FTS5 индекса нет, и notes.search ищет через icontains.
+    if not has_fts5(schema_editor.connection):
+        return
+    for statement in CREATE_STATEMENTS:
+        schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for statement in DROP_STATEMENTS:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notes", "0002_note_author_id_idx"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
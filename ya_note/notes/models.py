@@ -1,7 +1,42 @@
 from django.conf import settings
-from django.db import models
+from django.db import IntegrityError, models, transaction
 
-from pytils.translit import slugify
+from .cache import invalidate_note_count
+from .slugs import allocate_slugs
+
+# Сколько раз заново подбирать slug, если его успел занять
+# параллельный запрос.
+SLUG_ATTEMPTS = 5
+
+
+class NoteQuerySet(models.QuerySet):
+
+    def bulk_create(self, objs, *args, **kwargs):
+        """
+        Массовое создание с подбором свободных slug для всей пачки.
+
+        Пачка вставляется заново, только если подобранный slug успел
+        занять параллельный запрос; занятый явно заданный slug сразу
+        приводит к IntegrityError.
+        """
+        objs = list(objs)
+        generated = [note for note in objs if not note.slug]
+        for attempt in range(1, SLUG_ATTEMPTS + 1):
+            allocate_slugs(generated, self)
+            try:
+                with transaction.atomic(using=self.db):
+                    objs = super().bulk_create(objs, *args, **kwargs)
+                break
+            except IntegrityError:
+                slug_taken = generated and self.filter(
+                    slug__in=[note.slug for note in generated]
+                ).exists()
+                if not slug_taken or attempt == SLUG_ATTEMPTS:
+                    raise
+                for note in generated:
+                    note.slug = ""
+        invalidate_note_count(*{note.author_id for note in objs})
+        return objs
 
 
 class Note(models.Model):
@@ -27,11 +62,35 @@ class Note(models.Model):
         on_delete=models.CASCADE,
     )
 
+    objects = NoteQuerySet.as_manager()
+
+    class Meta:
+        indexes = (
+            models.Index(fields=("author", "id"), name="note_author_id_idx"),
+        )
+
     def __str__(self):
         return self.title
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            max_slug_length = self._meta.get_field("slug").max_length
-            self.slug = slugify(self.title)[:max_slug_length]
-        super().save(*args, **kwargs)
+        """
+        Сохранение с подбором свободного slug по заголовку.
+
+        Если параллельный запрос успел занять тот же slug, вставка
+        откатывается до точки сохранения и slug подбирается заново.
+        """
+        if self.slug:
+            return super().save(*args, **kwargs)
+        manager = type(self)._default_manager
+        for attempt in range(1, SLUG_ATTEMPTS + 1):
+            allocate_slugs([self], manager.all())
+            try:
+                with transaction.atomic(using=kwargs.get("using")):
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                slug_taken = (
+                    manager.filter(slug=self.slug).exclude(pk=self.pk).exists()
+                )
+                if not slug_taken or attempt == SLUG_ATTEMPTS:
+                    raise
+                self.slug = ""
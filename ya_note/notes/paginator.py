@@ -0,0 +1,16 @@
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+
+from .cache import get_note_count
+
+
+class AuthorNotesPaginator(Paginator):
+    """Пагинатор, который берёт количество заметок автора из кэша."""
+
+    def __init__(self, object_list, per_page, *, author_id, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.author_id = author_id
+
+    @cached_property
+    def count(self):
+        return get_note_count(self.object_list, self.author_id)
@@ -0,0 +1,105 @@
+import functools
+import re
+import sqlite3
+import unicodedata
+
+from django.db import connection
+from django.db.models import Q
+
+from .models import Note
+
+INDEX = "notes_note_fts"
+
+# Веса столбцов title, text и author для bm25(): совпадение в заголовке
+# важнее, а токен владельца на релевантность не влияет.
+RANK = "bm25(10.0, 1.0, 0.0)"
+
+WORD_RE = re.compile(r"\w+")
+
+SEARCH_SQL = f"""
+    SELECT rowid FROM {INDEX}
+    WHERE {INDEX} MATCH %s AND rank MATCH %s
+    ORDER BY rank
+    LIMIT %s
+"""
+
+
+def normalize(text):
+    """Приводит текст к виду, в котором он лежит в индексе."""
+    return unicodedata.normalize("NFKC", text).casefold().replace("ё", "е")
+
+
+def author_token(author_id):
+    """Токен владельца заметки в столбце author поискового индекса."""
+    return f"author{author_id}"
+
+
+def build_match(author_id, query):
+    """
+    Выражение MATCH для FTS5: заметки автора со всеми словами запроса.
+
+    Слова ищутся как префиксы только в заголовке и тексте и заключаются
+    в кавычки, поэтому синтаксис FTS5 в запросе не интерпретируется.
+    Возвращает пустую строку, если искать нечего.
+    """
+    words = dict.fromkeys(WORD_RE.findall(normalize(query)))
+    if not words:
+        return ""
+    terms = " ".join(f'"{word}"*' for word in words)
+    owner = f'author : "{author_token(author_id)}"'
+    return f"{owner} AND {{title text}} : ({terms})"
+
+
+@functools.lru_cache(maxsize=None)
+def sqlite_has_fts5():
+    """
+    Собрана ли библиотека SQLite с модулем FTS5.
+
+    Без него миграция не создаёт индекс. Проверка идёт через отдельное
+    соединение в памяти и выполняется один раз за процесс.
+    """
+    with sqlite3.connect(":memory:") as memory:
+        options = memory.execute("PRAGMA compile_options").fetchall()
+    return ("ENABLE_FTS5",) in options
+
+
+def search_with_index(author_id, query, limit):
+    """
+    Поиск по индексу FTS5 (только SQLite).
+
+    Условие на автора проверяется внутри индекса, поэтому время поиска
+    не зависит от количества заметок других пользователей.
+    """
+    match = build_match(author_id, query)
+    if not match:
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(SEARCH_SQL, [match, RANK, limit])
+        return [pk for pk, in cursor.fetchall()]
+
+
+def search_without_index(author_id, query, limit):
+    """
+    Поиск без FTS5: icontains по каждому слову запроса.
+
+    Такой поиск не ранжирует совпадения и не приравнивает «ё» к «е»:
+    сначала идут новые заметки.
+    """
+    words = dict.fromkeys(
+        WORD_RE.findall(unicodedata.normalize("NFKC", query))
+    )
+    if not words:
+        return []
+    notes = Note.objects.filter(author_id=author_id)
+    for word in words:
+        notes = notes.filter(
+            Q(title__icontains=word) | Q(text__icontains=word)
+        )
+    return list(notes.order_by("-id").values_list("pk", flat=True)[:limit])
+
+
+def search_note_ids(author_id, query, limit):
+    """Идентификаторы заметок автора по запросу, от более релевантных."""
+    if connection.vendor == "sqlite" and sqlite_has_fts5():
+        return search_with_index(author_id, query, limit)
+    return search_without_index(author_id, query, limit)
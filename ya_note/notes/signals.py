@@ -0,0 +1,23 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import invalidate_note_count
+from .models import Note
+
+
+@receiver(post_save, sender=Note)
+def invalidate_count_on_create(sender, instance, created, **kwargs):
+    """Новая заметка меняет число заметок автора."""
+    if created:
+        invalidate_note_count(instance.author_id)
+
+
+@receiver(post_delete, sender=Note)
+def invalidate_count_on_delete(sender, instance, **kwargs):
+    """
+    Удалённая заметка меняет число заметок автора.
+
+    Сигнал отправляется и при QuerySet.delete(), и при каскадном
+    удалении вместе с пользователем.
+    """
+    invalidate_note_count(instance.author_id)
@@ -0,0 +1,63 @@
+from functools import reduce
+from operator import or_
+
+from django.db.models import Q
+from pytils.translit import slugify
+
+# Сколько символов основы может занять суффикс вида «-12345».
+SUFFIX_RESERVE = 10
+# Сколько основ проверяется одним запросом.
+PREFIX_BATCH_SIZE = 200
+# Основа для заголовков, из которых не получилось ни одного символа slug.
+DEFAULT_BASE = "zametka"
+
+
+def base_slug(title, max_length):
+    return slugify(title)[:max_length] or DEFAULT_BASE
+
+
+def suffixed_slug(base, number, max_length):
+    """Вариант slug с номером: zametka, zametka-2, zametka-3, ..."""
+    if number == 1:
+        return base
+    suffix = f"-{number}"
+    return base[: max_length - len(suffix)] + suffix
+
+
+def taken_slugs(queryset, bases, max_length):
+    """Занятые slug, которые могут совпасть с вариантами этих основ."""
+    prefixes = {base[: max_length - SUFFIX_RESERVE] for base in bases}
+    prefixes = sorted(prefix for prefix in prefixes if prefix)
+    taken = set()
+    for start in range(0, len(prefixes), PREFIX_BATCH_SIZE):
+        batch = prefixes[start:start + PREFIX_BATCH_SIZE]
+        condition = reduce(or_, (Q(slug__startswith=p) for p in batch))
+        taken.update(
+            queryset.filter(condition).values_list("slug", flat=True)
+        )
+    return taken
+
+
+def allocate_slugs(notes, queryset):
+    """
+    Проставляет свободные slug заметкам, у которых slug не задан.
+
+    Занятые slug выбираются одним запросом на пачку основ, поэтому
+    массовый импорт не делает по запросу на заметку. Совпадения внутри
+    самой пачки тоже разрешаются суффиксами.
+    """
+    notes = [note for note in notes if not note.slug]
+    if not notes:
+        return
+    max_length = queryset.model._meta.get_field("slug").max_length
+    bases = [base_slug(note.title, max_length) for note in notes]
+    own_ids = [note.pk for note in notes if note.pk]
+    if own_ids:
+        queryset = queryset.exclude(pk__in=own_ids)
+    taken = taken_slugs(queryset, bases, max_length)
+    for note, base in zip(notes, bases):
+        number = 1
+        while suffixed_slug(base, number, max_length) in taken:
+            number += 1
+        note.slug = suffixed_slug(base, number, max_length)
+        taken.add(note.slug)
@@ -1,7 +1,10 @@
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
 from django.urls import reverse
+from notes.factories import create_users
 from notes.models import Note
+from .query_budget import QueryBudget
 
 User = get_user_model()
 
@@ -10,9 +13,11 @@ class BaseTestCase(TestCase):
 
     @classmethod
     def setUpTestData(cls):
-        cls.author = User.objects.create(username="Автор")
-        cls.another_user = User.objects.create(username="Другой пользователь")
-        cls.reader = User.objects.create(username="Пользователь_1")
+        cls.author, cls.another_user, cls.reader = User.objects.filter(
+            pk__in=create_users(
+                ("Автор", "Другой пользователь", "Пользователь_1")
+            )
+        ).order_by("pk")
         cls.note = Note.objects.create(
             title="Заголовок",
             text="Текст",
@@ -24,6 +29,10 @@ class BaseTestCase(TestCase):
         cls.edit_url = reverse("notes:edit", args=(cls.note.slug,))
         cls.delete_url = reverse("notes:delete", args=(cls.note.slug,))
         cls.detail_url = reverse("notes:detail", args=(cls.note.slug,))
+        cls.export_url = reverse("notes:export")
+        cls.search_url = reverse("notes:search")
+        cls.profiling_url = reverse("notes:profiling")
+        cls.metrics_url = reverse("notes:metrics")
         cls.home_url = reverse("notes:home")
         cls.login_url = reverse("users:login")
         cls.logout_url = reverse("users:logout")
@@ -45,3 +54,12 @@ class BaseTestCase(TestCase):
             "text": "Новый текст",
             "slug": "new_slug",
         }
+
+    def setUp(self):
+        # Кэш не переживает тест: данные в БД откатываются после каждого.
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def query_budget(self, url_name, budget=None):
+        """Проверка бюджета SQL-запросов страницы по имени её маршрута."""
+        return QueryBudget(url_name, budget)
@@ -0,0 +1,63 @@
+from contextlib import ContextDecorator
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+# Допустимое число SQL-запросов на один запрос к странице, включая
+# загрузку сессии и пользователя для авторизованного клиента.
+QUERY_BUDGETS = {
+    "notes:home": 2,
+    "notes:add": 5,
+    "notes:edit": 6,
+    "notes:detail": 4,
+    "notes:delete": 4,
+    "notes:list": 4,
+    "notes:success": 2,
+    "notes:export": 3,
+    "notes:search": 4,
+    "notes:profiling": 2,
+    "notes:metrics": 0,
+}
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Страница выполнила больше SQL-запросов, чем ей позволено."""
+
+
+class QueryBudget(ContextDecorator):
+    """
+    Проверка бюджета SQL-запросов для страницы с именем ``url_name``.
+
+    Работает и как контекстный менеджер, и как декоратор, поэтому
+    подходит и для pytest-фикстур, и для тестов на unittest::
+
+        with self.query_budget("notes:list"):
+            self.author_client.get(self.list_url)
+
+    При превышении бюджета тест падает со списком выполненных запросов.
+    """
+
+    def __init__(self, url_name, budget=None, using=DEFAULT_DB_ALIAS):
+        self.url_name = url_name
+        self.budget = QUERY_BUDGETS[url_name] if budget is None else budget
+        self.connection = connections[using]
+        self.captured = None
+
+    def __enter__(self):
+        self.captured = CaptureQueriesContext(self.connection)
+        return self.captured.__enter__()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.captured.__exit__(exc_type, exc_value, traceback)
+        if exc_type is None and len(self.captured) > self.budget:
+            raise QueryBudgetExceeded(self.report())
+
+    def report(self):
+        queries = "\n".join(
+            f"{number}. {query['sql']}"
+            for number, query in enumerate(self.captured.captured_queries, 1)
+        )
+        return (
+            f"{self.url_name}: выполнено {len(self.captured)} SQL-запросов "
+            f"при бюджете {self.budget}.\n{queries}"
+        )
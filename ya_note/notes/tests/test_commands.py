@@ -0,0 +1,118 @@
+import json
+from io import StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from notes.models import Note
+from .base_test_case import BaseTestCase
+
+
+class TestNotesExchange(BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        directory = TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+
+    def call(self, *args):
+        stdout, stderr = StringIO(), StringIO()
+        call_command(*args, stdout=stdout, stderr=stderr)
+        return stdout.getvalue() + stderr.getvalue()
+
+    def test_export_jsonl(self):
+        """Выгрузка пишет по строке JSON на заметку."""
+        path = self.directory / "notes.jsonl"
+        output = self.call("export_notes", str(path), "--author", "Автор")
+        rows = [json.loads(line) for line in path.read_text().splitlines()]
+        self.assertEqual(
+            rows,
+            [
+                {
+                    "title": self.note.title,
+                    "text": self.note.text,
+                    "slug": self.note.slug,
+                    "author": self.author.username,
+                }
+            ],
+        )
+        self.assertIn("Выгружено заметок: 1", output)
+
+    def test_csv_round_trip(self):
+        """Заметки, выгруженные в CSV, загружаются обратно."""
+        path = self.directory / "notes.csv"
+        self.call("export_notes", str(path))
+        Note.objects.all().delete()
+        output = self.call("import_notes", str(path))
+        self.assertIn("Загружено заметок: 1", output)
+        note = Note.objects.get()
+        self.assertEqual(
+            (note.title, note.text, note.slug, note.author),
+            (self.note.title, self.note.text, self.note.slug, self.author),
+        )
+
+    def test_import_allocates_slugs_in_batches(self):
+        """При загрузке пустые slug подбираются с учётом уже занятых."""
+        path = self.directory / "notes.jsonl"
+        path.write_text(
+            "\n".join(
+                json.dumps({"title": self.note.title, "text": f"Текст {i}"})
+                for i in range(5)
+            )
+        )
+        with self.assertNumQueries(15):
+            self.call(
+                "import_notes", str(path),
+                "--author", self.reader.username, "--batch-size", "2",
+            )
+        slugs = set(
+            Note.objects.filter(author=self.reader)
+            .values_list("slug", flat=True)
+        )
+        self.assertEqual(
+            slugs, {f"{self.note.slug}-{number}" for number in range(2, 7)}
+        )
+
+    def test_import_unknown_author(self):
+        """Заметки неизвестного пользователя не загружаются."""
+        path = self.directory / "notes.jsonl"
+        path.write_text(json.dumps({"title": "А", "text": "Б"}))
+        with self.assertRaises(CommandError):
+            self.call("import_notes", str(path), "--author", "Никто")
+
+    def test_import_rejects_non_object_rows(self):
+        """Строка, которая не является объектом, отменяет всю загрузку."""
+        path = self.directory / "notes.jsonl"
+        path.write_text(
+            json.dumps({"title": "А", "text": "Б"}) + "\n[1, 2]\n"
+        )
+        notes_count = Note.objects.count()
+        with self.assertRaisesRegex(CommandError, "ожидается объект"):
+            self.call(
+                "import_notes", str(path),
+                "--author", self.reader.username, "--batch-size", "1",
+            )
+        self.assertEqual(Note.objects.count(), notes_count)
+
+    def test_import_duplicate_slug_fails_at_once(self):
+        """Занятый явно заданный slug не приводит к повторным вставкам."""
+        path = self.directory / "notes.jsonl"
+        path.write_text(
+            "\n".join(
+                json.dumps({"title": "А", "text": "Б", "slug": slug})
+                for slug in ("", self.note.slug)
+            )
+        )
+        with CaptureQueriesContext(connection) as queries:
+            with self.assertRaises(CommandError):
+                self.call(
+                    "import_notes", str(path),
+                    "--author", self.reader.username,
+                )
+        inserts = [q for q in queries if q["sql"].startswith("INSERT")]
+        self.assertEqual(len(inserts), 1)
+        self.assertFalse(Note.objects.filter(author=self.reader).exists())
@@ -1,6 +1,21 @@
+import itertools
+import json
+import tracemalloc
+from http import HTTPStatus
+from unittest import mock
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.template.base import Template
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 
+from notes.factories import create_notes
 from notes.forms import NoteForm
+from notes.metrics import registry
+from notes.models import Note
+from notes.profiling import memory_tracer, report
 from .base_test_case import BaseTestCase
 
 User = get_user_model()
@@ -37,3 +52,275 @@ class TestContentPage(BaseTestCase):
         response = self.author_client.get(self.edit_url)
         self.assertIn("form", response.context)
         self.assertIsInstance(response.context["form"], NoteForm)
+
+
+class TestNotesExport(BaseTestCase):
+
+    NOTES_COUNT = 100_000
+
+    def export(self, **params):
+        response = self.author_client.get(self.export_url, params)
+        return b"".join(response.streaming_content).decode()
+
+    def test_export_only_own_notes(self):
+        """В выгрузку попадают только заметки пользователя."""
+        Note.objects.create(title="Чужая", text="Текст", author=self.reader)
+        rows = self.export(format="jsonl").splitlines()
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(json.loads(rows[0])["slug"], self.note.slug)
+
+    def test_export_csv(self):
+        """Выгрузка в CSV начинается с заголовка."""
+        response = self.author_client.get(self.export_url)
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], "title,text,slug,author")
+        self.assertEqual(len(lines), 2)
+
+    def test_unknown_format(self):
+        """Неизвестный формат выгрузки приводит к 404."""
+        response = self.author_client.get(self.export_url, {"format": "xml"})
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_export_memory_is_bounded(self):
+        """Пиковая память при выгрузке 100 тысяч заметок ограничена."""
+        create_notes(
+            self.NOTES_COUNT,
+            [self.author.pk],
+            texts=itertools.repeat("Текст заметки. " * 20),
+        )
+        response = self.author_client.get(self.export_url)
+        exported_bytes = rows = 0
+        tracemalloc.start()
+        try:
+            for chunk in response.streaming_content:
+                exported_bytes += len(chunk)
+                rows += 1
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertEqual(rows, self.NOTES_COUNT + 2)  # заголовок и self.note
+        self.assertLess(peak, exported_bytes / 10)
+
+
+class TestNotesListPagination(BaseTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        create_notes(settings.NOTES_PER_PAGE, [cls.author.pk])
+
+    def test_notes_are_paginated_by_id(self):
+        """Заметки выводятся страницами в порядке создания."""
+        first_page = self.author_client.get(self.list_url).context["page_obj"]
+        second_page = self.author_client.get(
+            self.list_url, {"page": 2}
+        ).context["page_obj"]
+        self.assertEqual(len(first_page), settings.NOTES_PER_PAGE)
+        self.assertEqual(first_page[0], self.note)
+        self.assertEqual(len(second_page), 1)
+        self.assertLess(first_page[-1].id, second_page[0].id)
+
+    def test_notes_count_is_cached(self):
+        """Повторный запрос списка не считает заметки заново."""
+        self.author_client.get(self.list_url)
+        with CaptureQueriesContext(connection) as queries:
+            self.author_client.get(self.list_url)
+        self.assertFalse(
+            [query for query in queries if "COUNT(" in query["sql"]]
+        )
+
+    def test_notes_count_invalidated(self):
+        """Создание и удаление заметки обновляют количество страниц."""
+        self.author_client.get(self.list_url)
+        self.author_client.post(self.add_url, data=self.form_data)
+        paginator = self.author_client.get(self.list_url).context["paginator"]
+        self.assertEqual(paginator.count, settings.NOTES_PER_PAGE + 2)
+        self.author_client.post(self.delete_url)
+        paginator = self.author_client.get(self.list_url).context["paginator"]
+        self.assertEqual(paginator.count, settings.NOTES_PER_PAGE + 1)
+
+    def test_notes_count_invalidated_outside_views(self):
+        """Заметки, созданные и удалённые не через страницы, тоже учтены."""
+        changes = (
+            (
+                lambda: Note.objects.create(
+                    title="Из консоли", text="Текст", author=self.author
+                ),
+                settings.NOTES_PER_PAGE + 2,
+            ),
+            (
+                lambda: Note.objects.filter(title="Из консоли").delete(),
+                settings.NOTES_PER_PAGE + 1,
+            ),
+        )
+        for change, expected_count in changes:
+            self.author_client.get(self.list_url)
+            change()
+            paginator = self.author_client.get(
+                self.list_url
+            ).context["paginator"]
+            self.assertEqual(paginator.count, expected_count)
+
+
+class TestNotesSearch(BaseTestCase):
+
+    def search(self, query, client=None):
+        response = (client or self.author_client).get(
+            self.search_url, {"q": query}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        return list(response.context["object_list"])
+
+    def test_search_only_own_notes(self):
+        """Поиск находит только заметки текущего пользователя."""
+        Note.objects.create(
+            title="Заголовок другого", text="Текст", author=self.reader
+        )
+        self.assertEqual(self.search("заголовок"), [self.note])
+
+    def test_search_by_prefix_ignoring_case_and_yo(self):
+        """Слова ищутся по началу, без учёта регистра и «ё»."""
+        note = Note.objects.create(
+            title="Ёлка", text="Зелёные иголки", author=self.author
+        )
+        for query in ("елка", "ЁЛК", "зеленые игол"):
+            with self.subTest(query=query):
+                self.assertEqual(self.search(query), [note])
+
+    def test_search_ranks_title_above_text(self):
+        """Совпадение в заголовке важнее совпадения в тексте."""
+        in_text = Note.objects.create(
+            title="Покупки", text="Купить молоко", author=self.author
+        )
+        in_title = Note.objects.create(
+            title="Молоко", text="Две бутылки", author=self.author
+        )
+        self.assertEqual(self.search("молоко"), [in_title, in_text])
+
+    def test_search_index_follows_changes(self):
+        """Индекс обновляется при изменении и удалении заметки."""
+        self.note.title = "Переименованная"
+        self.note.save()
+        self.assertEqual(self.search("заголовок"), [])
+        self.assertEqual(self.search("переименованная"), [self.note])
+        self.note.delete()
+        self.assertEqual(self.search("переименованная"), [])
+
+    def test_search_without_index(self):
+        """Без SQLite или без FTS5 поиск идёт через icontains."""
+        Note.objects.create(
+            title="Заголовок другого", text="Текст", author=self.reader
+        )
+        newer = Note.objects.create(
+            title="Покупки", text="Заголовок списка", author=self.author
+        )
+        for patch in (
+            mock.patch.object(connection, "vendor", "postgresql"),
+            mock.patch("notes.search.sqlite_has_fts5", return_value=False),
+        ):
+            with self.subTest(patch=patch), patch:
+                self.assertEqual(self.search("Заголов"), [newer, self.note])
+                self.assertEqual(self.search(""), [])
+
+    def test_search_tolerates_any_query(self):
+        """Пустой запрос и синтаксис FTS5 в запросе не ломают поиск."""
+        for query in ("", '"AND (* OR', "author : author1"):
+            with self.subTest(query=query):
+                self.search(query)
+
+
+@override_settings(REQUEST_PROFILING=True, REQUEST_PROFILING_MEMORY=True)
+class TestProfiling(BaseTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.another_user.is_staff = True
+        cls.another_user.save(update_fields=["is_staff"])
+
+    def setUp(self):
+        super().setUp()
+        report.clear()
+        self.addCleanup(report.clear)
+
+    def test_server_timing_header(self):
+        """Ответ содержит измерения запроса в заголовке Server-Timing."""
+        response = self.author_client.get(self.list_url)
+        metrics = {
+            metric.split(";")[0]
+            for metric in response["Server-Timing"].split(", ")
+        }
+        self.assertEqual(metrics, {"total", "sql", "template", "memory"})
+
+    def test_profiling_report(self):
+        """Сводка профилирования накапливается по именам маршрутов."""
+        self.author_client.get(self.list_url)
+        self.author_client.get(self.list_url)
+        summary = self.another_user_client.get(self.profiling_url).json()
+        notes_list = summary["notes:list"]
+        self.assertEqual(notes_list["requests"], 2)
+        self.assertGreater(notes_list["sql_count"], 0)
+        self.assertGreater(notes_list["template_ms"], 0)
+        self.assertGreater(notes_list["max_memory_peak"], 0)
+        self.another_user_client.delete(self.profiling_url)
+        self.assertNotIn("notes:list", report.summary())
+
+    def test_measurements_do_not_outlive_request(self):
+        """Подмена Template.render и tracemalloc не переживают запрос."""
+        render = Template.render
+        self.author_client.get(self.list_url)
+        self.assertIs(Template.render, render)
+        baseline = memory_tracer.start()
+        try:
+            self.assertIsNone(memory_tracer.start())
+        finally:
+            memory_tracer.stop(baseline)
+
+    @override_settings(REQUEST_PROFILING=False)
+    def test_disabled_profiling(self):
+        """Без профилирования нет заголовка, а сводка недоступна."""
+        response = self.author_client.get(self.list_url)
+        self.assertNotIn("Server-Timing", response)
+        response = self.another_user_client.get(self.profiling_url)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+
+class TestMetrics(BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        registry.clear()
+        self.addCleanup(registry.clear)
+
+    def test_metrics_exposition(self):
+        """Метрики отдаются в текстовом формате Prometheus."""
+        self.author_client.get(self.list_url)
+        self.author_client.get(self.list_url)
+        response = self.client.get(self.metrics_url)
+        self.assertTrue(
+            response["Content-Type"].startswith("text/plain; version=0.0.4")
+        )
+        lines = response.content.decode().splitlines()
+        for line in (
+            "# TYPE http_request_duration_seconds histogram",
+            'http_request_duration_seconds_count{view="notes:list"} 2',
+            'http_responses_total{view="notes:list",status="200"} 2',
+            'cache_lookups_total{cache="note_count",result="miss"} 1',
+            'cache_lookups_total{cache="note_count",result="hit"} 1',
+        ):
+            with self.subTest(line=line):
+                self.assertIn(line, lines)
+
+    def test_metrics_only_for_allowed_ips(self):
+        """С посторонних адресов метрики не отдаются."""
+        response = self.client.get(self.metrics_url, REMOTE_ADDR="203.0.113.7")
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+
+    def test_metrics_count_model_changes(self):
+        """Создание заметки попадает в счётчик изменений моделей."""
+        self.author_client.post(self.add_url, data=self.form_data)
+        self.assertIn(
+            'model_changes_total{model="notes.note",action="created"} 1',
+            registry.exposition().splitlines(),
+        )
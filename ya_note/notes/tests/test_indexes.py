@@ -0,0 +1,33 @@
+from unittest import skipUnless
+
+from django.db import connection
+
+from notes.models import Note
+from .base_test_case import BaseTestCase
+
+
+@skipUnless(connection.vendor == "sqlite", "EXPLAIN QUERY PLAN из SQLite")
+class TestQueryPlans(BaseTestCase):
+
+    def assert_uses_index(self, queryset):
+        """Запрос не сканирует таблицу и не сортирует во временном B-дереве."""
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            plan = [row[-1] for row in cursor.fetchall()]
+        for step in plan:
+            self.assertNotIn("TEMP B-TREE", step, plan)
+            if step.startswith("SCAN"):
+                self.assertIn("INDEX", step, plan)
+
+    def test_notes_list_uses_index(self):
+        """Список заметок автора читается по индексу (author, id)."""
+        self.assert_uses_index(
+            Note.objects.filter(author=self.author).order_by("id")
+        )
+
+    def test_note_lookup_uses_index(self):
+        """Заметка автора ищется по индексу."""
+        self.assert_uses_index(
+            Note.objects.filter(author=self.author, slug=self.note.slug)
+        )
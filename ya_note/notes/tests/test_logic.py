@@ -1,8 +1,11 @@
 from http import HTTPStatus
+from unittest import mock
 
 from django.contrib.auth import get_user_model
 from pytils.translit import slugify
 
+from notes import slugs
+from notes.factories import create_notes
 from notes.forms import WARNING
 from notes.models import Note
 from .base_test_case import BaseTestCase
@@ -99,3 +102,96 @@ class TestNoteEditDelete(BaseTestCase):
         response = self.reader_client.delete(self.delete_url)
         self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
         self.assertEqual(Note.objects.count(), notes_count_before)
+
+
+class TestSlugAllocation(BaseTestCase):
+
+    def test_same_title_gets_numbered_slug(self):
+        """Заметки с одинаковым заголовком получают slug с номером."""
+        self.form_data.pop("slug")
+        for _ in range(2):
+            self.author_client.post(self.add_url, data=self.form_data)
+        expected_slug = slugify(self.form_data["title"])
+        self.assertQuerysetEqual(
+            Note.objects.filter(title=self.form_data["title"])
+            .order_by("id")
+            .values_list("slug", flat=True),
+            [expected_slug, f"{expected_slug}-2"],
+        )
+
+    def test_clearing_slug_keeps_own_slug(self):
+        """Очищенный при редактировании slug не конфликтует сам с собой."""
+        self.form_data.update(title=self.note.title, slug="")
+        self.author_client.post(self.edit_url, data=self.form_data)
+        self.note.refresh_from_db()
+        self.assertEqual(self.note.slug, slugify(self.note.title))
+
+    def test_long_title_fits_slug_length(self):
+        """Номер не выводит slug за пределы допустимой длины."""
+        max_length = Note._meta.get_field("slug").max_length
+        title = "д" * max_length
+        notes = [
+            Note.objects.create(title=title, text="Текст", author=self.author)
+            for _ in range(2)
+        ]
+        self.assertEqual(len(notes[1].slug), max_length)
+        self.assertTrue(notes[1].slug.endswith("-2"))
+
+    def test_slug_taken_concurrently_is_reallocated(self):
+        """Slug, занятый параллельной вставкой, подбирается заново."""
+        stale_lookup = [set()]
+
+        def taken_slugs(*args):
+            if stale_lookup:
+                return stale_lookup.pop()
+            return real_taken_slugs(*args)
+
+        real_taken_slugs = slugs.taken_slugs
+        with mock.patch.object(slugs, "taken_slugs", taken_slugs):
+            note = Note.objects.create(
+                title=self.note.title, text="Текст", author=self.author
+            )
+        self.assertEqual(note.slug, f"{self.note.slug}-2")
+
+    def test_bulk_create_allocates_slugs_in_one_query(self):
+        """Массовое создание подбирает slug одним запросом на пачку."""
+        notes = [
+            Note(title=title, text="Текст", author=self.author)
+            for title in (self.note.title, self.note.title, "Другая")
+        ]
+        with self.assertNumQueries(4):
+            Note.objects.bulk_create(notes)
+        self.assertEqual(
+            [note.slug for note in notes],
+            [f"{self.note.slug}-2", f"{self.note.slug}-3", slugify("Другая")],
+        )
+
+
+class TestFactories(BaseTestCase):
+
+    def test_create_notes(self):
+        """Фабрика раздаёт заметки авторам по очереди с уникальными slug."""
+        authors = [self.author.pk, self.reader.pk]
+        # Точка сохранения, вставка и её освобождение, наибольший ключ
+        # и замена временных slug.
+        with self.assertNumQueries(5):
+            ids = create_notes(4, authors, seed=1)
+        notes = Note.objects.filter(pk__in=ids).order_by("pk")
+        self.assertEqual([note.author_id for note in notes], authors * 2)
+        self.assertEqual(
+            [note.slug for note in notes], [f"note-{pk}" for pk in ids]
+        )
+
+    def test_create_notes_is_deterministic(self):
+        """Одинаковый seed даёт одинаковые заметки."""
+        contents = [
+            list(
+                Note.objects.filter(
+                    pk__in=create_notes(3, [self.author.pk], seed=5)
+                )
+                .order_by("pk")
+                .values_list("title", "text")
+            )
+            for _ in range(2)
+        ]
+        self.assertEqual(contents[0], contents[1])
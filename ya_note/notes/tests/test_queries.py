@@ -0,0 +1,64 @@
+from http import HTTPStatus
+
+from django.test import override_settings
+
+from notes.factories import create_notes
+from notes.urls import app_name, urlpatterns
+from .base_test_case import BaseTestCase
+from .query_budget import QUERY_BUDGETS
+
+
+class TestQueryBudgets(BaseTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        create_notes(50, [cls.author.pk])
+        cls.another_user.is_staff = True
+        cls.another_user.save(update_fields=["is_staff"])
+
+    def test_every_route_has_budget(self):
+        """Для каждого маршрута notes.urls задан бюджет SQL-запросов."""
+        url_names = {f"{app_name}:{pattern.name}" for pattern in urlpatterns}
+        self.assertLessEqual(url_names, QUERY_BUDGETS.keys())
+
+    def test_query_budgets(self):
+        """
+        Страницы укладываются в бюджет SQL-запросов.
+
+        Код ответа проверяется, чтобы бюджет не «выполнила» страница
+        ошибки или перенаправление.
+        """
+        edit_data = dict(self.form_data, slug=self.note.slug)
+        ok, found = HTTPStatus.OK, HTTPStatus.FOUND
+        cases = (
+            ("notes:home", self.home_url, "get", ok),
+            ("notes:add", self.add_url, "get", ok),
+            ("notes:add", self.add_url, "post", found),
+            ("notes:list", self.list_url, "get", ok),
+            ("notes:success", self.url_to_notes, "get", ok),
+            ("notes:export", self.export_url, "get", ok),
+            ("notes:search", self.search_url, "get", ok, {"q": "заметка"}),
+            ("notes:detail", self.detail_url, "get", ok),
+            ("notes:edit", self.edit_url, "get", ok),
+            ("notes:edit", self.edit_url, "post", found, edit_data),
+            ("notes:delete", self.delete_url, "get", ok),
+            ("notes:delete", self.delete_url, "post", found),
+            ("notes:metrics", self.metrics_url, "get", ok),
+        )
+        for url_name, url, method, expected_status, *data in cases:
+            with self.subTest(url_name=url_name, method=method):
+                with self.query_budget(url_name):
+                    response = getattr(self.author_client, method)(
+                        url, data=data[0] if data else self.form_data
+                    )
+                    if response.streaming:
+                        b"".join(response.streaming_content)
+                self.assertEqual(response.status_code, expected_status)
+
+    @override_settings(REQUEST_PROFILING=True)
+    def test_profiling_query_budget(self):
+        """Сводка профилирования укладывается в бюджет, когда включена."""
+        with self.query_budget("notes:profiling"):
+            response = self.another_user_client.get(self.profiling_url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
@@ -1,4 +1,8 @@
 from http import HTTPStatus
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
 from .base_test_case import BaseTestCase
 
 
@@ -11,6 +15,7 @@ class TestRoutes(BaseTestCase):
             self.login_url,
             self.logout_url,
             self.signup_url,
+            self.metrics_url,
         )
         for url in urls:
             with self.subTest(url=url):
@@ -21,6 +26,7 @@ class TestRoutes(BaseTestCase):
         """Доступность страниц для залогиненных пользователей."""
         urls = (
             self.list_url,
+            self.search_url,
             self.url_to_notes,
             self.add_url,
         )
@@ -53,11 +59,42 @@ class TestRoutes(BaseTestCase):
             self.edit_url,
             self.delete_url,
             self.list_url,
+            self.search_url,
             self.url_to_notes,
             self.add_url,
+            self.profiling_url,
         )
         for url in urls:
             with self.subTest(url=url):
                 redirect_url = f"{self.login_url}?next={url}"
                 response = self.client.get(url)
                 self.assertRedirects(response, redirect_url)
+
+    def test_profiling_report_only_for_staff(self):
+        """Сводка профилирования закрыта для обычных пользователей."""
+        response = self.reader_client.get(self.profiling_url)
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+
+    def test_note_detail_not_modified(self):
+        """Повторный запрос заметки с ETag получает 304 без шаблонов."""
+        with CaptureQueriesContext(connection) as full_page:
+            response = self.author_client.get(self.detail_url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        with CaptureQueriesContext(connection) as not_modified:
+            response = self.author_client.get(
+                self.detail_url, HTTP_IF_NONE_MATCH=response["ETag"]
+            )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        self.assertFalse(response.templates)
+        self.assertLess(len(not_modified), len(full_page))
+
+    def test_note_etag_changes_with_content(self):
+        """Правка текста заметки меняет ETag."""
+        etag = self.author_client.get(self.detail_url)["ETag"]
+        self.note.text = "Исправленный текст"
+        self.note.save()
+        response = self.author_client.get(
+            self.detail_url, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertNotEqual(response["ETag"], etag)
@@ -11,5 +11,11 @@ urlpatterns = [
     path("note/<slug:slug>/", views.NoteDetail.as_view(), name="detail"),
     path("delete/<slug:slug>/", views.NoteDelete.as_view(), name="delete"),
     path("notes/", views.NotesList.as_view(), name="list"),
+    path("search/", views.NoteSearch.as_view(), name="search"),
     path("done/", views.NoteSuccess.as_view(), name="success"),
+    path("export/", views.NoteExport.as_view(), name="export"),
+    path("metrics", views.Metrics.as_view(), name="metrics"),
+    path(
+        "profiling/", views.ProfilingReport.as_view(), name="profiling"
+    ),
 ]
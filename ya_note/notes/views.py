@@ -1,9 +1,25 @@
-from django.contrib.auth.mixins import LoginRequiredMixin
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth.mixins import (
+    LoginRequiredMixin, UserPassesTestMixin
+)
+from django.core.exceptions import PermissionDenied
+from django.http import (
+    Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+)
 from django.urls import reverse_lazy
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
 from django.views import generic
 
+from .exchange import FORMATS, WRITERS, export_rows
 from .forms import NoteForm
+from .metrics import registry
 from .models import Note
+from .paginator import AuthorNotesPaginator
+from .profiling import report
+from .search import search_note_ids
 
 
 class Home(generic.TemplateView):
@@ -36,9 +52,7 @@ class NoteCreate(NoteBase, generic.CreateView):
     form_class = NoteForm
 
     def form_valid(self, form):
-        new_note = form.save(commit=False)
-        new_note.author = self.request.user
-        new_note.save()
+        form.instance.author = self.request.user
         return super().form_valid(form)
 
 
@@ -59,9 +73,146 @@ class NotesList(NoteBase, generic.ListView):
     """Список всех заметок пользователя."""
 
     template_name = "notes/list.html"
+    ordering = ("id",)
+    paginator_class = AuthorNotesPaginator
+
+    def get_queryset(self):
+        return super().get_queryset().order_by(*self.get_ordering())
+
+    def get_paginate_by(self, queryset):
+        return settings.NOTES_PER_PAGE
+
+    def get_paginator(self, queryset, per_page, **kwargs):
+        """Количество заметок берётся из кэша, а не из COUNT(*)."""
+        return super().get_paginator(
+            queryset, per_page, author_id=self.request.user.pk, **kwargs
+        )
+
+
+class NoteSearch(NoteBase, generic.ListView):
+    """Поиск по заметкам пользователя."""
+
+    template_name = "notes/search.html"
+
+    def get_queryset(self):
+        """
+        Заметки по релевантности к запросу.
+
+        Индекс возвращает только идентификаторы заметок автора, а сами
+        заметки загружаются через NoteBase.get_queryset(), поэтому чужие
+        заметки в результаты не попадут.
+        """
+        ids = search_note_ids(
+            self.request.user.pk,
+            self.request.GET.get("q", ""),
+            settings.NOTES_SEARCH_LIMIT,
+        )
+        if not ids:
+            return []
+        notes = super().get_queryset().in_bulk(ids)
+        return [notes[pk] for pk in ids if pk in notes]
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["query"] = self.request.GET.get("q", "")
+        return context
 
 
 class NoteDetail(NoteBase, generic.DetailView):
     """Заметка подробно."""
 
     template_name = "notes/detail.html"
+
+    def get_etag(self):
+        """
+        Вычисляет ETag по содержимому заметки.
+
+        Читаются только нужные поля, без создания объекта модели; чужая
+        или несуществующая заметка ETag не получает.
+        """
+        content = (
+            self.get_queryset()
+            .filter(slug=self.kwargs["slug"])
+            .values_list("id", "title", "text")
+            .first()
+        )
+        if content is None:
+            return None
+        digest = hashlib.md5(repr(content).encode()).hexdigest()
+        return quote_etag(digest)
+
+    def get(self, request, *args, **kwargs):
+        etag = self.get_etag()
+        if etag is None:
+            return super().get(request, *args, **kwargs)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        response.headers.setdefault("ETag", etag)
+        return response
+
+
+class NoteExport(NoteBase, generic.View):
+    """Потоковая выгрузка всех заметок пользователя в CSV или JSON Lines."""
+
+    chunk_size = 2000
+    content_types = {
+        "csv": "text/csv; charset=utf-8",
+        "jsonl": "application/x-ndjson; charset=utf-8",
+    }
+
+    def get(self, request, *args, **kwargs):
+        file_format = request.GET.get("format", "csv")
+        if file_format not in FORMATS:
+            raise Http404("Неизвестный формат выгрузки.")
+        rows = export_rows(
+            self.get_queryset().order_by("pk"), self.chunk_size
+        )
+        response = StreamingHttpResponse(
+            WRITERS[file_format](rows),
+            content_type=self.content_types[file_format],
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="notes.{file_format}"'
+        )
+        return response
+
+
+class ProfilingReport(UserPassesTestMixin, generic.View):
+    """Сводка профилирования запросов; доступна только персоналу."""
+
+    def test_func(self):
+        return self.request.user.is_staff
+
+    def get(self, request, *args, **kwargs):
+        if not settings.REQUEST_PROFILING:
+            raise Http404("Профилирование запросов выключено.")
+        return JsonResponse(
+            report.summary(), json_dumps_params={"ensure_ascii": False}
+        )
+
+    def delete(self, request, *args, **kwargs):
+        """Сбрасывает накопленную сводку."""
+        report.clear()
+        return JsonResponse({})
+
+
+class Metrics(generic.View):
+    """
+    Метрики проекта для сборщика Prometheus.
+
+    Доступны только с адресов из METRICS_ALLOWED_IPS.
+    """
+
+    content_type = "text/plain; version=0.0.4; charset=utf-8"
+
+    def get(self, request, *args, **kwargs):
+        if not settings.METRICS_ENABLED:
+            raise Http404("Метрики выключены.")
+        if request.META.get("REMOTE_ADDR") not in (
+            settings.METRICS_ALLOWED_IPS
+        ):
+            raise PermissionDenied("Метрики доступны только сборщику.")
+        return HttpResponse(
+            registry.exposition(), content_type=self.content_type
+        )
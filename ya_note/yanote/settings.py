@@ -22,6 +22,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "notes.metrics.MetricsMiddleware",
+    "notes.profiling.ProfilingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -59,6 +61,12 @@ DATABASES = {
     }
 }
 
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -87,3 +95,19 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 LOGIN_URL = reverse_lazy("users:login")
 LOGIN_REDIRECT_URL = reverse_lazy("notes:home")
+
+NOTES_PER_PAGE = 20
+NOTE_COUNT_CACHE_TIMEOUT = 60 * 10
+NOTES_SEARCH_LIMIT = 50
+
+# Профилирование запросов: заголовок Server-Timing и сводка на странице
+# notes:profiling. Пик памяти измеряется через tracemalloc, который
+# замедляет запросы в несколько раз, поэтому включается отдельно.
+REQUEST_PROFILING = False
+REQUEST_PROFILING_MEMORY = False
+
+# Метрики в формате Prometheus на странице /metrics. Страница отдаётся
+# только с адресов METRICS_ALLOWED_IPS: сборщик метрик ходит к ней
+# напрямую, минуя прокси, и не входит на сайт.
+METRICS_ENABLED = False
+METRICS_ALLOWED_IPS = ("127.0.0.1", "::1")